@@ -0,0 +1,128 @@
+"""Serialization backends and cached task dicts on the A2A `tasks/get` path.
+
+    python benchmarks/bench_serialization.py
+    python benchmarks/bench_serialization.py --tasks 200 --requests 5000 --reply-kb 32
+
+Two measurements per JSON backend (see `core.serialization`):
+
+  encode   tasks/get bodies encoded per second — task dict + JSON encoding,
+           the part this layer changes
+  http     tasks/get requests per second through the full FastAPI app
+           in-process (httpx ASGI transport, no sockets)
+
+"baseline" is the stdlib backend with the finished-task dict cache disabled,
+which is how every request was served before.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import Callable, List
+
+import httpx
+
+from oflo_agent_protocol.audit.metrics import MetricsRegistry
+from oflo_agent_protocol.core import serialization
+from oflo_agent_protocol.protocols.a2a.server import A2AServer
+from oflo_agent_protocol.protocols.a2a.types import (
+    A2AMessage,
+    A2ATask,
+    AgentCard,
+    Artifact,
+    TaskStatusUpdate,
+    TextPart,
+    jsonrpc_response,
+)
+
+
+class _Agent:
+    async def chat(self, text: str) -> str:
+        return text
+
+
+def _task(n: int, reply_kb: int) -> A2ATask:
+    reply = ("lorem ipsum dolor sit amet, consectetur adipiscing elit. " * (reply_kb * 18))[
+        : reply_kb * 1024
+    ]
+    agent_msg = A2AMessage.text_message(role="agent", text=reply)
+    return A2ATask(
+        task_id=f"t{n}",
+        session_id=f"s{n % 10}",
+        status=TaskStatusUpdate(state="completed", message=agent_msg),
+        history=[A2AMessage.text_message(role="user", text=f"question {n}"), agent_msg],
+        artifacts=[Artifact(name="reply", parts=[TextPart(text=reply)])],
+        metadata={"skillId": "analyst", "n": n},
+    )
+
+
+def _rate(fn: Callable[[], None], count: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return count / (time.perf_counter() - t0)
+
+
+async def _http_rate(server: A2AServer, ids: List[str], count: int) -> float:
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://a2a") as client:
+        t0 = time.perf_counter()
+        for i in range(count):
+            tid = ids[i % len(ids)]
+            resp = await client.post(
+                "/", json={"jsonrpc": "2.0", "id": i, "method": "tasks/get", "params": {"id": tid}}
+            )
+            resp.raise_for_status()
+        return count / (time.perf_counter() - t0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--reply-kb", type=int, default=8)
+    args = parser.parse_args()
+
+    tasks = [_task(n, args.reply_kb) for n in range(args.tasks)]
+    ids = [t.task_id for t in tasks]
+    card = AgentCard(name="bench", description="", url="http://localhost:9000")
+    server = A2AServer(card=card, agent=_Agent(), metrics=MetricsRegistry())
+    for task in tasks:
+        server._tasks.put(task)
+
+    installed = []
+    for name in ("orjson", "msgspec", "json"):
+        try:
+            serialization.set_backend(name)
+            installed.append(name)
+        except ImportError:
+            print(f"{name:>9}: not installed")
+
+    cached_to_dict = A2ATask.to_dict
+    runs = [("baseline", "json", False)] + [(name, name, True) for name in installed]
+    results = {}
+    for label, backend, cached in runs:
+        serialization.set_backend(backend)
+        A2ATask.to_dict = cached_to_dict if cached else A2ATask._build_dict  # type: ignore[method-assign]
+        try:
+            i = iter(range(10**12))
+
+            def encode() -> None:
+                task = tasks[next(i) % len(tasks)]
+                serialization.dumps(jsonrpc_response(task.to_dict(), req_id=1))
+
+            enc = _rate(encode, args.requests * 5)
+            http = asyncio.run(_http_rate(server, ids, args.requests))
+        finally:
+            A2ATask.to_dict = cached_to_dict  # type: ignore[method-assign]
+        results[label] = (enc, http)
+
+    base_enc, base_http = results["baseline"]
+    print(f"{args.tasks} finished tasks, ~{args.reply_kb} KiB reply each")
+    print(f"{'':>9}  {'encode/s':>10}  {'':>6}  {'http req/s':>10}")
+    for label, (enc, http) in results.items():
+        print(f"{label:>9}  {enc:>10,.0f}  {enc / base_enc:>5.1f}x  {http:>10,.0f}  {http / base_http:>5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
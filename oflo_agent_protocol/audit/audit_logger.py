@@ -3,12 +3,12 @@ from __future__ import annotations
 
 import asyncio
 import hashlib
-import json
 import logging
 import os
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from oflo_agent_protocol.core import serialization
 from oflo_agent_protocol.core.types import AuditRecord
 
 logger = logging.getLogger(__name__)
@@ -36,9 +36,11 @@ class AuditLogger:
         record.project_id = self.project_id
         async with self._lock:
             try:
-                with self._file.open("a", encoding="utf-8") as fh:
-                    fh.write(json.dumps(record.to_dict()) + "\n")
-            except OSError as e:
+                line = serialization.dumps(record.to_dict()) + b"\n"
+                with self._file.open("ab") as fh:
+                    fh.write(line)
+            except (OSError, TypeError, ValueError) as e:
+                # An unencodable record (e.g. a circular reference) must not fail the agent turn.
                 logger.error("Audit write failed: %s", e)
 
     async def query(
@@ -53,7 +55,7 @@ class AuditLogger:
         try:
             with self._file.open("r", encoding="utf-8") as fh:
                 for line in fh:
-                    r = json.loads(line)
+                    r = serialization.loads(line)
                     if agent_id and r.get("agent_id") != agent_id:
                         continue
                     if since_ts and r.get("timestamp", "") < since_ts:
@@ -72,7 +74,7 @@ class AuditLogger:
         try:
             with self._file.open("r", encoding="utf-8") as fh:
                 for line in fh:
-                    r = json.loads(line)
+                    r = serialization.loads(line)
                     total_cost += r.get("cost_usd", 0)
                     total_tokens += (r.get("token_usage") or {}).get("total_tokens", 0)
                     total_calls += 1
@@ -0,0 +1,402 @@
+"""Pre-allocated counters / histograms with an OpenMetrics text exporter.
+
+The hot path (`inc()` / `observe()`) never takes a lock: every thread writes to
+its own pre-allocated shard, and `render()` sums the shards at scrape time.
+A lock is only taken the first time a thread touches a metric, or the first
+time a new label combination is seen — both bounded events.
+
+Label cardinality is capped per metric family (`max_series`).  Once the cap is
+reached, new label combinations collapse into a single overflow series so a
+misbehaving caller cannot grow memory without bound.
+
+Usage::
+
+    from oflo_agent_protocol.audit.metrics import get_metrics_registry
+
+    reg = get_metrics_registry()
+    calls = reg.counter("oflo_llm_calls", "LLM calls", ["project", "outcome"])
+    calls.labels("marketing", "success").inc()
+    print(reg.render())
+"""
+from __future__ import annotations
+
+import inspect
+import math
+import threading
+import weakref
+from abc import ABC, abstractmethod
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+DEFAULT_LATENCY_BUCKETS_MS: Tuple[float, ...] = (
+    5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000,
+)
+
+_OVERFLOW_LABEL = "__overflow__"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Child:
+    """A single labelled series, bound to a pre-allocated slot."""
+
+    __slots__ = ("_metric", "_offset")
+
+    def __init__(self, metric: "_Metric", offset: int) -> None:
+        self._metric = metric
+        self._offset = offset
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._metric._shard()[self._offset] += amount
+
+    def observe(self, value: float) -> None:
+        metric = self._metric
+        shard = metric._shard()
+        base = self._offset
+        # Linear scan is faster than bisect for the ~15 buckets we use.
+        i = 0
+        for bound in metric._buckets:
+            if value <= bound:
+                break
+            i += 1
+        shard[base + i] += 1
+        shard[base + metric._n_buckets] += value  # sum
+        shard[base + metric._n_buckets + 1] += 1  # count
+
+    def set(self, value: float) -> None:
+        self._metric._shared[self._offset] = value
+
+
+class _Metric(ABC):
+    type_name = ""
+    _width = 1
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        max_series: int = 1000,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames: Tuple[str, ...] = tuple(labelnames)
+        self._max_series = max(1, max_series)
+        self._size = (self._max_series + 1) * self._width  # +1 overflow slot
+        self._children: Dict[Tuple[str, ...], _Child] = {}
+        self._order: List[Tuple[str, ...]] = []
+        self._free: List[int] = []  # slots of removed series, reused first
+        self._next_offset = 0
+        self._shards: List[array] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._overflow = _Child(self, self._max_series * self._width)
+
+    # ------------------------------------------------------------------
+    # Series lookup
+    # ------------------------------------------------------------------
+
+    def labels(self, *values: str) -> _Child:
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is not None:
+            return child
+        if len(key) != len(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects {len(self.labelnames)} label values, got {len(key)}"
+            )
+        with self._lock:
+            child = self._children.get(key)
+            if child is not None:
+                return child
+            if len(self._order) >= self._max_series:
+                return self._overflow
+            if self._free:
+                offset = self._free.pop()
+            else:
+                offset = self._next_offset
+                self._next_offset += self._width
+            child = _Child(self, offset)
+            self._order.append(key)
+            self._children[key] = child
+            return child
+
+    def remove(self, *values: str) -> bool:
+        """
+        Drop the series for `values`; its slot is zeroed and reused by the next
+        new label combination, so a child obtained earlier must not be used again.
+        """
+        key = tuple(str(v) for v in values)
+        with self._lock:
+            child = self._children.pop(key, None)
+            if child is None:
+                return False
+            self._order.remove(key)
+            self._clear_slot(child._offset)
+            self._free.append(child._offset)
+            return True
+
+    def _clear_slot(self, offset: int) -> None:
+        zeros = array("d", bytes(8 * self._width))
+        for shard in self._shards:
+            shard[offset:offset + self._width] = zeros
+
+    def _shard(self) -> array:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = array("d", bytes(8 * self._size))
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def _collect(self) -> array:
+        """Sum all per-thread shards into a single snapshot array."""
+        total = array("d", bytes(8 * self._size))
+        for shard in list(self._shards):
+            for i, v in enumerate(shard):
+                if v:
+                    total[i] += v
+        return total
+
+    def _series(self) -> Iterable[Tuple[Tuple[str, ...], int]]:
+        for key in list(self._order):
+            child = self._children.get(key)
+            if child is not None:
+                yield key, child._offset
+        if len(self._order) >= self._max_series:
+            yield (_OVERFLOW_LABEL,) * len(self.labelnames), self._max_series * self._width
+
+    @abstractmethod
+    def _render_samples(self, snapshot: array) -> List[str]:
+        ...
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# TYPE {self.name} {self.type_name}",
+            f"# HELP {self.name} {_escape(self.documentation)}",
+        ]
+        lines.extend(self._render_samples(self._collect()))
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonic counter, exported as `<name>_total`."""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _render_samples(self, snapshot: array) -> List[str]:
+        return [
+            f"{self.name}_total{_format_labels(self.labelnames, key)} "
+            f"{_format_value(snapshot[offset])}"
+            for key, offset in self._series()
+        ]
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram; buckets are pre-allocated per series."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS_MS,
+        max_series: int = 1000,
+    ) -> None:
+        self._buckets: Tuple[float, ...] = tuple(sorted(float(b) for b in buckets))
+        self._n_buckets = len(self._buckets) + 1  # + the +Inf bucket
+        self._width = self._n_buckets + 2  # + sum + count
+        super().__init__(name, documentation, labelnames, max_series)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _render_samples(self, snapshot: array) -> List[str]:
+        lines: List[str] = []
+        bounds = self._buckets + (math.inf,)
+        for key, offset in self._series():
+            cumulative = 0.0
+            for i, bound in enumerate(bounds):
+                cumulative += snapshot[offset + i]
+                le = 'le="+Inf"' if bound == math.inf else f'le="{bound!r}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} "
+                    f"{_format_value(cumulative)}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_count{labels} {_format_value(snapshot[offset + self._n_buckets + 1])}")
+            lines.append(f"{self.name}_sum{labels} {_format_value(snapshot[offset + self._n_buckets])}")
+        return lines
+
+
+class Gauge(_Metric):
+    """
+    Point-in-time value.
+
+    Gauges are last-writer-wins rather than sharded, so they live in one shared
+    array.  `set_function()` registers a callback evaluated at scrape time.
+    """
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        max_series: int = 1000,
+    ) -> None:
+        super().__init__(name, documentation, labelnames, max_series)
+        self._shared = array("d", bytes(8 * self._size))
+        self._functions: Dict[Tuple[str, ...], List[Callable[[], Optional[Callable[[], float]]]]] = {}
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def set_function(self, fn: Callable[[], float], *values: str) -> None:
+        """
+        Evaluate `fn()` for this series at scrape time.  Callbacks registered
+        for the same labels are summed.  A bound method is held weakly, so a
+        metric never keeps its owner alive; the series goes once every
+        callback is removed (`remove_function()`) or garbage-collected.
+        """
+        key = tuple(str(v) for v in values)
+        self.labels(*key)  # reserve the series
+        ref = weakref.WeakMethod(fn) if inspect.ismethod(fn) else (lambda: fn)
+        with self._lock:
+            self._functions.setdefault(key, []).append(ref)  # type: ignore[arg-type]
+
+    def remove_function(self, fn: Callable[[], float], *values: str) -> None:
+        """Unregister a callback added with `set_function()`."""
+        key = tuple(str(v) for v in values)
+        with self._lock:
+            refs = self._functions.get(key)
+            if refs is None:
+                return
+            refs[:] = [r for r in refs if r() is not None and r() != fn]
+            if refs:
+                return
+            del self._functions[key]
+        self.remove(*key)
+
+    def _clear_slot(self, offset: int) -> None:
+        super()._clear_slot(offset)
+        self._shared[offset] = 0.0
+
+    def _collect(self) -> array:
+        for key, refs in list(self._functions.items()):
+            child = self._children.get(key)
+            fns = [fn for fn in (r() for r in list(refs)) if fn is not None]
+            if child is None or not fns:
+                with self._lock:
+                    self._functions.pop(key, None)
+                self.remove(*key)
+                continue
+            total = 0.0
+            for fn in fns:
+                try:
+                    total += float(fn())
+                except Exception:
+                    pass
+            self._shared[child._offset] = total
+        return self._shared
+
+    def _render_samples(self, snapshot: array) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(snapshot[offset])}"
+            for key, offset in self._series()
+        ]
+
+
+class MetricsRegistry:
+    """Named collection of metric families with OpenMetrics exposition."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls: type, name: str, *args, **kwargs) -> _Metric:
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = cls(name, *args, **kwargs)
+                    self._metrics[name] = metric
+        if not isinstance(metric, cls):
+            raise ValueError(f"Metric {name!r} already registered as {metric.type_name}")
+        return metric
+
+    def counter(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        max_series: int = 1000,
+    ) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames, max_series=max_series)  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS_MS,
+        max_series: int = 1000,
+    ) -> Histogram:
+        return self._get_or_create(  # type: ignore[return-value]
+            Histogram, name, documentation, labelnames, buckets=buckets, max_series=max_series
+        )
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        max_series: int = 1000,
+    ) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames, max_series=max_series)  # type: ignore[return-value]
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+# Module-level default registry — shared by Telemetry and the protocol servers
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    return _registry
@@ -0,0 +1,196 @@
+"""JSON-schema validation for structured agent outputs.
+
+Schemas are validated with `jsonschema` (draft-07) — an optional extra:
+
+    pip install oflo-ai-agent-protocol[schema]
+
+Compiled validators are cached by the schema's canonical JSON form (see
+`compile_schema()`).  Two keywords differ from stock `jsonschema`:
+
+  • `multipleOf` allows float rounding error, so 0.3 is a multiple of 0.1
+    and 19.99 a multiple of 0.01.
+  • `required` reports the missing key's own path ("items[1].sku") rather
+    than the path of the object that lacks it.
+
+`format` is treated as an annotation (the draft-07 default) and only local
+`$ref`s ("#", "#/definitions/…") are allowed; a dangling one is reported
+when the schema is compiled, not on first use.
+
+Without `jsonschema` installed only the top-level `required` keys are
+checked, and a warning says so once.
+
+Usage::
+
+    validator = compile_schema({"type": "object", "required": ["id"]})
+    for err in validator.errors({"name": "x"}):
+        print(err.path, err.keyword, err.message)
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Iterable, List, Optional
+from urllib.parse import unquote
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SchemaError:
+    path: str        # "" for the document root, else e.g. "items[3].name"
+    keyword: str     # the schema keyword that failed ("false" for a `false` schema)
+    message: str
+
+
+class SchemaCompileError(ValueError):
+    """Raised when a schema cannot be compiled (bad $ref, bad keyword value, …)."""
+
+
+def _format_path(parts: Iterable[Any]) -> str:
+    path = ""
+    for part in parts:
+        if isinstance(part, int):
+            path = f"{path}[{part}]"
+        else:
+            path = f"{path}.{part}" if path else str(part)
+    return path
+
+
+def _check_refs(node: Any, root: Any) -> None:
+    if isinstance(node, list):
+        for item in node:
+            _check_refs(item, root)
+        return
+    if not isinstance(node, dict):
+        return
+    ref = node.get("$ref")
+    if isinstance(ref, str):
+        if not ref.startswith("#"):
+            raise SchemaCompileError(f"only local $ref is supported, got {ref!r}")
+        target = root
+        for token in filter(None, ref[1:].split("/")):
+            token = unquote(token).replace("~1", "/").replace("~0", "~")
+            try:
+                target = target[int(token)] if isinstance(target, list) else target[token]
+            except (KeyError, IndexError, ValueError, TypeError):
+                raise SchemaCompileError(f"unresolvable $ref {ref!r}") from None
+    for key, value in node.items():
+        if key not in ("enum", "const"):
+            _check_refs(value, root)
+
+
+# ── jsonschema keyword overrides ─────────────────────────────────────────────
+
+_validator_class: Any = None
+_validator_lock = threading.Lock()
+_warned_missing = False
+
+
+def _multiple_of(validator: Any, divisor: Any, instance: Any, schema: Any) -> Iterable[Any]:
+    from jsonschema.exceptions import ValidationError
+
+    if not validator.is_type(instance, "number"):
+        return
+    if isinstance(divisor, int) and isinstance(instance, int):
+        failed = instance % divisor != 0
+    else:
+        quotient = instance / divisor
+        failed = abs(quotient - round(quotient)) > 1e-9 * max(1.0, abs(quotient))
+    if failed:
+        yield ValidationError(f"{instance!r} is not a multiple of {divisor}")
+
+
+def _required(validator: Any, required: Any, instance: Any, schema: Any) -> Iterable[Any]:
+    from jsonschema.exceptions import ValidationError
+
+    if not validator.is_type(instance, "object"):
+        return
+    for key in required:
+        if key not in instance:
+            yield ValidationError(f"{key!r} is a required property", path=[key])
+
+
+def _get_validator_class() -> Any:
+    global _validator_class
+    with _validator_lock:
+        if _validator_class is None:
+            from jsonschema import Draft7Validator, validators
+
+            _validator_class = validators.extend(
+                Draft7Validator, {"multipleOf": _multiple_of, "required": _required}
+            )
+        return _validator_class
+
+
+class SchemaValidator:
+    """A compiled schema.  Thread-safe and reusable."""
+
+    def __init__(self, schema: Any) -> None:
+        global _warned_missing
+        self.schema = schema
+        self._validator: Optional[Any] = None
+        try:
+            cls = _get_validator_class()
+        except ImportError:
+            if not _warned_missing:
+                _warned_missing = True
+                logger.warning(
+                    "jsonschema not installed — json_schema checks top-level required keys only "
+                    "(pip install oflo-ai-agent-protocol[schema])"
+                )
+            return
+        from jsonschema.exceptions import SchemaError as _InvalidSchema
+
+        try:
+            cls.check_schema(schema)
+        except _InvalidSchema as exc:
+            raise SchemaCompileError(f"{_format_path(exc.path) or '$'}: {exc.message}") from None
+        _check_refs(schema, schema)
+        self._validator = cls(schema)
+
+    def errors(self, data: Any) -> List[SchemaError]:
+        if self._validator is None:
+            return self._required_only(data)
+        return [
+            SchemaError(_format_path(err.absolute_path), err.validator or "false", err.message)
+            for err in self._validator.iter_errors(data)
+        ]
+
+    def is_valid(self, data: Any) -> bool:
+        if self._validator is None:
+            return not self._required_only(data)
+        return self._validator.is_valid(data)
+
+    def _required_only(self, data: Any) -> List[SchemaError]:
+        if not isinstance(self.schema, dict) or not isinstance(data, dict):
+            return []
+        return [
+            SchemaError(str(key), "required", f"{key!r} is a required property")
+            for key in self.schema.get("required", []) if key not in data
+        ]
+
+
+# ── Cache ─────────────────────────────────────────────────────────────────────
+
+_CACHE_SIZE = 256
+_cache: "OrderedDict[str, SchemaValidator]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def compile_schema(schema: Any) -> SchemaValidator:
+    """Return a compiled validator for `schema`, cached by its canonical JSON."""
+    key = json.dumps(schema, sort_keys=True, default=str)
+    with _cache_lock:
+        validator = _cache.get(key)
+        if validator is not None:
+            _cache.move_to_end(key)
+            return validator
+    validator = SchemaValidator(schema)
+    with _cache_lock:
+        _cache[key] = validator
+        if len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return validator
@@ -1,7 +1,6 @@
 """Real-time telemetry — token budgets, cost alerts, latency percentiles."""
 from __future__ import annotations
 
-import asyncio
 import logging
 import time
 from collections import defaultdict, deque
@@ -9,6 +8,8 @@ from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
 from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional
 
+from oflo_agent_protocol.audit.metrics import MetricsRegistry, get_metrics_registry
+from oflo_agent_protocol.audit.tracing import get_tracer
 from oflo_agent_protocol.core.types import AuditRecord, ModelProvider, TokenUsage
 
 logger = logging.getLogger(__name__)
@@ -55,12 +56,19 @@ class Telemetry:
 
     Subscribers can register callbacks via `on_alert()` to receive
     notifications when thresholds are breached.
+
+    Every record is also exported to a `MetricsRegistry` (the process-wide
+    default unless one is passed) so `/metrics` scrapers see the same numbers.
+    `record()` performs no awaits while mutating state, so it needs no lock.
     """
 
+    _LABELS = ("project", "agent", "provider", "model", "outcome")
+
     def __init__(
         self,
         cost_budget_usd: Optional[float] = None,
         token_budget: Optional[int] = None,
+        registry: Optional[MetricsRegistry] = None,
     ) -> None:
         self._metrics: Dict[str, AgentMetrics] = {}
         self._project_cost = 0.0
@@ -68,30 +76,60 @@ class Telemetry:
         self._cost_budget = cost_budget_usd
         self._token_budget = token_budget
         self._alert_callbacks: list[Callable[[str, Dict[str, Any]], None]] = []
-        self._lock = asyncio.Lock()
+
+        reg = registry or get_metrics_registry()
+        self._m_calls = reg.counter("oflo_llm_calls", "LLM calls by outcome", self._LABELS)
+        self._m_prompt_tokens = reg.counter(
+            "oflo_llm_prompt_tokens", "Prompt tokens consumed", self._LABELS
+        )
+        self._m_completion_tokens = reg.counter(
+            "oflo_llm_completion_tokens", "Completion tokens produced", self._LABELS
+        )
+        self._m_cost = reg.counter("oflo_llm_cost_usd", "Estimated LLM spend in USD", self._LABELS)
+        self._m_latency = reg.histogram(
+            "oflo_llm_latency_ms", "End-to-end agent turn latency", self._LABELS
+        )
 
     def on_alert(self, callback: Callable[[str, Dict[str, Any]], None]) -> None:
         self._alert_callbacks.append(callback)
 
     async def record(self, record: AuditRecord) -> None:
-        async with self._lock:
-            m = self._metrics.setdefault(
-                record.agent_id,
-                AgentMetrics(agent_id=record.agent_id, agent_name=record.agent_name),
+        m = self._metrics.get(record.agent_id)
+        if m is None:
+            m = self._metrics[record.agent_id] = AgentMetrics(
+                agent_id=record.agent_id, agent_name=record.agent_name
             )
-            m.call_count += 1
-            if record.token_usage:
-                m.total_tokens += record.token_usage.total_tokens
-                self._project_tokens += record.token_usage.total_tokens
-            m.total_cost_usd += record.cost_usd
-            self._project_cost += record.cost_usd
-            if not record.success:
-                m.error_count += 1
-            if record.latency_ms:
-                m.latencies_ms.append(record.latency_ms)
-
+        m.call_count += 1
+        if record.token_usage:
+            m.total_tokens += record.token_usage.total_tokens
+            self._project_tokens += record.token_usage.total_tokens
+        m.total_cost_usd += record.cost_usd
+        self._project_cost += record.cost_usd
+        if not record.success:
+            m.error_count += 1
+        if record.latency_ms:
+            m.latencies_ms.append(record.latency_ms)
+
+        self._export(record)
         await self._check_budgets()
 
+    def _export(self, record: AuditRecord) -> None:
+        labels = (
+            record.project_id,
+            record.agent_name,
+            record.provider,
+            record.model,
+            "success" if record.success else "error",
+        )
+        self._m_calls.labels(*labels).inc()
+        if record.token_usage:
+            self._m_prompt_tokens.labels(*labels).inc(record.token_usage.prompt_tokens)
+            self._m_completion_tokens.labels(*labels).inc(record.token_usage.completion_tokens)
+        if record.cost_usd:
+            self._m_cost.labels(*labels).inc(record.cost_usd)
+        if record.latency_ms:
+            self._m_latency.labels(*labels).observe(record.latency_ms)
+
     async def _check_budgets(self) -> None:
         if self._cost_budget and self._project_cost >= self._cost_budget:
             await self._fire_alert(
@@ -123,13 +161,22 @@ class Telemetry:
 
 
 @asynccontextmanager
-async def timed_call(label: str = "") -> AsyncIterator[Dict[str, float]]:
-    """Async context manager that records wall-clock ms into a dict."""
+async def timed_call(label: str = "", **attributes: Any) -> AsyncIterator[Dict[str, float]]:
+    """Async context manager that records wall-clock ms into a dict.
+
+    When `label` is given the block is also recorded as a trace span.
+    """
     data: Dict[str, float] = {}
     start = time.monotonic()
-    try:
-        yield data
-    finally:
-        data["latency_ms"] = (time.monotonic() - start) * 1000
-        if label:
+    if not label:
+        try:
+            yield data
+        finally:
+            data["latency_ms"] = (time.monotonic() - start) * 1000
+        return
+    with get_tracer().span(label, **attributes):
+        try:
+            yield data
+        finally:
+            data["latency_ms"] = (time.monotonic() - start) * 1000
             logger.debug("%s took %.1f ms", label, data["latency_ms"])
@@ -0,0 +1,475 @@
+"""OpenTelemetry-style span tracing for the agentic loop.
+
+Spans nest through a `ContextVar`, so `with tracer.span(...)` inside coroutines
+produces a correct parent/child tree without passing handles around.  Trace
+context crosses process boundaries as a W3C `traceparent` header (see
+`inject()` / `extract()`), which the A2A client and server use.
+
+Overhead control
+────────────────
+  • No exporter configured → every span is a shared no-op object.
+  • Head sampling: the root span decides (ratio sampler keyed on trace id)
+    and children inherit the decision, so an unsampled turn costs one
+    context-var set per phase.
+  • Finished spans are appended to a bounded deque; a daemon thread batches
+    them to the exporter off the event loop.  When the queue is full spans
+    are dropped rather than blocking the caller.
+
+Configuration (environment)::
+
+    OFLO_TRACE_FILE=./traces/spans.jsonl        # local JSONL exporter
+    OFLO_TRACE_OTLP_ENDPOINT=http://localhost:4318/v1/traces
+    OFLO_TRACE_SAMPLE_RATE=0.01                 # fraction of root spans kept
+
+Usage::
+
+    from oflo_agent_protocol.audit.tracing import FileSpanExporter, configure_tracing, get_tracer
+
+    configure_tracing(FileSpanExporter("spans.jsonl"), sample_rate=1.0)
+    with get_tracer().span("my.phase", agent="Analyst") as span:
+        span.set_attribute("items", 3)
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+import urllib.request
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, MutableMapping, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_HEADER = "traceparent"
+
+_DEFAULT_SAMPLE_RATE = float(os.getenv("OFLO_TRACE_SAMPLE_RATE", "0.01"))
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    trace_id: str  # 32 hex chars
+    span_id: str  # 16 hex chars
+    sampled: bool = True
+
+    def to_traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    @classmethod
+    def from_traceparent(cls, header: Optional[str]) -> Optional["SpanContext"]:
+        if not header:
+            return None
+        parts = header.strip().split("-")
+        if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+            return None
+        try:
+            int(parts[1], 16), int(parts[2], 16)
+            flags = int(parts[3], 16)
+        except ValueError:
+            return None
+        return cls(trace_id=parts[1], span_id=parts[2], sampled=bool(flags & 1))
+
+
+def _new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def _new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+class Span:
+    """A recorded unit of work. Only sampled spans are instances of this class."""
+
+    __slots__ = (
+        "name", "context", "parent_id", "start_ns", "end_ns",
+        "attributes", "status", "error", "_tracer",
+    )
+
+    recording = True
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        context: SpanContext,
+        parent_id: Optional[str],
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self._tracer = tracer
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes) if attributes else {}
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status = "error"
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self._tracer._on_end(self)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns or time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "status": self.status,
+            "error": self.error,
+        }
+
+
+class _NonRecordingSpan:
+    """Carries trace context for unsampled work; every operation is a no-op."""
+
+    __slots__ = ("context",)
+
+    recording = False
+
+    def __init__(self, context: Optional[SpanContext]) -> None:
+        self.context = context
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+_NOOP_SPAN = _NonRecordingSpan(None)
+
+_current_span: ContextVar[Any] = ContextVar("oflo_current_span", default=None)
+
+
+# ---------------------------------------------------------------------------
+# Exporters
+# ---------------------------------------------------------------------------
+
+class SpanExporter(ABC):
+    """Receives batches of finished spans on the tracer's background thread."""
+
+    @abstractmethod
+    def export(self, spans: List[Span]) -> None:
+        ...
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps exported spans in a list — for tests and debugging."""
+
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+
+    def export(self, spans: List[Span]) -> None:
+        self.spans.extend(spans)
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends one JSON object per span to a local JSONL file."""
+
+    def __init__(self, path: str) -> None:
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, spans: List[Span]) -> None:
+        try:
+            with self._path.open("a", encoding="utf-8") as fh:
+                for s in spans:
+                    fh.write(json.dumps(s.to_dict(), default=str) + "\n")
+        except OSError as e:
+            logger.error("Span export failed: %s", e)
+
+
+class OTLPHttpSpanExporter(SpanExporter):
+    """
+    POSTs spans as OTLP/JSON to a collector (`/v1/traces`).
+
+    Runs on the tracer's export thread, so the blocking stdlib HTTP client
+    never touches the event loop.
+    """
+
+    def __init__(
+        self,
+        endpoint: str = "http://localhost:4318/v1/traces",
+        service_name: str = "oflo-agent-protocol",
+        timeout: float = 5.0,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self._endpoint = endpoint
+        self._service_name = service_name
+        self._timeout = timeout
+        self._headers = {"Content-Type": "application/json", **(headers or {})}
+
+    def export(self, spans: List[Span]) -> None:
+        body = json.dumps(self._to_otlp(spans), default=str).encode()
+        req = urllib.request.Request(self._endpoint, data=body, headers=self._headers, method="POST")
+        try:
+            with urllib.request.urlopen(req, timeout=self._timeout) as resp:
+                resp.read()
+        except Exception as e:
+            logger.warning("OTLP export to %s failed: %s", self._endpoint, e)
+
+    def _to_otlp(self, spans: List[Span]) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attr("service.name", self._service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": "oflo_agent_protocol"},
+                    "spans": [
+                        {
+                            "traceId": s.context.trace_id,
+                            "spanId": s.context.span_id,
+                            "parentSpanId": s.parent_id or "",
+                            "name": s.name,
+                            "kind": 1,
+                            "startTimeUnixNano": str(s.start_ns),
+                            "endTimeUnixNano": str(s.end_ns or s.start_ns),
+                            "attributes": [_otlp_attr(k, v) for k, v in s.attributes.items()],
+                            "status": (
+                                {"code": 2, "message": s.error or ""}
+                                if s.status == "error" else {"code": 1}
+                            ),
+                        }
+                        for s in spans
+                    ],
+                }],
+            }]
+        }
+
+
+def _otlp_attr(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        v: Dict[str, Any] = {"boolValue": value}
+    elif isinstance(value, int):
+        v = {"intValue": str(value)}
+    elif isinstance(value, float):
+        v = {"doubleValue": value}
+    else:
+        v = {"stringValue": str(value)}
+    return {"key": key, "value": v}
+
+
+# ---------------------------------------------------------------------------
+# Tracer
+# ---------------------------------------------------------------------------
+
+class Tracer:
+    """
+    Creates spans, applies head sampling and batches finished spans to an exporter.
+
+    A tracer without an exporter is disabled: `span()` yields a shared no-op.
+    """
+
+    def __init__(
+        self,
+        exporter: Optional[SpanExporter] = None,
+        sample_rate: float = _DEFAULT_SAMPLE_RATE,
+        max_queue: int = 4096,
+        batch_size: int = 256,
+        flush_interval: float = 2.0,
+    ) -> None:
+        self._exporter = exporter
+        self._sample_rate = max(0.0, min(1.0, sample_rate))
+        self._threshold = int(self._sample_rate * (1 << 64))
+        self._queue: Deque[Span] = deque(maxlen=max_queue)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self._export_lock = threading.Lock()
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._exporter is not None and self._sample_rate > 0.0
+
+    # ------------------------------------------------------------------
+    # Span creation
+    # ------------------------------------------------------------------
+
+    def _should_sample(self, trace_id: str) -> bool:
+        # Deterministic on trace id, so every hop of a trace agrees.
+        return int(trace_id[:16], 16) < self._threshold
+
+    def start_span(
+        self,
+        name: str,
+        parent: Optional[SpanContext] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        if not self.enabled:
+            return _NOOP_SPAN
+        if parent is None:
+            current = _current_span.get()
+            parent = current.context if current is not None else None
+        if parent is None:
+            trace_id = _new_trace_id()
+            ctx = SpanContext(trace_id, _new_span_id(), self._should_sample(trace_id))
+        else:
+            ctx = SpanContext(parent.trace_id, _new_span_id(), parent.sampled)
+        if not ctx.sampled:
+            return _NonRecordingSpan(ctx)
+        return Span(self, name, ctx, parent.span_id if parent else None, attributes)
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        parent: Optional[SpanContext] = None,
+        **attributes: Any,
+    ) -> Iterator[Any]:
+        """Open a child of the current span (or of `parent`) for the `with` block."""
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+        span = self.start_span(name, parent=parent, attributes=attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.record_exception(exc)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    @contextmanager
+    def use_span(self, span: Any) -> Iterator[Any]:
+        """
+        Make a span from `start_span()` current for the `with` block without
+        ending it — for spans that outlive one block, such as one kept across
+        the yields of an async generator.
+        """
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+
+    def current_span(self) -> Any:
+        return _current_span.get() or _NOOP_SPAN
+
+    # ------------------------------------------------------------------
+    # Propagation
+    # ------------------------------------------------------------------
+
+    def inject(self, headers: MutableMapping[str, str]) -> MutableMapping[str, str]:
+        """Write the current trace context into outgoing HTTP headers."""
+        current = _current_span.get()
+        if current is not None and current.context is not None:
+            headers[TRACEPARENT_HEADER] = current.context.to_traceparent()
+        return headers
+
+    @staticmethod
+    def extract(headers: Any) -> Optional[SpanContext]:
+        """Read a remote parent context from incoming HTTP headers."""
+        return SpanContext.from_traceparent(headers.get(TRACEPARENT_HEADER))
+
+    # ------------------------------------------------------------------
+    # Export pipeline
+    # ------------------------------------------------------------------
+
+    def _on_end(self, span: Span) -> None:
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+        self._queue.append(span)
+        if self._thread is None:
+            self._start_worker()
+        if len(self._queue) >= self._batch_size:
+            self._wakeup.set()
+
+    def _start_worker(self) -> None:
+        with self._export_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="oflo-span-exporter", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Export everything queued so far (blocking)."""
+        if self._exporter is None:
+            return
+        with self._export_lock:
+            while self._queue:
+                batch: List[Span] = []
+                while self._queue and len(batch) < self._batch_size:
+                    batch.append(self._queue.popleft())
+                try:
+                    self._exporter.export(batch)
+                except Exception as e:
+                    logger.warning("Span exporter raised: %s", e)
+
+    def shutdown(self) -> None:
+        self._stopped = True
+        self._wakeup.set()
+        self.flush()
+        if self._exporter is not None:
+            self._exporter.shutdown()
+
+
+def _tracer_from_env() -> Tracer:
+    exporter: Optional[SpanExporter] = None
+    if os.getenv("OFLO_TRACE_OTLP_ENDPOINT"):
+        exporter = OTLPHttpSpanExporter(os.environ["OFLO_TRACE_OTLP_ENDPOINT"])
+    elif os.getenv("OFLO_TRACE_FILE"):
+        exporter = FileSpanExporter(os.environ["OFLO_TRACE_FILE"])
+    return Tracer(exporter=exporter)
+
+
+# Module-level default tracer — disabled unless configured
+_tracer = _tracer_from_env()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def configure_tracing(
+    exporter: Optional[SpanExporter],
+    sample_rate: float = _DEFAULT_SAMPLE_RATE,
+    **kwargs: Any,
+) -> Tracer:
+    """Replace the process-wide tracer. Pass `exporter=None` to disable tracing."""
+    global _tracer
+    _tracer.shutdown()
+    _tracer = Tracer(exporter=exporter, sample_rate=sample_rate, **kwargs)
+    return _tracer
@@ -6,7 +6,9 @@ Key design properties:
 - Router-aware: if no runtime is supplied the SmartRouter selects one.
 - Fully auditable: every call emits an AuditRecord.
 - Tool-first: tools declared as plain async callables via `@agent.tool`.
-- Multi-turn memory: conversation history kept in-process (pluggable memory store).
+- Multi-turn memory: conversation state lives in per-session `SessionState`s
+  held by a pluggable `SessionStore`, so one agent instance serves many
+  concurrent conversations (see core/session.py).
 """
 from __future__ import annotations
 
@@ -14,12 +16,19 @@ import hashlib
 import logging
 import time
 import uuid
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence
 
 from oflo_agent_protocol.audit.audit_logger import AuditLogger
-from oflo_agent_protocol.audit.guardrails import GuardrailConfig, Guardrails, GuardrailResult
-from oflo_agent_protocol.audit.telemetry import Telemetry, timed_call
+from oflo_agent_protocol.audit.guardrails import (
+    GuardrailConfig,
+    GuardrailResult,
+    Guardrails,
+    StreamingGuardrails,
+)
+from oflo_agent_protocol.audit.telemetry import Telemetry
+from oflo_agent_protocol.audit.tracing import get_tracer
 from oflo_agent_protocol.core.message import CanonicalMessage, ToolCall, ToolResult
+from oflo_agent_protocol.core.session import InMemorySessionStore, SessionState, SessionStore
 from oflo_agent_protocol.core.types import (
     AgentStatus,
     AuditRecord,
@@ -32,6 +41,38 @@ from oflo_agent_protocol.runtimes.base_runtime import BaseRuntime
 
 logger = logging.getLogger(__name__)
 
+_BLOCKED_REPLY = "[Response blocked by content policy.]"
+_ERROR_REPLY = "I encountered an error processing your request. Please try again."
+_CHARS_PER_TOKEN = 4  # provider-neutral estimate, good enough for a budget cap
+
+
+def _cap_context(blocks: Optional[Sequence[str]], max_tokens: int) -> List[str]:
+    """Keep per-turn context blocks in order until ~`max_tokens` are used; truncate the last."""
+    budget = max_tokens * _CHARS_PER_TOKEN
+    out: List[str] = []
+    for block in blocks or ():
+        if not block:
+            continue
+        if budget <= 0:
+            break
+        if len(block) > budget:
+            out.append(block[:budget].rstrip() + " …")
+            break
+        out.append(block)
+        budget -= len(block)
+    return out
+
+
+async def _in_span(tracer: Any, span: Any, upstream: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Yield from `upstream` with `span` current only while upstream runs, not while the consumer does."""
+    while True:
+        with tracer.use_span(span):
+            try:
+                delta = await upstream.__anext__()
+            except StopAsyncIteration:
+                return
+        yield delta
+
 
 class ToolDefinition:
     def __init__(
@@ -91,6 +132,9 @@ class BaseAgentV2:
             return {"ticker": ticker, "price": 150.0}
 
         reply = await agent.chat("What is AAPL trading at?")
+
+        # Concurrent users: one definition, isolated histories
+        reply = await agent.chat("And MSFT?", session_id="user-42")
     """
 
     def __init__(
@@ -106,6 +150,8 @@ class BaseAgentV2:
         max_history: int = 50,
         max_tokens: int = 4096,
         temperature: float = 0.7,
+        max_context_tokens: int = 1024,
+        session_store: Optional[SessionStore] = None,
     ) -> None:
         self._id = str(uuid.uuid4())
         self._name = name
@@ -120,8 +166,13 @@ class BaseAgentV2:
         self._max_history = max_history
         self._max_tokens = max_tokens
         self._temperature = temperature
+        self._max_context_tokens = max_context_tokens
         self._status = AgentStatus.INITIALIZING
-        self._history: List[CanonicalMessage] = []
+        self._sessions: SessionStore = (
+            session_store if session_store is not None else InMemorySessionStore()
+        )
+        self._default_session = SessionState(session_id="default")
+        self._active_turns = 0
         self._tools: Dict[str, ToolDefinition] = {}
         self._logger = logging.getLogger(f"agent.{name}")
 
@@ -139,7 +190,7 @@ class BaseAgentV2:
 
     @property
     def status(self) -> AgentStatus:
-        return self._status
+        return AgentStatus.WORKING if self._active_turns else self._status
 
     @property
     def project_id(self) -> str:
@@ -151,8 +202,38 @@ class BaseAgentV2:
 
     @property
     def history(self) -> List[CanonicalMessage]:
+        """History of the default session (calls made without a session)."""
         return list(self._history)
 
+    @property
+    def _history(self) -> List[CanonicalMessage]:
+        return self._default_session.history
+
+    @_history.setter
+    def _history(self, messages: List[CanonicalMessage]) -> None:
+        self._default_session.history = messages
+
+    @property
+    def sessions(self) -> SessionStore:
+        return self._sessions
+
+    def session(self, session_id: str) -> SessionState:
+        """The state for `session_id`, created (and stored) on first use."""
+        state = self._sessions.get(session_id)
+        if state is None:
+            state = SessionState(session_id=session_id)
+            self._sessions.put(state)
+        return state
+
+    def _resolve_session(
+        self, session_id: Optional[str], session: Optional[SessionState]
+    ) -> SessionState:
+        if session is not None:
+            return session
+        if session_id is not None:
+            return self.session(session_id)
+        return self._default_session
+
     # ------------------------------------------------------------------
     # Tool registration
     # ------------------------------------------------------------------
@@ -211,12 +292,30 @@ class BaseAgentV2:
     # Core chat interface
     # ------------------------------------------------------------------
 
-    async def chat(self, user_message: str, **meta: Any) -> str:
+    async def chat(
+        self,
+        user_message: str,
+        context: Optional[Sequence[str]] = None,
+        session_id: Optional[str] = None,
+        session: Optional[SessionState] = None,
+        **meta: Any,
+    ) -> str:
         """Single-turn convenience method. Returns assistant text."""
-        reply = await self.process(CanonicalMessage.user(user_message, **meta))
+        reply = await self.process(
+            CanonicalMessage.user(user_message, **meta),
+            context=context,
+            session_id=session_id,
+            session=session,
+        )
         return reply.content
 
-    async def process(self, message: CanonicalMessage) -> CanonicalMessage:
+    async def process(
+        self,
+        message: CanonicalMessage,
+        context: Optional[Sequence[str]] = None,
+        session_id: Optional[str] = None,
+        session: Optional[SessionState] = None,
+    ) -> CanonicalMessage:
         """
         Full processing pipeline:
         1. Append to history
@@ -224,13 +323,48 @@ class BaseAgentV2:
         3. Execute tool calls if any (agentic loop, max 5 iterations)
         4. Run guardrails
         5. Emit audit record
+
+        `context` holds per-turn blocks (e.g. retrieved memories).  They are
+        capped at `max_context_tokens`, sent after the system prompt for
+        this turn only, and never stored — the system prompt stays stable
+        and cacheable.
+
+        The turn runs against `session` if given, else the stored session
+        `session_id`, else the agent's default session.
         """
-        self._status = AgentStatus.WORKING
-        self._history.append(message)
-        self._trim_history()
+        state = self._resolve_session(session_id, session)
+        tracer = get_tracer()
+        with tracer.span(
+            "agent.process", agent=self._name, project=self._project_id
+        ):
+            reply = await self._process(message, tracer, context, state)
+        if session is None and session_id is not None:
+            self._sessions.put(state)  # write back (serialising stores hold copies)
+        return reply
 
-        runtime = await self._get_runtime()
+    def _system_kwargs(self, runtime: BaseRuntime, context: Optional[Sequence[str]]) -> Dict[str, Any]:
+        blocks = _cap_context(context, self._max_context_tokens)
+        if not blocks:
+            return {"system": self._system_prompt}
+        if getattr(runtime, "supports_system_context", False):
+            return {"system": self._system_prompt, "system_context": blocks}
+        return {"system": BaseRuntime.compose_system(self._system_prompt, blocks)}
+
+    async def _process(
+        self,
+        message: CanonicalMessage,
+        tracer: Any,
+        context: Optional[Sequence[str]],
+        state: SessionState,
+    ) -> CanonicalMessage:
+        state.history.append(message)
+        self._trim_history(state)
+
+        with tracer.span("agent.route"):
+            runtime = await self._get_runtime()
         tools = self._tool_schemas() if self._tools else None
+        system_kwargs = self._system_kwargs(runtime, context)
+        self._begin_turn(state)
 
         start = time.monotonic()
         token_usage = TokenUsage()
@@ -240,13 +374,21 @@ class BaseAgentV2:
         try:
             # Agentic loop — execute tools if requested
             for _iteration in range(6):
-                raw_reply, usage = await runtime.complete(
-                    messages=[m for m in self._history if m.role != MessageRole.SYSTEM],
-                    system=self._system_prompt,
-                    tools=tools,
-                    max_tokens=self._max_tokens,
-                    temperature=self._temperature,
-                )
+                with tracer.span(
+                    "runtime.complete",
+                    provider=getattr(runtime, "provider_name", "unknown"),
+                    model=getattr(runtime, "model_id", "unknown"),
+                    iteration=_iteration,
+                ) as call_span:
+                    raw_reply, usage = await runtime.complete(
+                        messages=[m for m in state.history if m.role != MessageRole.SYSTEM],
+                        tools=tools,
+                        max_tokens=self._max_tokens,
+                        temperature=self._temperature,
+                        **system_kwargs,
+                    )
+                    call_span.set_attribute("prompt_tokens", usage.prompt_tokens)
+                    call_span.set_attribute("completion_tokens", usage.completion_tokens)
                 token_usage.prompt_tokens += usage.prompt_tokens
                 token_usage.completion_tokens += usage.completion_tokens
                 token_usage.cache_read_tokens += usage.cache_read_tokens
@@ -257,38 +399,134 @@ class BaseAgentV2:
                     break
 
                 # Execute tools and loop
-                self._history.append(raw_reply)
+                state.history.append(raw_reply)
                 tool_results = await self._execute_tools(raw_reply.tool_calls)
                 tool_msg = CanonicalMessage(
                     role=MessageRole.TOOL,
                     content="",
                     tool_results=tool_results,
                 )
-                self._history.append(tool_msg)
+                state.history.append(tool_msg)
 
             reply = reply or raw_reply
 
         except Exception as exc:
             self._logger.exception("Runtime error: %s", exc)
             error_msg = str(exc)
-            reply = CanonicalMessage.assistant(
-                "I encountered an error processing your request. Please try again."
-            )
+            reply = CanonicalMessage.assistant(_ERROR_REPLY)
         finally:
             latency_ms = (time.monotonic() - start) * 1000
-            self._status = AgentStatus.ACTIVE
+            self._end_turn(state, token_usage)
 
         # Guardrails
-        gr: GuardrailResult = self._guardrails.check(reply, self._guardrail_config)
+        with tracer.span("agent.guardrails") as gr_span:
+            gr: GuardrailResult = await self._guardrails.check_async(reply, self._guardrail_config)
+            gr_span.set_attribute("blocked", gr.blocked)
         if gr.scrubbed_content:
             reply = CanonicalMessage.assistant(gr.scrubbed_content)
         if gr.blocked:
-            reply = CanonicalMessage.assistant("[Response blocked by content policy.]")
+            reply = CanonicalMessage.assistant(_BLOCKED_REPLY)
 
         # Append to history
-        self._history.append(reply)
+        state.history.append(reply)
+
+        await self._audit_turn(message, runtime, token_usage, latency_ms, error_msg, gr.flags)
+        return reply
 
-        # Audit
+    async def stream(
+        self,
+        message: CanonicalMessage,
+        context: Optional[Sequence[str]] = None,
+        session_id: Optional[str] = None,
+        session: Optional[SessionState] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Streaming counterpart of `process()` — yields guarded text deltas.
+
+        Guardrails run incrementally (see StreamingGuardrails): PII is redacted
+        before a delta is yielded, and a block rule closes the upstream runtime
+        stream at once so no further output tokens are generated.  Tools are
+        not offered on the streaming path.  Sessions work as in `process()`.
+        """
+        state = self._resolve_session(session_id, session)
+        tracer = get_tracer()
+        span = tracer.start_span(
+            "agent.stream", attributes={"agent": self._name, "project": self._project_id}
+        )
+        state.history.append(message)
+        self._trim_history(state)
+
+        runtime = await self._get_runtime()
+        guard = StreamingGuardrails(self._guardrail_config, self._guardrails)
+        start = time.monotonic()
+        error_msg: Optional[str] = None
+        token_usage = TokenUsage()
+        upstream = runtime.stream(
+            messages=[m for m in state.history if m.role != MessageRole.SYSTEM],
+            max_tokens=self._max_tokens,
+            temperature=self._temperature,
+            **self._system_kwargs(runtime, context),
+            **({"usage": token_usage} if getattr(runtime, "supports_stream_usage", False) else {}),
+        )
+        deltas = _in_span(tracer, span, upstream)
+
+        self._begin_turn(state)
+        try:
+            try:
+                async for delta in deltas:
+                    safe = guard.feed(delta)
+                    if guard.blocked:
+                        break
+                    if safe:
+                        yield safe
+                else:
+                    tail = guard.finish()
+                    if tail:
+                        yield tail
+            except Exception as exc:
+                self._logger.exception("Runtime stream error: %s", exc)
+                span.record_exception(exc)
+                error_msg = str(exc)
+            finally:
+                await deltas.aclose()
+                aclose = getattr(upstream, "aclose", None)
+                if aclose is not None:
+                    with tracer.use_span(span):
+                        await aclose()
+                latency_ms = (time.monotonic() - start) * 1000
+                self._end_turn(state, token_usage)
+
+            if guard.blocked:
+                reply = CanonicalMessage.assistant(_BLOCKED_REPLY)
+                yield _BLOCKED_REPLY
+            elif error_msg:
+                reply = CanonicalMessage.assistant(_ERROR_REPLY)
+                yield _ERROR_REPLY
+            else:
+                reply = CanonicalMessage.assistant(guard.text)
+            state.history.append(reply)
+            if session is None and session_id is not None:
+                self._sessions.put(state)
+
+            span.set_attribute("blocked", guard.blocked)
+            span.set_attribute("prompt_tokens", token_usage.prompt_tokens)
+            span.set_attribute("completion_tokens", token_usage.completion_tokens)
+            with tracer.use_span(span):
+                await self._audit_turn(
+                    message, runtime, token_usage, latency_ms, error_msg, guard.result.flags
+                )
+        finally:
+            span.end()
+
+    async def _audit_turn(
+        self,
+        message: CanonicalMessage,
+        runtime: BaseRuntime,
+        token_usage: TokenUsage,
+        latency_ms: float,
+        error_msg: Optional[str],
+        guardrail_flags: List[str],
+    ) -> None:
         provider_name = getattr(runtime, "provider_name", "unknown")
         model_id = getattr(runtime, "model_id", "unknown")
         record = AuditRecord(
@@ -307,48 +545,46 @@ class BaseAgentV2:
             ),
             success=error_msg is None,
             error=error_msg,
-            guardrail_flags=gr.flags,
+            guardrail_flags=guardrail_flags,
         )
 
-        if self._audit:
-            await self._audit.log(record)
-        if self._telemetry:
-            await self._telemetry.record(record)
-
-        return reply
+        with get_tracer().span("audit.write"):
+            if self._audit:
+                await self._audit.log(record)
+            if self._telemetry:
+                await self._telemetry.record(record)
 
     async def _execute_tools(self, tool_calls: List[ToolCall]) -> List[ToolResult]:
-        results: List[ToolResult] = []
-        for tc in tool_calls:
+        with get_tracer().span("agent.tools", count=len(tool_calls)):
+            return [await self._execute_tool(tc) for tc in tool_calls]
+
+    async def _execute_tool(self, tc: ToolCall) -> ToolResult:
+        with get_tracer().span("tool.execute", tool=tc.name) as span:
             td = self._tools.get(tc.name)
             if td is None:
-                results.append(
-                    ToolResult(
-                        tool_call_id=tc.id,
-                        name=tc.name,
-                        content={"error": f"Tool '{tc.name}' not found"},
-                        is_error=True,
-                    )
+                span.set_attribute("error", "not_found")
+                return ToolResult(
+                    tool_call_id=tc.id,
+                    name=tc.name,
+                    content={"error": f"Tool '{tc.name}' not found"},
+                    is_error=True,
                 )
-                continue
             try:
                 import asyncio
                 if asyncio.iscoroutinefunction(td.handler):
                     result = await td.handler(**tc.arguments)
                 else:
                     result = td.handler(**tc.arguments)
-                results.append(ToolResult(tool_call_id=tc.id, name=tc.name, content=result))
+                return ToolResult(tool_call_id=tc.id, name=tc.name, content=result)
             except Exception as exc:
                 self._logger.error("Tool %s failed: %s", tc.name, exc)
-                results.append(
-                    ToolResult(
-                        tool_call_id=tc.id,
-                        name=tc.name,
-                        content={"error": str(exc)},
-                        is_error=True,
-                    )
+                span.record_exception(exc)
+                return ToolResult(
+                    tool_call_id=tc.id,
+                    name=tc.name,
+                    content={"error": str(exc)},
+                    is_error=True,
                 )
-        return results
 
     async def _get_runtime(self) -> BaseRuntime:
         if self._runtime:
@@ -383,19 +619,36 @@ class BaseAgentV2:
         self._logger.info("Auto-selected runtime: %s/%s", provider.value, model_id)
         return self._runtime
 
-    def _trim_history(self) -> None:
-        if len(self._history) > self._max_history:
+    def _begin_turn(self, state: SessionState) -> None:
+        state.status = AgentStatus.WORKING
+        self._active_turns += 1
+
+    def _end_turn(self, state: SessionState, usage: TokenUsage) -> None:
+        state.status = AgentStatus.ACTIVE
+        state.turns += 1
+        state.record_usage(usage)
+        state.touch()
+        self._active_turns -= 1
+        self._status = AgentStatus.ACTIVE
+
+    def _trim_history(self, state: Optional[SessionState] = None) -> None:
+        state = state or self._default_session
+        if len(state.history) > self._max_history:
             # Keep system messages + recent messages
-            system = [m for m in self._history if m.role == MessageRole.SYSTEM]
-            non_system = [m for m in self._history if m.role != MessageRole.SYSTEM]
-            self._history = system + non_system[-(self._max_history - len(system)):]
+            system = [m for m in state.history if m.role == MessageRole.SYSTEM]
+            non_system = [m for m in state.history if m.role != MessageRole.SYSTEM]
+            state.history = system + non_system[-(self._max_history - len(system)):]
 
     # ------------------------------------------------------------------
     # Utilities
     # ------------------------------------------------------------------
 
-    def clear_history(self) -> None:
-        self._history = []
+    def clear_history(self, session_id: Optional[str] = None) -> None:
+        """Forget the default session's history, or drop session `session_id`."""
+        if session_id is None:
+            self._history = []
+        else:
+            self._sessions.delete(session_id)
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -405,6 +658,7 @@ class BaseAgentV2:
             "status": self._status.value,
             "tools": list(self._tools.keys()),
             "history_length": len(self._history),
+            "sessions": len(self._sessions),
             "provider": getattr(self._runtime, "provider_name", "auto"),
         }
 
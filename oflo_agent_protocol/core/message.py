@@ -97,11 +97,11 @@ class CanonicalMessage:
             "timestamp": self.timestamp,
             "tool_calls": [
                 {"id": tc.id, "name": tc.name, "arguments": tc.arguments}
-                for tc in self.tool_calls
+                for tc in self.tool_calls or []
             ],
             "tool_results": [
                 {"id": tr.tool_call_id, "name": tr.name, "content": tr.content}
-                for tr in self.tool_results
+                for tr in self.tool_results or []
             ],
         }
 
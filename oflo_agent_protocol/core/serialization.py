@@ -0,0 +1,120 @@
+"""JSON encoding for protocol endpoints, SSE frames, task storage and audit logs.
+
+`dumps()` returns compact UTF-8 JSON bytes and `loads()` parses bytes or str,
+using the fastest backend installed:
+
+  orjson   → msgspec → stdlib `json`
+
+Pick one explicitly with `OFLO_JSON_BACKEND=orjson|msgspec|json` or
+`set_backend()`.  The backends agree on plain JSON data (dict, list, str,
+bool, None, finite floats and ints) with two exceptions:
+
+  • ints beyond 64 bits, which orjson and msgspec cannot encode — such a
+    value is re-encoded with the stdlib, so `dumps()` never fails on it
+    (orjson's `loads()` still reads one back as a float);
+  • NaN and ±Infinity, which orjson and msgspec write as `null` and the
+    stdlib as the non-standard `NaN` / `Infinity`.
+
+Anything else falls back to `str()`, as `json.dumps(default=str)` does,
+except where a fast backend has a native encoding (orjson and msgspec write
+datetimes as ISO 8601 and dataclasses as objects).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+_Codec = Tuple[Callable[[Any], bytes], Callable[[Union[bytes, str]], Any]]
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, default=str, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _orjson() -> _Codec:
+    import orjson
+
+    option = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any) -> bytes:
+        try:
+            return orjson.dumps(obj, default=str, option=option)
+        except TypeError:  # e.g. "Integer exceeds 64-bit range"
+            return _stdlib_dumps(obj)
+
+    return dumps, orjson.loads
+
+
+def _msgspec() -> _Codec:
+    import msgspec
+
+    encoder = msgspec.json.Encoder(enc_hook=str)
+    decoder = msgspec.json.Decoder()
+
+    def dumps(obj: Any) -> bytes:
+        try:
+            return encoder.encode(obj)
+        except (TypeError, OverflowError, msgspec.EncodeError):  # e.g. ints beyond 64 bits
+            return _stdlib_dumps(obj)
+
+    return dumps, decoder.decode
+
+
+def _stdlib() -> _Codec:
+    return _stdlib_dumps, json.loads
+
+
+_LOADERS: Dict[str, Callable[[], _Codec]] = {
+    "orjson": _orjson,
+    "msgspec": _msgspec,
+    "json": _stdlib,
+}
+
+_backend = "json"
+_dumps, _loads = _stdlib()
+
+
+def set_backend(name: Optional[str] = None) -> str:
+    """Switch to backend `name`, or to the fastest installed one; returns its name."""
+    global _backend, _dumps, _loads
+    candidates = [name] if name else list(_LOADERS)
+    for candidate in candidates:
+        loader = _LOADERS.get(candidate)
+        if loader is None:
+            raise ValueError(f"Unknown JSON backend '{candidate}' (choose from {', '.join(_LOADERS)})")
+        try:
+            _dumps, _loads = loader()
+        except ImportError:
+            if name:
+                raise
+            continue
+        _backend = candidate
+        return candidate
+    return _backend
+
+
+def backend() -> str:
+    return _backend
+
+
+def dumps(obj: Any) -> bytes:
+    return _dumps(obj)
+
+
+def dumps_str(obj: Any) -> str:
+    return _dumps(obj).decode()
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    return _loads(data)
+
+
+try:
+    set_backend(os.getenv("OFLO_JSON_BACKEND") or None)
+except (ImportError, ValueError) as exc:
+    logger.warning("OFLO_JSON_BACKEND ignored (%s); using the fastest installed backend", exc)
+    set_backend()
@@ -0,0 +1,163 @@
+"""Per-session conversation state, kept apart from the agent definition.
+
+A `BaseAgentV2` instance is the *definition* of an agent — prompt, tools,
+runtime, guardrails — and is shared by everyone talking to it.  What differs
+per conversation lives in a `SessionState`: the message history, token
+counters and whether a turn is in flight.  `agent.process(msg,
+session_id="u-42")` looks the state up in the agent's `SessionStore` (creating
+it on first use); `agent.process(msg, session=state)` uses a caller-owned
+state instead.  Calls without either use the agent's built-in default
+session, which is what `agent.history` shows.
+
+`InMemorySessionStore` is an LRU bounded by `max_sessions` that also drops
+sessions idle for `idle_ttl` seconds.  With `serialize=True` it keeps each
+session as compact JSON instead of live objects — slower per turn, but a
+fraction of the memory, and the same `to_dict()`/`from_dict()` format any
+external store (Redis, SQL) would persist.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
+
+from oflo_agent_protocol.core.message import CanonicalMessage
+from oflo_agent_protocol.core.types import AgentStatus, TokenUsage
+
+
+@dataclass
+class SessionState:
+    """History and counters for one conversation with one agent."""
+    session_id: str
+    history: List[CanonicalMessage] = field(default_factory=list)
+    status: AgentStatus = AgentStatus.ACTIVE
+    usage: TokenUsage = field(default_factory=TokenUsage)
+    turns: int = 0
+    created_at: float = field(default_factory=time.time)
+    last_active: float = field(default_factory=time.time)
+
+    def touch(self) -> None:
+        self.last_active = time.time()
+
+    def record_usage(self, usage: TokenUsage) -> None:
+        self.usage.prompt_tokens += usage.prompt_tokens
+        self.usage.completion_tokens += usage.completion_tokens
+        self.usage.cache_read_tokens += usage.cache_read_tokens
+        self.usage.cache_write_tokens += usage.cache_write_tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "history": [m.to_dict() for m in self.history],
+            "status": self.status.value,
+            "usage": {
+                "prompt_tokens": self.usage.prompt_tokens,
+                "completion_tokens": self.usage.completion_tokens,
+                "cache_read_tokens": self.usage.cache_read_tokens,
+                "cache_write_tokens": self.usage.cache_write_tokens,
+            },
+            "turns": self.turns,
+            "created_at": self.created_at,
+            "last_active": self.last_active,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SessionState":
+        return cls(
+            session_id=data["session_id"],
+            history=[CanonicalMessage.from_dict(m) for m in data.get("history", [])],
+            status=AgentStatus(data.get("status", AgentStatus.ACTIVE.value)),
+            usage=TokenUsage(**data.get("usage", {})),
+            turns=data.get("turns", 0),
+            created_at=data.get("created_at", time.time()),
+            last_active=data.get("last_active", time.time()),
+        )
+
+
+class SessionStore(ABC):
+    """Where an agent keeps `SessionState`s between turns."""
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[SessionState]:
+        ...
+
+    @abstractmethod
+    def put(self, state: SessionState) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def __contains__(self, session_id: object) -> bool:
+        return isinstance(session_id, str) and self.get(session_id) is not None
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local LRU of sessions with idle expiry."""
+
+    def __init__(
+        self,
+        max_sessions: int = 10_000,
+        idle_ttl: Optional[float] = 1800.0,
+        serialize: bool = False,
+    ) -> None:
+        self.max_sessions = max(1, max_sessions)
+        self.idle_ttl = idle_ttl
+        self.serialize = serialize
+        self._sessions: "OrderedDict[str, Union[SessionState, str]]" = OrderedDict()
+        self._last_used: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def get(self, session_id: str) -> Optional[SessionState]:
+        with self._lock:
+            self._expire(time.monotonic())
+            stored = self._sessions.get(session_id)
+            if stored is None:
+                return None
+            self._sessions.move_to_end(session_id)
+            self._last_used[session_id] = time.monotonic()
+        if isinstance(stored, str):
+            return SessionState.from_dict(json.loads(stored))
+        return stored
+
+    def put(self, state: SessionState) -> None:
+        stored = json.dumps(state.to_dict(), default=str) if self.serialize else state
+        with self._lock:
+            self._sessions[state.session_id] = stored
+            self._sessions.move_to_end(state.session_id)
+            self._last_used[state.session_id] = time.monotonic()
+            while len(self._sessions) > self.max_sessions:
+                old, _ = self._sessions.popitem(last=False)
+                self._last_used.pop(old, None)
+                self.evicted += 1
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._last_used.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _expire(self, now: float) -> None:
+        if self.idle_ttl is None:
+            return
+        cutoff = now - self.idle_ttl
+        # LRU order == last-used order, so expiry stops at the first live session.
+        while self._sessions:
+            oldest = next(iter(self._sessions))
+            if self._last_used.get(oldest, now) >= cutoff:
+                break
+            del self._sessions[oldest]
+            self._last_used.pop(oldest, None)
+            self.evicted += 1
@@ -18,6 +18,7 @@ from typing import Any, Dict, List, Optional, Type
 from oflo_agent_protocol.audit.audit_logger import AuditLogger
 from oflo_agent_protocol.audit.guardrails import GuardrailConfig
 from oflo_agent_protocol.audit.telemetry import Telemetry
+from oflo_agent_protocol.audit.tracing import get_tracer
 from oflo_agent_protocol.core.agent import BaseAgentV2
 from oflo_agent_protocol.core.message import CanonicalMessage
 from oflo_agent_protocol.core.registry import AgentRegistry
@@ -25,10 +26,10 @@ from oflo_agent_protocol.core.types import AgentStatus, ModelProvider, RoutingSt
 from oflo_agent_protocol.runtimes.base_runtime import BaseRuntime
 
 try:
-    from oflo_agent_protocol.memory.redis_memory import RedisMemoryManager
+    from oflo_agent_protocol.memory.redis_memory import MemoryWriteBatcher, RedisMemoryManager
     _HAS_REDIS = True
 except ImportError:
-    RedisMemoryManager = None  # type: ignore
+    MemoryWriteBatcher = RedisMemoryManager = None  # type: ignore
     _HAS_REDIS = False
 
 try:
@@ -76,6 +77,7 @@ class AgentManager:
         composio_connector: Optional[Any] = None,
         composio_api_key: Optional[str] = None,
         composio_user_id: Optional[str] = None,
+        memory_budget_ms: float = 250.0,
     ) -> None:
         self.project_id = project_id
         self._strategy = strategy
@@ -97,6 +99,9 @@ class AgentManager:
                 base_url=redis_base_url,
             )
         self._session_id: str = session_id or project_id
+        # Memory hydration may delay a turn by at most this much
+        self._memory_budget = memory_budget_ms / 1000.0
+        self._memory_writer: Optional[Any] = None
 
         # Optional Composio connector — wires 300+ app tools into agents
         self._composio: Optional[Any] = composio_connector
@@ -178,29 +183,41 @@ class AgentManager:
     async def route_message(self, agent_name: str, message: str) -> str:
         """Send a message to a named agent, return text reply.
 
-        If a Redis memory manager is configured, enriches the agent's working
-        memory with relevant context before routing and persists the exchange.
+        If a Redis memory manager is configured, memory context is fetched
+        concurrently with routing and waited for at most `memory_budget_ms`
+        — past that the turn proceeds without it.  The exchange is persisted
+        in the background after the reply is returned.
         """
+        hydrate: Optional[asyncio.Future] = None
+        context: List[str] = []
+        if self._redis:
+            hydrate = asyncio.ensure_future(self._redis.hydrate_prompt(message))
+
         agent = self._registry.get_by_name(agent_name)
         if agent is None:
+            if hydrate is not None:
+                hydrate.cancel()
             raise ValueError(f"No agent named '{agent_name}' in project '{self.project_id}'")
 
-        if self._redis:
+        if hydrate is not None:
             try:
-                enriched = await self._redis.enrich_system_prompt(agent.system_prompt, message)
-                if enriched != agent.system_prompt:
-                    agent._system_prompt = enriched
                 await self._redis.append_to_working_memory("user", message)
             except Exception as exc:
                 self._logger.warning("Redis memory unavailable: %s", exc)
+            memory_context = await self._await_memory(hydrate)
+            if memory_context:
+                # Per-turn block after the cached system prompt; the prompt itself is never touched
+                context.append(self._redis.context_block(memory_context))
 
-        reply = await agent.chat(message)
+        reply = await agent.chat(message, context=context)
 
         if self._redis:
             try:
                 await self._redis.append_to_working_memory("assistant", reply)
-                await self._redis.add_long_term(
-                    text=f"Q: {message}\nA: {reply}",
+                writer = self._get_memory_writer()
+                writer.request_flush()  # both turns go out in one request
+                writer.submit(
+                    f"Q: {message}\nA: {reply}",
                     agent_id=agent.id,
                     memory_type="conversation",
                 )
@@ -209,6 +226,35 @@ class AgentManager:
 
         return reply
 
+    async def _await_memory(self, hydrate: "asyncio.Future[str]") -> str:
+        """Result of a hydration call, or "" if it misses the latency budget or fails."""
+        done, _ = await asyncio.wait({hydrate}, timeout=self._memory_budget)
+        if not done:
+            hydrate.cancel()
+            self._logger.debug("Memory hydration over %.0fms budget — skipped", self._memory_budget * 1000)
+            return ""
+        try:
+            return hydrate.result() or ""
+        except Exception as exc:
+            self._logger.warning("Redis memory unavailable: %s", exc)
+            return ""
+
+    def _get_memory_writer(self) -> Any:
+        if self._memory_writer is None:
+            self._memory_writer = MemoryWriteBatcher(self._redis)
+        return self._memory_writer
+
+    async def close(self) -> None:
+        """Drain background memory writes and release the memory client."""
+        if self._memory_writer is not None:
+            await self._memory_writer.close()
+            self._memory_writer = None
+        if self._redis:
+            try:
+                await self._redis.close()
+            except Exception as exc:
+                self._logger.debug("Redis memory close failed: %s", exc)
+
     async def route_to_capable(self, message: str, capability_hint: str = "") -> str:
         """Route to the first active agent (optionally filtered by capability)."""
         agents = self._registry.active_agents()
@@ -226,14 +272,17 @@ class AgentManager:
         if target is None:
             raise ValueError(f"Target agent '{to_agent}' not found")
 
-        # Get source agent's perspective first
-        context = await source.chat(
-            f"Prepare a handoff summary for this task: {message}"
-        )
-        # Deliver to target with context
-        result = await target.chat(
-            f"You are receiving a delegated task.\n\nContext from {from_agent}:\n{context}\n\nTask: {message}"
-        )
+        with get_tracer().span(
+            "manager.delegate", project=self.project_id, source=from_agent, target=to_agent
+        ):
+            # Get source agent's perspective first
+            context = await source.chat(
+                f"Prepare a handoff summary for this task: {message}"
+            )
+            # Deliver to target with context
+            result = await target.chat(
+                f"You are receiving a delegated task.\n\nContext from {from_agent}:\n{context}\n\nTask: {message}"
+            )
         self._logger.info("Delegation %s → %s complete", from_agent, to_agent)
         return result
 
@@ -254,14 +303,17 @@ class AgentManager:
         """
         replies: List[str] = []
         prev = ""
-        for step in messages:
-            agent_name = step["agent"]
-            msg = step.get("message", "")
-            if step.get("use_previous") and prev:
-                msg = f"Previous output:\n{prev}\n\nYour task: {msg}"
-            reply = await self.route_message(agent_name, msg)
-            replies.append(reply)
-            prev = reply
+        tracer = get_tracer()
+        with tracer.span("manager.chain", project=self.project_id, steps=len(messages)):
+            for i, step in enumerate(messages):
+                agent_name = step["agent"]
+                msg = step.get("message", "")
+                if step.get("use_previous") and prev:
+                    msg = f"Previous output:\n{prev}\n\nYour task: {msg}"
+                with tracer.span("manager.chain.step", step=i, agent=agent_name):
+                    reply = await self.route_message(agent_name, msg)
+                replies.append(reply)
+                prev = reply
         return replies
 
     # ------------------------------------------------------------------
@@ -276,21 +328,30 @@ class AgentManager:
             srv.register_agent(agent)
         return srv
 
-    def expose_as_a2a(self, port: int = 9000, base_url: str = "") -> Any:
-        """Return a configured A2AServer for the project's primary agent."""
-        from oflo_agent_protocol.protocols.a2a.server import A2AServer
+    def expose_as_a2a(
+        self,
+        port: int = 9000,
+        base_url: str = "",
+        skill_tags: Optional[Dict[str, List[str]]] = None,
+        **server_kwargs: Any,
+    ) -> Any:
+        """Return an A2A gateway serving every active agent as a skill.
+
+        The first active agent answers messages that match no skill.
+        `skill_tags` maps agent names to extra routing keywords.
+        """
+        from oflo_agent_protocol.protocols.a2a.gateway import A2AGateway
         from oflo_agent_protocol.protocols.a2a.types import AgentCard
         agents = self._registry.active_agents()
         if not agents:
             raise RuntimeError("No active agents to expose via A2A")
-        primary = agents[0]
         url = base_url or f"http://localhost:{port}"
         card = AgentCard(
             name=self.project_id,
             description=f"Oflo project: {self.project_id}",
             url=url,
         )
-        return A2AServer(card=card, agent=primary, port=port)
+        return A2AGateway(card=card, agents=agents, tags=skill_tags, port=port, **server_kwargs)
 
     # ------------------------------------------------------------------
     # Observability
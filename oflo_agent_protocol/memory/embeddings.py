@@ -0,0 +1,271 @@
+"""Batched, cached embedding pipeline shared by memory and the RAG pipelines.
+
+`EmbeddingService` wraps any embedding model and adds:
+
+  • Micro-batching — concurrent `embed()` calls arriving within
+    `batch_window_ms` are coalesced into one model call (flushed early once
+    `batch_size` texts are waiting).  Identical texts in flight share a
+    single slot.
+  • Caching — vectors are keyed by a content hash (model name + text).  An
+    in-process LRU holds compact float32 arrays; an optional SQLite file
+    under `cache_dir` survives restarts.
+  • Normalisation — vectors are L2-normalised once, before they are cached,
+    so consumers can use plain dot products.
+
+Model contract (first match wins): an `embed_batch(texts)` method, an
+`embed(text)` method, or a plain callable taking a list of texts.  Sync or
+async both work; sync models run in the default executor.
+
+`HashEmbedder` is a deterministic, dependency-free stand-in for tests and
+offline use.
+
+Usage::
+
+    service = EmbeddingService(OpenAIEmbedder(), cache_dir="~/.cache/oflo")
+    vec = await service.embed("User prefers concise answers")
+    mem = MemoryManager("marketing", embedding_model=service)
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import inspect
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class HashEmbedder:
+    """
+    Deterministic feature-hashing embedder — no model, no network.
+
+    Each lower-cased token is hashed (blake2b, stable across processes) to a
+    signed bucket; texts sharing words therefore land near each other.
+    """
+
+    def __init__(self, dim: int = 256) -> None:
+        self.dim = dim
+        self.model_name = f"hash-{dim}"
+
+    def embed(self, text: str) -> List[float]:
+        vec = [0.0] * self.dim
+        for token in _TOKEN_RE.findall(text.lower()):
+            h = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+            vec[h % self.dim] += 1.0 if (h >> 63) & 1 else -1.0
+        return vec
+
+    def embed_batch(self, texts: Sequence[str]) -> List[List[float]]:
+        return [self.embed(t) for t in texts]
+
+
+class _DiskCache:
+    """SQLite-backed vector cache: one row per content hash."""
+
+    def __init__(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vec BLOB NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, array]:
+        out: Dict[str, array] = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = list(keys[start:start + 500])
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vec FROM embeddings WHERE key IN ({marks})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    vec = array("f")
+                    vec.frombytes(blob)
+                    out[key] = vec
+        return out
+
+    def put_many(self, items: Sequence[Tuple[str, array]]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vec) VALUES (?, ?)",
+                [(key, vec.tobytes()) for key, vec in items],
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingService:
+    """Micro-batching, caching front for an embedding model."""
+
+    def __init__(
+        self,
+        model: Any,
+        model_name: Optional[str] = None,
+        batch_size: int = 64,
+        batch_window_ms: float = 5.0,
+        cache_size: int = 10_000,
+        cache_dir: Optional[str] = None,
+        normalize: bool = True,
+    ) -> None:
+        self._model = model
+        self.model_name = model_name or getattr(model, "model_name", None) or type(model).__name__
+        self._batch_size = max(1, batch_size)
+        self._window = batch_window_ms / 1000.0
+        self._cache_size = cache_size
+        self._normalize = normalize
+        self._lru: "OrderedDict[str, array]" = OrderedDict()
+        self._disk = (
+            _DiskCache(os.path.join(os.path.expanduser(cache_dir), "embeddings.sqlite3"))
+            if cache_dir else None
+        )
+        self._pending: List[Tuple[str, str]] = []
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self.stats: Dict[str, int] = {"hits": 0, "disk_hits": 0, "misses": 0, "model_calls": 0}
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def embed(self, text: str) -> array:
+        """Embedding for `text` as a float32 array (a fresh copy — safe to mutate)."""
+        key = self._key(text)
+        cached = self._lru.get(key)
+        if cached is not None:
+            self._lru.move_to_end(key)
+            self.stats["hits"] += 1
+            return array("f", cached)
+
+        fut = self._inflight.get(key)
+        if fut is None:
+            loop = asyncio.get_running_loop()
+            fut = self._inflight[key] = loop.create_future()
+            self._pending.append((key, text))
+            if len(self._pending) >= self._batch_size:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self._window, self._flush)
+        # shield: one cancelled caller must not cancel the shared result
+        vec = await asyncio.shield(fut)
+        return array("f", vec)
+
+    async def embed_many(self, texts: Sequence[str]) -> List[array]:
+        return list(await asyncio.gather(*(self.embed(t) for t in texts)))
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+    # ------------------------------------------------------------------
+    # Batching
+    # ------------------------------------------------------------------
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode()).hexdigest()
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, str]]) -> None:
+        loop = asyncio.get_running_loop()
+        results: Dict[str, array] = {}
+        try:
+            if self._disk is not None:
+                results = await loop.run_in_executor(
+                    None, self._disk.get_many, [key for key, _ in batch]
+                )
+                self.stats["disk_hits"] += len(results)
+
+            missing = [(key, text) for key, text in batch if key not in results]
+            if missing:
+                self.stats["misses"] += len(missing)
+                self.stats["model_calls"] += 1
+                raw = await self._call_model([text for _, text in missing])
+                if len(raw) != len(missing):
+                    raise ValueError(
+                        f"Embedding model returned {len(raw)} vectors for {len(missing)} texts"
+                    )
+                fresh = [(key, self._prepare(vec)) for (key, _), vec in zip(missing, raw)]
+                results.update(fresh)
+                if self._disk is not None:
+                    await loop.run_in_executor(None, self._disk.put_many, fresh)
+        except Exception as exc:
+            logger.warning("Embedding batch of %d failed: %s", len(batch), exc)
+            for key, _ in batch:
+                fut = self._inflight.pop(key, None)
+                if fut is not None and not fut.done():
+                    fut.set_exception(exc)
+            return
+
+        for key, _ in batch:
+            vec = results[key]
+            self._remember(key, vec)
+            fut = self._inflight.pop(key, None)
+            if fut is not None and not fut.done():
+                fut.set_result(vec)
+
+    async def _call_model(self, texts: List[str]) -> List[Sequence[float]]:
+        model = self._model
+        if hasattr(model, "embed_batch"):
+            fn, per_text = model.embed_batch, False
+        elif hasattr(model, "embed"):
+            fn, per_text = model.embed, True
+        else:
+            fn, per_text = model, False
+
+        if per_text:
+            if inspect.iscoroutinefunction(fn):
+                return list(await asyncio.gather(*(fn(t) for t in texts)))
+            return await asyncio.get_running_loop().run_in_executor(
+                None, lambda: [fn(t) for t in texts]
+            )
+        if inspect.iscoroutinefunction(fn):
+            return list(await fn(texts))
+        out = await asyncio.get_running_loop().run_in_executor(None, fn, texts)
+        if inspect.isawaitable(out):
+            out = await out
+        return list(out)
+
+    # ------------------------------------------------------------------
+    # Cache
+    # ------------------------------------------------------------------
+
+    def _prepare(self, vector: Sequence[float]) -> array:
+        vec = array("f", vector)
+        if self._normalize:
+            norm = math.sqrt(sum(x * x for x in vec))
+            if norm:
+                inv = 1.0 / norm
+                vec = array("f", (x * inv for x in vec))
+        return vec
+
+    def _remember(self, key: str, vec: array) -> None:
+        if self._cache_size <= 0:
+            return
+        self._lru[key] = vec
+        self._lru.move_to_end(key)
+        while len(self._lru) > self._cache_size:
+            self._lru.popitem(last=False)
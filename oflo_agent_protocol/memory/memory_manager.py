@@ -2,20 +2,39 @@
 
 Agents use this for semantic search over past conversations and shared knowledge.
 The in-memory store is the default; Weaviate is opt-in via environment variables.
+Weaviate writes are write-behind (see `replication.WeaviateReplicator`).
+Given an `embedding_model`, memories are also embedded into a local
+`VectorIndex` (requires NumPy) for semantic recall without an external service.
+Local searches fuse BM25 and vector rankings with reciprocal-rank fusion, then
+apply recency decay, memory_type weights and a cheap lexical re-rank
+(see `RetrievalConfig`).
 """
 from __future__ import annotations
 
+import asyncio
 import hashlib
+import heapq
+import inspect
 import json
 import logging
+import math
+import re
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+if TYPE_CHECKING:
+    from oflo_agent_protocol.memory.replication import WeaviateReplicator
+    from oflo_agent_protocol.memory.vector_index import VectorIndex
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class MemoryEntry:
     key: str
     content: str
@@ -25,6 +44,20 @@ class MemoryEntry:
     metadata: Dict[str, Any] = field(default_factory=dict)
     embedding: Optional[List[float]] = None
 
+    def __post_init__(self) -> None:
+        # Few distinct values, repeated on every entry — share one copy each
+        self.agent_id = sys.intern(self.agent_id)
+        self.memory_type = sys.intern(self.memory_type)
+
+    def size_bytes(self) -> int:
+        """Approximate payload size used for byte caps (UTF-8 text + metadata)."""
+        size = len(self.key) + len(self.content.encode("utf-8"))
+        if self.metadata:
+            size += len(json.dumps(self.metadata, default=str))
+        if self.embedding:
+            size += 8 * len(self.embedding)
+        return size
+
     def to_dict(self) -> Dict[str, Any]:
         return {
             "key": self.key,
@@ -36,38 +69,456 @@ class MemoryEntry:
         }
 
 
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def _tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class _InvertedIndex:
+    """BM25 postings for one scope (the whole store, or a single agent)."""
+
+    __slots__ = ("postings", "doc_len", "total_len")
+
+    def __init__(self) -> None:
+        self.postings: Dict[str, Dict[int, int]] = {}  # term → {doc_id: tf}
+        self.doc_len: Dict[int, int] = {}
+        self.total_len = 0
+
+    def add(self, doc_id: int, tf: Dict[str, int], length: int) -> None:
+        postings = self.postings
+        for term, n in tf.items():
+            bucket = postings.get(term)
+            if bucket is None:
+                postings[term] = {doc_id: n}
+            else:
+                bucket[doc_id] = n
+        self.doc_len[doc_id] = length
+        self.total_len += length
+
+    def remove(self, doc_id: int, terms: Iterable[str]) -> None:
+        postings = self.postings
+        for term in terms:
+            bucket = postings.get(term)
+            if bucket is None:
+                continue
+            bucket.pop(doc_id, None)
+            if not bucket:
+                del postings[term]
+        self.total_len -= self.doc_len.pop(doc_id, 0)
+
+    def score(self, terms: Iterable[str], k1: float, b: float) -> Dict[int, float]:
+        n_docs = len(self.doc_len)
+        if not n_docs:
+            return {}
+        avgdl = self.total_len / n_docs or 1.0
+        doc_len = self.doc_len
+        scores: Dict[int, float] = {}
+        for term in terms:
+            bucket = self.postings.get(term)
+            if not bucket:
+                continue
+            df = len(bucket)
+            idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            k1_plus = k1 + 1.0
+            norm_a = k1 * (1.0 - b)
+            norm_b = k1 * b / avgdl
+            get = scores.get
+            for doc_id, tf in bucket.items():
+                s = idf * tf * k1_plus / (tf + norm_a + norm_b * doc_len[doc_id])
+                scores[doc_id] = get(doc_id, 0.0) + s
+        return scores
+
+
+class EvictionPolicy:
+    """
+    Decides which entry `InMemoryStore` evicts next.
+
+    The base class is FIFO: it keeps insertion order globally and per agent
+    in OrderedDicts, so every hook and `victim()` is O(1).  Subclasses
+    override `on_access()` / `expired()` to change the order.
+    """
+
+    name = "fifo"
+
+    def __init__(self) -> None:
+        self._order: "OrderedDict[int, None]" = OrderedDict()
+        self._agent_order: Dict[str, "OrderedDict[int, None]"] = {}
+
+    def on_add(self, doc_id: int, agent_id: str, now: float) -> None:
+        self._order[doc_id] = None
+        order = self._agent_order.get(agent_id)
+        if order is None:
+            order = self._agent_order[agent_id] = OrderedDict()
+        order[doc_id] = None
+
+    def on_access(self, doc_id: int, agent_id: str) -> None:
+        pass
+
+    def on_remove(self, doc_id: int, agent_id: str) -> None:
+        self._order.pop(doc_id, None)
+        order = self._agent_order.get(agent_id)
+        if order is not None:
+            order.pop(doc_id, None)
+            if not order:
+                del self._agent_order[agent_id]
+
+    def victim(self, agent_id: Optional[str] = None) -> Optional[int]:
+        order = self._order if agent_id is None else self._agent_order.get(agent_id)
+        return next(iter(order), None) if order else None
+
+    def expired(self, now: float) -> List[int]:
+        return []
+
+
+class FIFOPolicy(EvictionPolicy):
+    """Evict the oldest inserted entry."""
+
+
+class LRUPolicy(EvictionPolicy):
+    """Evict the least recently returned entry (search / get_recent hits)."""
+
+    name = "lru"
+
+    def on_access(self, doc_id: int, agent_id: str) -> None:
+        if doc_id in self._order:
+            self._order.move_to_end(doc_id)
+            self._agent_order[agent_id].move_to_end(doc_id)
+
+
+class TTLPolicy(EvictionPolicy):
+    """
+    Entries expire `ttl_seconds` after insertion; caps evict oldest first.
+
+    With a fixed TTL, expiry order equals insertion order, so expired
+    entries are always at the head of the FIFO order.
+    """
+
+    name = "ttl"
+
+    def __init__(self, ttl_seconds: float = 3600.0) -> None:
+        super().__init__()
+        self.ttl_seconds = ttl_seconds
+        self._added: Dict[int, float] = {}
+
+    def on_add(self, doc_id: int, agent_id: str, now: float) -> None:
+        super().on_add(doc_id, agent_id, now)
+        self._added[doc_id] = now
+
+    def on_remove(self, doc_id: int, agent_id: str) -> None:
+        super().on_remove(doc_id, agent_id)
+        self._added.pop(doc_id, None)
+
+    def expired(self, now: float) -> List[int]:
+        cutoff = now - self.ttl_seconds
+        out: List[int] = []
+        for doc_id in self._order:
+            if self._added[doc_id] > cutoff:
+                break
+            out.append(doc_id)
+        return out
+
+
+_POLICIES = {"fifo": FIFOPolicy, "lru": LRUPolicy, "ttl": TTLPolicy}
+
+
 class InMemoryStore:
-    """Fast in-process memory backed by a list (no external dependencies)."""
+    """
+    Fast in-process memory (no external dependencies).
 
-    def __init__(self, max_entries: int = 1000) -> None:
-        self._store: List[MemoryEntry] = []
+    Entries are tokenized once on `add()` into a BM25 inverted index.  Each
+    agent also gets its own index and insertion order, so agent-scoped
+    searches, `get_recent()` and `clear_agent()` only touch that agent's
+    entries.  Re-adding an existing key replaces the old entry.
+
+    Capacity is bounded by entry count and approximate bytes, both globally
+    (`max_entries`, `max_bytes`) and per agent (`agent_quota`,
+    `agent_max_bytes`) — an agent over its quota evicts its own entries, not
+    other agents'.  Which entry goes is decided by `policy`: "fifo", "lru",
+    "ttl" or any `EvictionPolicy` instance.
+
+    `on_remove(entry)` is called whenever an entry leaves the store —
+    evicted, expired, replaced or cleared — so side indexes can follow.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        k1: float = 1.5,
+        b: float = 0.75,
+        max_bytes: Optional[int] = None,
+        agent_quota: Optional[int] = None,
+        agent_max_bytes: Optional[int] = None,
+        policy: Union[str, EvictionPolicy] = "fifo",
+        ttl_seconds: Optional[float] = None,
+        on_remove: Optional[Callable[[MemoryEntry], None]] = None,
+    ) -> None:
         self._max = max_entries
+        self.on_remove = on_remove
+        self._max_bytes = max_bytes
+        self._agent_quota = agent_quota
+        self._agent_max_bytes = agent_max_bytes
+        self._k1 = k1
+        self._b = b
+        if isinstance(policy, str):
+            try:
+                cls = _POLICIES[policy]
+            except KeyError:
+                raise ValueError(f"Unknown eviction policy {policy!r}") from None
+            policy = cls(ttl_seconds) if cls is TTLPolicy and ttl_seconds else cls()
+        self._policy: EvictionPolicy = policy
+        self._next_id = 0
+        self._entries: Dict[int, MemoryEntry] = {}
+        self._terms: Dict[int, Tuple[str, ...]] = {}
+        self._sizes: Dict[int, int] = {}
+        self._by_key: Dict[str, int] = {}
+        self._bytes = 0
+        self._agent_bytes: Dict[str, int] = {}
+        self._index = _InvertedIndex()
+        self._agent_index: Dict[str, _InvertedIndex] = {}
+        # Per-agent insertion order; an OrderedDict so removal is O(1) from anywhere.
+        self._recent: Dict[str, "OrderedDict[int, None]"] = {}
 
-    def add(self, entry: MemoryEntry) -> None:
-        if len(self._store) >= self._max:
-            self._store.pop(0)
-        self._store.append(entry)
+    def __len__(self) -> int:
+        return len(self._entries)
 
-    def search(self, query: str, agent_id: Optional[str] = None, limit: int = 10) -> List[MemoryEntry]:
-        tokens = set(query.lower().split())
-        scored: List[tuple[int, MemoryEntry]] = []
-        for entry in self._store:
-            if agent_id and entry.agent_id != agent_id:
-                continue
-            content_lower = entry.content.lower()
-            hits = sum(1 for t in tokens if t in content_lower)
-            if hits > 0:
-                scored.append((hits, entry))
-        scored.sort(key=lambda x: -x[0])
-        return [e for _, e in scored[:limit]]
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def add(self, entry: MemoryEntry) -> bool:
+        """Insert `entry`; returns False if it cannot fit under the byte caps at all."""
+        now = time.monotonic()
+        self._expire(now)
+        size = entry.size_bytes()
+        agent = entry.agent_id
+        if (self._max_bytes is not None and size > self._max_bytes) or (
+            self._agent_max_bytes is not None and size > self._agent_max_bytes
+        ):
+            # Rejected before touching the store, so an existing entry under this key survives.
+            logger.warning("Memory entry %s (%d bytes) exceeds the store byte cap", entry.key, size)
+            return False
+        old = self._by_key.get(entry.key)
+        if old is not None:
+            self._remove(old)
+
+        # Per-agent caps first, so a chatty agent evicts its own entries
+        agent_index = self._agent_index.get(agent)
+        if agent_index is not None:
+            while agent_index.doc_len and (
+                (self._agent_quota is not None and len(agent_index.doc_len) >= self._agent_quota)
+                or (
+                    self._agent_max_bytes is not None
+                    and self._agent_bytes.get(agent, 0) + size > self._agent_max_bytes
+                )
+            ):
+                self._evict(agent)
+        while self._entries and (
+            len(self._entries) >= self._max
+            or (self._max_bytes is not None and self._bytes + size > self._max_bytes)
+        ):
+            self._evict(None)
+
+        doc_id = self._next_id
+        self._next_id += 1
+        tokens = _tokenize(entry.content)
+        tf: Dict[str, int] = {}
+        for t in tokens:
+            tf[t] = tf.get(t, 0) + 1
+
+        self._entries[doc_id] = entry
+        self._terms[doc_id] = tuple(tf)
+        self._sizes[doc_id] = size
+        self._by_key[entry.key] = doc_id
+        self._bytes += size
+        self._agent_bytes[agent] = self._agent_bytes.get(agent, 0) + size
+        self._index.add(doc_id, tf, len(tokens))
+        agent_index = self._agent_index.get(agent)
+        if agent_index is None:
+            agent_index = self._agent_index[agent] = _InvertedIndex()
+            self._recent[agent] = OrderedDict()
+        agent_index.add(doc_id, tf, len(tokens))
+        self._recent[agent][doc_id] = None
+        self._policy.on_add(doc_id, agent, now)
+        return True
+
+    def _evict(self, agent_id: Optional[str]) -> None:
+        victim = self._policy.victim(agent_id)
+        if victim is None:  # policy out of sync — fall back to oldest
+            victim = next(iter(self._entries))
+        self._remove(victim)
+
+    def _expire(self, now: float) -> None:
+        for doc_id in self._policy.expired(now):
+            self._remove(doc_id)
+
+    def _remove(self, doc_id: int) -> None:
+        entry = self._entries.pop(doc_id)
+        terms = self._terms.pop(doc_id)
+        size = self._sizes.pop(doc_id)
+        agent = entry.agent_id
+        if self._by_key.get(entry.key) == doc_id:
+            del self._by_key[entry.key]
+        self._bytes -= size
+        self._policy.on_remove(doc_id, agent)
+        self._index.remove(doc_id, terms)
+        if self.on_remove is not None:
+            self.on_remove(entry)
+        agent_index = self._agent_index.get(agent)
+        if agent_index is None:
+            return
+        agent_index.remove(doc_id, terms)
+        if not agent_index.doc_len:
+            del self._agent_index[agent]
+            del self._recent[agent]
+            self._agent_bytes.pop(agent, None)
+            return
+        self._agent_bytes[agent] -= size
+        self._recent[agent].pop(doc_id, None)
+
+    def get(self, key: str) -> Optional[MemoryEntry]:
+        doc_id = self._by_key.get(key)
+        return self._entries.get(doc_id) if doc_id is not None else None
+
+    def search(
+        self,
+        query: str,
+        agent_id: Optional[str] = None,
+        limit: int = 10,
+        memory_type: Optional[str] = None,
+    ) -> List[MemoryEntry]:
+        self._expire(time.monotonic())
+        index = self._index if agent_id is None else self._agent_index.get(agent_id)
+        if index is None or limit <= 0:
+            return []
+        scores = index.score(set(_tokenize(query)), self._k1, self._b)
+        if memory_type is not None:
+            entries = self._entries
+            scores = {d: s for d, s in scores.items() if entries[d].memory_type == memory_type}
+        # Ties go to the newer entry (higher doc id)
+        top = heapq.nlargest(limit, scores.items(), key=lambda kv: (kv[1], kv[0]))
+        return self._touch([doc_id for doc_id, _ in top])
 
     def get_recent(self, agent_id: str, limit: int = 20) -> List[MemoryEntry]:
-        return [e for e in reversed(self._store) if e.agent_id == agent_id][:limit]
+        self._expire(time.monotonic())
+        recent = self._recent.get(agent_id)
+        if not recent:
+            return []
+        ids: List[int] = []
+        for doc_id in reversed(recent):
+            if len(ids) >= limit:
+                break
+            ids.append(doc_id)
+        return self._touch(ids)
+
+    def _touch(self, ids: List[int]) -> List[MemoryEntry]:
+        out = [self._entries[doc_id] for doc_id in ids]
+        for doc_id, entry in zip(ids, out):
+            self._policy.on_access(doc_id, entry.agent_id)
+        return out
 
     def clear_agent(self, agent_id: str) -> int:
-        before = len(self._store)
-        self._store = [e for e in self._store if e.agent_id != agent_id]
-        return before - len(self._store)
+        agent_index = self._agent_index.get(agent_id)
+        if agent_index is None:
+            return 0
+        doc_ids = list(agent_index.doc_len)
+        for doc_id in doc_ids:
+            self._remove(doc_id)
+        return len(doc_ids)
+
+
+@dataclass
+class RetrievalConfig:
+    """Knobs for hybrid local retrieval in `MemoryManager.search()`."""
+
+    rrf_k: int = 60                      # reciprocal-rank fusion constant
+    keyword_weight: float = 1.0
+    vector_weight: float = 1.0
+    candidate_factor: int = 4            # each retriever returns limit × this
+    recency_half_life_s: Optional[float] = 7 * 24 * 3600.0  # None disables decay
+    recency_weight: float = 0.3          # 0 = ignore age, 1 = score fully decays
+    memory_type_weights: Dict[str, float] = field(default_factory=dict)
+    rerank: bool = True
+    rerank_weight: float = 0.5           # boost for query-term coverage
+    phrase_bonus: float = 0.25           # boost when the query appears verbatim
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]],
+    weights: Optional[Sequence[float]] = None,
+    k: int = 60,
+) -> Dict[str, float]:
+    """Fuse ranked key lists: score(key) = Σ weight / (k + rank), rank from 1."""
+    scores: Dict[str, float] = {}
+    for i, ranking in enumerate(rankings):
+        w = weights[i] if weights is not None else 1.0
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + w / (k + rank)
+    return scores
+
+
+def _age_seconds(timestamp: str, now: datetime) -> float:
+    try:
+        ts = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except ValueError:
+        return 0.0
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return max(0.0, (now - ts).total_seconds())
+
+
+_CacheKey = Tuple[str, Optional[str], Optional[str], int]
+
+
+class _SearchCache:
+    """
+    Short-TTL LRU of remote search results, keyed by
+    (query, agent_id, memory_type, limit).  A write for an agent drops that
+    agent's entries and every unscoped (agent_id=None) entry — once when it
+    is stored locally and again when Weaviate accepts it.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 1024) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: "OrderedDict[_CacheKey, Tuple[float, List[MemoryEntry]]]" = OrderedDict()
+        self._by_agent: Dict[Optional[str], set] = {}
+        self.generation = 0  # bumped on every invalidation
+
+    def get(self, key: _CacheKey) -> Optional[List[MemoryEntry]]:
+        hit = self._data.get(key)
+        if hit is None:
+            return None
+        expires, entries = hit
+        if expires < time.monotonic():
+            self._discard(key)
+            return None
+        self._data.move_to_end(key)
+        return list(entries)
+
+    def put(self, key: _CacheKey, entries: List[MemoryEntry]) -> None:
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, list(entries))
+        self._data.move_to_end(key)
+        self._by_agent.setdefault(key[1], set()).add(key)
+        while len(self._data) > self.max_entries:
+            self._discard(next(iter(self._data)))
+
+    def invalidate(self, agent_id: Optional[str]) -> None:
+        self.generation += 1
+        for scope in {agent_id, None}:
+            for key in self._by_agent.pop(scope, ()):
+                self._data.pop(key, None)
+
+    def _discard(self, key: _CacheKey) -> None:
+        self._data.pop(key, None)
+        keys = self._by_agent.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_agent[key[1]]
 
 
 class MemoryManager:
@@ -79,16 +530,47 @@ class MemoryManager:
         mem = MemoryManager(project_id="marketing")
         await mem.store(agent_id="abc", content="User prefers concise answers", memory_type="semantic")
         results = await mem.search("concise", agent_id="abc")
+
+    `embedding_model` is anything with an `embed(text)` method (sync or async)
+    returning a vector — the same contract the RAG pipelines use.
     """
 
-    def __init__(self, project_id: str, use_weaviate: bool = False) -> None:
+    def __init__(
+        self,
+        project_id: str,
+        use_weaviate: bool = False,
+        local_store: Optional[InMemoryStore] = None,
+        embedding_model: Optional[Any] = None,
+        vector_index: Optional["VectorIndex"] = None,
+        retrieval: Optional[RetrievalConfig] = None,
+        replication_journal: Optional[str] = None,
+        search_budget_ms: float = 250.0,
+        search_cache_ttl: float = 30.0,
+    ) -> None:
         self.project_id = project_id
-        self._local = InMemoryStore()
+        self._local = local_store if local_store is not None else InMemoryStore()
+        self._local.on_remove = self._chain_on_remove(self._local.on_remove)
+        self._retrieval = retrieval or RetrievalConfig()
+        self._embedding_model = embedding_model
+        self._vectors: Optional["VectorIndex"] = vector_index
+        self._vectors_disabled = False
         self._weaviate: Optional[Any] = None
+        self._replicator: Optional["WeaviateReplicator"] = None
+        self._search_budget = search_budget_ms / 1000.0
+        self._search_cache = _SearchCache(ttl=search_cache_ttl)
+        # Writes enqueued for Weaviate but not yet accepted, per agent.
+        self._unreplicated: Dict[str, int] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
         if use_weaviate:
-            self._try_init_weaviate()
+            self._try_init_weaviate(replication_journal)
+
+    @property
+    def vector_index(self) -> Optional["VectorIndex"]:
+        """The local ANN index, created on the first embedded memory."""
+        return self._vectors
 
-    def _try_init_weaviate(self) -> None:
+    def _try_init_weaviate(self, journal_path: Optional[str] = None) -> None:
         import os
         url = os.getenv("WEAVIATE_URL")
         api_key = os.getenv("WEAVIATE_API_KEY")
@@ -104,6 +586,13 @@ class MemoryManager:
             )
             self._weaviate.connect()
             self._ensure_schema()
+            from oflo_agent_protocol.memory.replication import WeaviateReplicator
+            self._replicator = WeaviateReplicator(
+                self._weaviate,
+                self.project_id,
+                journal_path=journal_path or os.getenv("OFLO_MEMORY_JOURNAL"),
+                on_replicated=self._on_replicated,
+            )
             logger.info("Weaviate connected for project '%s'", self.project_id)
         except Exception as exc:
             logger.warning("Weaviate unavailable (%s) — using in-memory only", exc)
@@ -138,6 +627,7 @@ class MemoryManager:
         memory_type: str = "episodic",
         key: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
+        embedding: Optional[Sequence[float]] = None,
     ) -> str:
         entry_key = key or hashlib.sha256(f"{agent_id}:{content}".encode()).hexdigest()[:16]
         entry = MemoryEntry(
@@ -147,21 +637,28 @@ class MemoryManager:
             memory_type=memory_type,
             metadata=metadata or {},
         )
-        self._local.add(entry)
+        added = self._local.add(entry)
 
-        if self._weaviate:
-            try:
-                col = self._weaviate.collections.get("OfloMemory")
-                col.data.insert({
-                    "key": entry_key,
-                    "content": content,
-                    "agent_id": agent_id,
-                    "project_id": self.project_id,
-                    "memory_type": memory_type,
-                    "timestamp": entry.timestamp,
-                })
-            except Exception as exc:
-                logger.warning("Weaviate store failed: %s", exc)
+        vector = embedding if embedding is not None else await self._embed(content)
+        if added and vector is not None:
+            index = self._vector_index(len(vector))
+            if index is not None:
+                index.add(entry_key, vector, agent_id=agent_id, memory_type=memory_type)
+
+        self._search_cache.invalidate(agent_id)
+        if self._replicator is not None:
+            # Write-behind: batched off the event loop, journalled if Weaviate is down.
+            # Remote results for this agent are not cached until Weaviate has the write.
+            self._loop = asyncio.get_running_loop()
+            if self._replicator.enqueue(entry_key, {
+                "key": entry_key,
+                "content": content,
+                "agent_id": agent_id,
+                "project_id": self.project_id,
+                "memory_type": memory_type,
+                "timestamp": entry.timestamp,
+            }):
+                self._unreplicated[agent_id] = self._unreplicated.get(agent_id, 0) + 1
 
         return entry_key
 
@@ -171,37 +668,264 @@ class MemoryManager:
         agent_id: Optional[str] = None,
         limit: int = 10,
         memory_type: Optional[str] = None,
+        query_embedding: Optional[Sequence[float]] = None,
+        mode: str = "hybrid",
     ) -> List[MemoryEntry]:
+        """
+        Search memories.  `mode` selects the local retrievers: "hybrid"
+        (BM25 + vectors, fused), "keyword" or "semantic".
+
+        With Weaviate, results come from a short-TTL cache or from a query
+        run on a worker thread; if that takes longer than the latency budget
+        the local indexes answer instead (the remote result still fills the
+        cache for the next turn).
+        """
         if self._weaviate:
-            try:
-                col = self._weaviate.collections.get("OfloMemory")
-                filters = []
-                if agent_id:
-                    import weaviate.classes.query as wq
-                    filters.append(wq.Filter.by_property("agent_id").equal(agent_id))
-                result = col.query.near_text(
-                    query=query,
-                    limit=limit,
-                    filters=filters[0] if filters else None,
-                )
-                entries = []
-                for obj in result.objects:
-                    p = obj.properties
-                    entries.append(MemoryEntry(
-                        key=p.get("key", ""),
-                        content=p.get("content", ""),
-                        agent_id=p.get("agent_id", ""),
-                        memory_type=p.get("memory_type", "episodic"),
-                        timestamp=str(p.get("timestamp", "")),
-                    ))
+            key: _CacheKey = (query, agent_id, memory_type, limit)
+            cached = self._search_cache.get(key)
+            if cached is not None:
+                return cached
+            entries = await self._remote_search(key)
+            if entries is not None:
                 return entries
-            except Exception as exc:
-                logger.warning("Weaviate search failed, falling back local: %s", exc)
 
-        return self._local.search(query, agent_id=agent_id, limit=limit)
+        return await self._local_search(query, agent_id, limit, memory_type, query_embedding, mode)
+
+    async def _remote_search(self, key: _CacheKey) -> Optional[List[MemoryEntry]]:
+        """Weaviate results, or None on error / budget overrun."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="oflo-weaviate-search")
+        generation = self._search_cache.generation
+        fut = asyncio.get_running_loop().run_in_executor(self._executor, self._weaviate_query, *key)
+
+        def _fill_cache(f: "asyncio.Future[List[MemoryEntry]]") -> None:
+            # Skip results that raced with a write, or that may predate one
+            # still on its way to Weaviate — they may be stale.
+            if (
+                not f.cancelled() and f.exception() is None
+                and self._search_cache.generation == generation
+                and not self._replication_pending(key[1])
+            ):
+                self._search_cache.put(key, f.result())
+
+        fut.add_done_callback(_fill_cache)
+        done, _ = await asyncio.wait({fut}, timeout=self._search_budget)
+        if not done:
+            logger.debug("Weaviate search over %.0fms budget — answering locally", self._search_budget * 1000)
+            return None
+        try:
+            return list(fut.result())
+        except Exception as exc:
+            logger.warning("Weaviate search failed, falling back local: %s", exc)
+            return None
+
+    def _replication_pending(self, agent_id: Optional[str]) -> bool:
+        return bool(self._unreplicated) if agent_id is None else agent_id in self._unreplicated
+
+    def _on_replicated(self, objects: List[Dict[str, Any]]) -> None:
+        # Replicator worker thread → event loop.
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._replicated, [obj.get("agent_id", "") for obj in objects])
+        except RuntimeError:
+            pass  # loop closed in between
+
+    def _replicated(self, agent_ids: List[str]) -> None:
+        for agent_id in agent_ids:
+            left = self._unreplicated.get(agent_id, 0) - 1
+            if left > 0:
+                self._unreplicated[agent_id] = left
+            else:
+                self._unreplicated.pop(agent_id, None)
+        for agent_id in set(agent_ids):
+            self._search_cache.invalidate(agent_id)
+
+    def _weaviate_query(
+        self,
+        query: str,
+        agent_id: Optional[str],
+        memory_type: Optional[str],
+        limit: int,
+    ) -> List[MemoryEntry]:
+        col = self._weaviate.collections.get("OfloMemory")
+        filters = None
+        if agent_id or memory_type:
+            import weaviate.classes.query as wq
+            if agent_id:
+                filters = wq.Filter.by_property("agent_id").equal(agent_id)
+            if memory_type:
+                by_type = wq.Filter.by_property("memory_type").equal(memory_type)
+                filters = by_type if filters is None else filters & by_type
+        result = col.query.near_text(query=query, limit=limit, filters=filters)
+        entries = []
+        for obj in result.objects:
+            p = obj.properties
+            entries.append(MemoryEntry(
+                key=p.get("key", ""),
+                content=p.get("content", ""),
+                agent_id=p.get("agent_id", ""),
+                memory_type=p.get("memory_type", "episodic"),
+                timestamp=str(p.get("timestamp", "")),
+            ))
+        return entries
+
+    async def _local_search(
+        self,
+        query: str,
+        agent_id: Optional[str],
+        limit: int,
+        memory_type: Optional[str],
+        query_embedding: Optional[Sequence[float]],
+        mode: str,
+    ) -> List[MemoryEntry]:
+        if mode not in ("hybrid", "keyword", "semantic"):
+            raise ValueError(f"Unknown search mode {mode!r}")
+        if limit <= 0:
+            return []
+        cfg = self._retrieval
+        n_candidates = limit * max(1, cfg.candidate_factor)
+        use_vectors = mode != "keyword" and self._vectors is not None and len(self._vectors) > 0
+
+        # Start the query embedding (usually a network call) and run BM25
+        # while it is in flight.
+        embed_task: Optional[asyncio.Future] = None
+        if use_vectors and query_embedding is None and self._embedding_model is not None:
+            embed_task = asyncio.ensure_future(self._embed(query))
+
+        keyword: List[MemoryEntry] = []
+        if mode != "semantic" or not use_vectors:
+            keyword = self._local.search(query, agent_id=agent_id, limit=n_candidates, memory_type=memory_type)
+
+        semantic: List[MemoryEntry] = []
+        if use_vectors:
+            vector = query_embedding if query_embedding is not None else (
+                await embed_task if embed_task is not None else None
+            )
+            if vector is not None:
+                semantic = self._semantic_search(vector, agent_id, n_candidates, memory_type)
+            elif mode == "semantic":
+                keyword = self._local.search(query, agent_id=agent_id, limit=n_candidates, memory_type=memory_type)
+
+        return self._fuse(query, keyword, semantic, limit)
+
+    def _fuse(
+        self,
+        query: str,
+        keyword: List[MemoryEntry],
+        semantic: List[MemoryEntry],
+        limit: int,
+    ) -> List[MemoryEntry]:
+        cfg = self._retrieval
+        by_key = {e.key: e for e in keyword}
+        by_key.update((e.key, e) for e in semantic)
+        if not by_key:
+            return []
+        scores = reciprocal_rank_fusion(
+            [[e.key for e in keyword], [e.key for e in semantic]],
+            [cfg.keyword_weight, cfg.vector_weight],
+            k=cfg.rrf_k,
+        )
+
+        now = datetime.now(timezone.utc)
+        query_terms = set(_tokenize(query))
+        query_phrase = " ".join(_tokenize(query))
+        for key, score in scores.items():
+            entry = by_key[key]
+            if cfg.memory_type_weights:
+                score *= cfg.memory_type_weights.get(entry.memory_type, 1.0)
+            if cfg.recency_half_life_s:
+                decay = 0.5 ** (_age_seconds(entry.timestamp, now) / cfg.recency_half_life_s)
+                score *= 1.0 - cfg.recency_weight + cfg.recency_weight * decay
+            if cfg.rerank and query_terms:
+                tokens = _tokenize(entry.content)
+                coverage = len(query_terms.intersection(tokens)) / len(query_terms)
+                boost = 1.0 + cfg.rerank_weight * coverage
+                if len(query_terms) > 1 and query_phrase in " ".join(tokens):
+                    boost += cfg.phrase_bonus
+                score *= boost
+            scores[key] = score
+
+        top = heapq.nlargest(limit, scores.items(), key=lambda kv: kv[1])
+        return [by_key[key] for key, _ in top]
+
+    def _semantic_search(
+        self,
+        vector: Sequence[float],
+        agent_id: Optional[str],
+        limit: int,
+        memory_type: Optional[str],
+    ) -> List[MemoryEntry]:
+        assert self._vectors is not None
+        # Over-fetch a little: agent/type filters are applied inside the index
+        hits = self._vectors.search(vector, k=2 * limit, agent_id=agent_id, memory_type=memory_type)
+        entries: List[MemoryEntry] = []
+        for key, _score in hits:
+            entry = self._local.get(key)
+            if entry is None:
+                self._vectors.remove(key)
+                continue
+            entries.append(entry)
+            if len(entries) >= limit:
+                break
+        return entries
+
+    async def _embed(self, text: str) -> Optional[Sequence[float]]:
+        if self._embedding_model is None:
+            return None
+        try:
+            vector = self._embedding_model.embed(text)
+            if inspect.isawaitable(vector):
+                vector = await vector
+            return vector
+        except Exception as exc:
+            logger.warning("Embedding failed, skipping vector index: %s", exc)
+            return None
+
+    def _chain_on_remove(
+        self, previous: Optional[Callable[[MemoryEntry], None]]
+    ) -> Callable[[MemoryEntry], None]:
+        def on_remove(entry: MemoryEntry) -> None:
+            # Keep the vector index in step with the store's evictions.
+            if self._vectors is not None:
+                self._vectors.remove(entry.key)
+            if previous is not None:
+                previous(entry)
+
+        return on_remove
+
+    def _vector_index(self, dim: int) -> Optional["VectorIndex"]:
+        if self._vectors is None and not self._vectors_disabled:
+            try:
+                from oflo_agent_protocol.memory.vector_index import VectorIndex
+            except ImportError:
+                logger.warning("NumPy not installed — semantic memory disabled (pip install oflo-ai-agent-protocol[vector])")
+                self._vectors_disabled = True
+                return None
+            self._vectors = VectorIndex(dim=dim)
+        return self._vectors
 
     async def get_recent(self, agent_id: str, limit: int = 20) -> List[MemoryEntry]:
         return self._local.get_recent(agent_id, limit=limit)
 
     async def clear_agent(self, agent_id: str) -> int:
+        self._search_cache.invalidate(agent_id)
+        if self._vectors is not None:
+            self._vectors.remove_agent(agent_id)
         return self._local.clear_agent(agent_id)
+
+    def close(self) -> None:
+        """Flush pending Weaviate writes (journalling what cannot be sent) and disconnect."""
+        if self._replicator is not None:
+            self._replicator.shutdown()
+            self._replicator = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._weaviate is not None:
+            try:
+                self._weaviate.close()
+            except Exception as exc:
+                logger.debug("Weaviate close failed: %s", exc)
+            self._weaviate = None
@@ -15,6 +15,26 @@ Long-Term Memory (per agent, persistent)
   • Queryable by user_id, topic, entity, time range
   • Used for: learned preferences, facts, episodic history
 
+Working-memory writes are coalesced: `append_to_working_memory()` updates a
+local mirror and queues the message; `flush_working_memory()` sends all
+queued messages in one PUT guarded by `If-Match` on the server's ETag.  On a
+409/412 the mirror is re-read and the queued messages are rebased onto it,
+so concurrent agents in a session do not lose each other's turns.  Servers
+that send no ETag (agent-memory-server today) get a fresh GET right before
+every flush instead, and the queued messages are appended to that — the
+window for a lost update shrinks to one GET→PUT round trip.  Reads are
+served from the mirror.  At most `max_pending` appends are queued; past
+that (e.g. while the circuit is open) the oldest are dropped.
+
+Resilience
+  • A health state machine (unknown → up ⇄ down) replaces the one-shot probe:
+    after `failure_threshold` consecutive network failures the circuit opens
+    and calls fail fast; the server is re-probed on a backoff schedule.
+  • One tuned `TCPConnector` (keepalive, DNS cache, connection limits) is
+    shared by every manager on an event loop.
+  • Every call has a timeout (`request_timeout`, overridable per operation
+    via `timeouts`) so a slow server cannot stall `route_message`.
+
 Memory Prompt Hydration
   • `hydrate_prompt(session_id, query)` → enriched system prompt
   • Pulls relevant working + long-term memories and injects them
@@ -49,11 +69,15 @@ Usage::
 """
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
+import time
+import weakref
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import aiohttp
 
@@ -61,6 +85,85 @@ logger = logging.getLogger(__name__)
 
 _DEFAULT_URL = os.getenv("REDIS_MEMORY_URL", "http://localhost:8000")
 _DEFAULT_TTL = int(os.getenv("REDIS_MEMORY_TTL", "86400"))  # 24 hours
+_DEFAULT_TIMEOUT = float(os.getenv("REDIS_MEMORY_TIMEOUT", "5"))  # seconds per call
+_MAX_FLUSH_ATTEMPTS = 3
+
+# One pooled connector per event loop, shared (and ref-counted) by all managers on that loop
+_connectors: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, List[Any]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _acquire_connector() -> aiohttp.TCPConnector:
+    loop = asyncio.get_running_loop()
+    slot = _connectors.get(loop)
+    if slot is None or slot[0].closed:
+        connector = aiohttp.TCPConnector(
+            limit=100,
+            limit_per_host=32,
+            ttl_dns_cache=300,
+            keepalive_timeout=30,
+        )
+        slot = _connectors[loop] = [connector, 0]
+    slot[1] += 1
+    return slot[0]
+
+
+async def _release_connector(connector: aiohttp.TCPConnector) -> None:
+    for loop, slot in list(_connectors.items()):
+        if slot[0] is connector:
+            slot[1] -= 1
+            if slot[1] <= 0:
+                del _connectors[loop]
+                await connector.close()
+            return
+
+
+class ServerHealth:
+    """
+    Availability state machine for the memory server.
+
+    ``unknown`` → first probe → ``up`` or ``down``.  While ``up``, network
+    failures are counted and `failure_threshold` in a row flip to ``down``
+    (circuit open: callers fail fast).  While ``down``, a re-probe is due
+    every `reprobe_interval` seconds, doubling up to `max_reprobe_interval`
+    while the server stays unreachable.
+    """
+
+    UNKNOWN, UP, DOWN = "unknown", "up", "down"
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reprobe_interval: float = 5.0,
+        max_reprobe_interval: float = 120.0,
+    ) -> None:
+        self.state = self.UNKNOWN
+        self.failure_threshold = max(1, failure_threshold)
+        self.reprobe_interval = reprobe_interval
+        self.max_reprobe_interval = max_reprobe_interval
+        self._failures = 0
+        self._interval = reprobe_interval
+        self._next_probe = 0.0
+
+    def probe_due(self) -> bool:
+        return self.state != self.UP and time.monotonic() >= self._next_probe
+
+    def record_success(self) -> None:
+        if self.state == self.DOWN:
+            logger.info("Redis memory server is reachable again")
+        self.state = self.UP
+        self._failures = 0
+        self._interval = self.reprobe_interval
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == self.UP and self._failures < self.failure_threshold:
+            return
+        if self.state == self.DOWN:
+            self._interval = min(self._interval * 2, self.max_reprobe_interval)
+        self.state = self.DOWN
+        self._next_probe = time.monotonic() + self._interval
 
 
 @dataclass
@@ -106,6 +209,11 @@ class RedisMemoryManager:
         api_key: Optional[str] = None,
         window_token_limit: int = 4000,
         ttl_seconds: int = _DEFAULT_TTL,
+        flush_interval: float = 5.0,
+        request_timeout: float = _DEFAULT_TIMEOUT,
+        timeouts: Optional[Dict[str, float]] = None,
+        health: Optional[ServerHealth] = None,
+        max_pending: int = 1000,
     ) -> None:
         self.session_id = session_id
         self.project_id = project_id
@@ -114,7 +222,22 @@ class RedisMemoryManager:
         self._window_token_limit = window_token_limit
         self._ttl = ttl_seconds
         self._session: Optional[aiohttp.ClientSession] = None
-        self._available: Optional[bool] = None  # lazily checked
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        self._request_timeout = request_timeout
+        self._timeouts = timeouts or {}  # operation name → seconds
+        self._health = health or ServerHealth()
+        self._probe_lock = asyncio.Lock()
+
+        # Working-memory mirror: last server state + appends not yet flushed
+        self._wm: Optional[Dict[str, Any]] = None
+        self._wm_etag: Optional[str] = None
+        self._wm_pending: List[Dict[str, str]] = []
+        self._wm_lock = asyncio.Lock()
+        self._max_pending = max(1, max_pending)
+        self.dropped_appends = 0
+        self._flush_interval = flush_interval
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
 
     # ------------------------------------------------------------------
     # Session management
@@ -125,48 +248,134 @@ class RedisMemoryManager:
             headers = {"Content-Type": "application/json"}
             if self._api_key:
                 headers["Authorization"] = f"Bearer {self._api_key}"
-            self._session = aiohttp.ClientSession(headers=headers)
+            if self._connector is None:
+                self._connector = _acquire_connector()
+            self._session = aiohttp.ClientSession(
+                headers=headers, connector=self._connector, connector_owner=False
+            )
         return self._session
 
+    @property
+    def health(self) -> str:
+        """``"unknown"``, ``"up"`` or ``"down"``."""
+        return self._health.state
+
+    @asynccontextmanager
+    async def _request(
+        self, method: str, path: str, op: str, **kwargs: Any
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """One HTTP call with the per-operation timeout, feeding the health state."""
+        timeout = aiohttp.ClientTimeout(total=self._timeouts.get(op, self._request_timeout))
+        try:
+            async with self._get_session().request(
+                method, f"{self._base}{path}", timeout=timeout, **kwargs
+            ) as resp:
+                if resp.status >= 500:
+                    self._health.record_failure()
+                else:
+                    self._health.record_success()
+                yield resp
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            self._health.record_failure()
+            raise
+
     async def close(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._flush_task is not None and not self._flush_task.done():
+            await asyncio.wait([self._flush_task])  # let a background flush finish its PUT
+        if self._wm_pending:
+            await self.flush_working_memory()
         if self._session and not self._session.closed:
             await self._session.close()
+        if self._connector is not None:
+            await _release_connector(self._connector)
+            self._connector = None
 
     async def _is_available(self) -> bool:
-        if self._available is not None:
-            return self._available
-        try:
-            async with self._get_session().get(
-                f"{self._base}/v1/health", timeout=aiohttp.ClientTimeout(total=2)
-            ) as resp:
-                self._available = resp.status == 200
-        except Exception:
-            self._available = False
-        if not self._available:
-            logger.warning(
-                "Redis memory server not reachable at %s — falling back to in-memory", self._base
-            )
-        return self._available
+        """True when calls should go to the server; never waits while the circuit is open."""
+        health = self._health
+        if health.state == ServerHealth.UP:
+            return True
+        if not health.probe_due():
+            return False
+        async with self._probe_lock:  # one probe at a time
+            if health.state == ServerHealth.UP or not health.probe_due():
+                return health.state == ServerHealth.UP
+            try:
+                async with self._get_session().get(
+                    f"{self._base}/v1/health",
+                    timeout=aiohttp.ClientTimeout(total=self._timeouts.get("health", 2.0)),
+                ) as resp:
+                    ok = resp.status == 200
+            except Exception:
+                ok = False
+            if ok:
+                health.record_success()
+            else:
+                health.record_failure()
+                logger.warning(
+                    "Redis memory server not reachable at %s — falling back to in-memory", self._base
+                )
+            return health.state == ServerHealth.UP
 
     # ------------------------------------------------------------------
     # Working Memory (session-scoped, shared across all agents)
     # ------------------------------------------------------------------
 
-    async def get_working_memory(self) -> Dict[str, Any]:
-        """Retrieve the current session's working memory."""
-        if not await self._is_available():
-            return {}
+    async def get_working_memory(self, refresh: bool = False) -> Dict[str, Any]:
+        """
+        The session's working memory, including appends not yet flushed.
+
+        Served from the local mirror; `refresh=True` re-reads the server.
+        """
+        if (self._wm is None or refresh) and await self._is_available():
+            await self._load_working_memory()
+        base = self._wm or {}
+        if not self._wm_pending:
+            return dict(base)
+        return {**base, "messages": list(base.get("messages", [])) + self._wm_pending}
+
+    async def _load_working_memory(self) -> None:
         try:
-            async with self._get_session().get(
-                f"{self._base}/v1/working-memory/{self.session_id}"
+            async with self._request(
+                "GET", f"/v1/working-memory/{self.session_id}", "get_working_memory"
             ) as resp:
                 if resp.status == 404:
-                    return {}
+                    self._wm, self._wm_etag = {}, None
+                    return
                 resp.raise_for_status()
-                return await resp.json()
+                self._wm = await resp.json()
+                self._wm_etag = resp.headers.get("ETag")
         except Exception as exc:
             logger.warning("get_working_memory error: %s", exc)
-            return {}
+
+    async def _put_working_memory(
+        self, body: Dict[str, Any], if_match: Optional[str] = None
+    ) -> Tuple[int, Optional[Dict[str, Any]], Optional[str]]:
+        """PUT the session's working memory → (status, response body, ETag)."""
+        headers = {"If-Match": if_match} if if_match else None
+        async with self._request(
+            "PUT", f"/v1/working-memory/{self.session_id}", "set_working_memory",
+            json=body,
+            headers=headers,
+        ) as resp:
+            if resp.status >= 400:
+                return resp.status, None, None
+            try:
+                data = await resp.json()
+            except Exception:
+                data = None
+            return resp.status, data if isinstance(data, dict) else None, resp.headers.get("ETag")
+
+    def _working_memory_body(self, messages: List[Dict[str, str]], context: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "messages": messages,
+            "context": context or (self._wm or {}).get("context") or f"Project: {self.project_id}",
+            "window_token_limit": self._window_token_limit,
+            "token_ttl_seconds": self._ttl,
+        }
 
     async def set_working_memory(
         self,
@@ -180,44 +389,113 @@ class RedisMemoryManager:
         """
         if not await self._is_available():
             return False
-        body: Dict[str, Any] = {
-            "messages": messages,
-            "context": context or f"Project: {self.project_id}",
-            "window_token_limit": self._window_token_limit,
-            "token_ttl_seconds": self._ttl,
-        }
+        body = self._working_memory_body(messages, context or f"Project: {self.project_id}")
         if structured:
             body["structured"] = structured
 
-        try:
-            async with self._get_session().put(
-                f"{self._base}/v1/working-memory/{self.session_id}",
-                json=body,
-            ) as resp:
-                resp.raise_for_status()
-                return True
-        except Exception as exc:
-            logger.warning("set_working_memory error: %s", exc)
-            return False
+        async with self._wm_lock:
+            try:
+                status, data, etag = await self._put_working_memory(body)
+            except Exception as exc:
+                logger.warning("set_working_memory error: %s", exc)
+                return False
+            if status >= 400:
+                logger.warning("set_working_memory error: HTTP %d", status)
+                return False
+            # An explicit replace supersedes anything queued before it
+            self._wm = data if data and "messages" in data else body
+            self._wm_etag = etag
+            self._wm_pending.clear()
+            return True
 
     async def append_to_working_memory(
         self, role: str, content: str
     ) -> bool:
-        """Append a single turn to working memory (reads then writes)."""
-        current = await self.get_working_memory()
-        messages = current.get("messages", [])
-        messages.append({"role": role, "content": content})
-        return await self.set_working_memory(messages)
+        """
+        Queue a single turn for working memory.  No network round trip: the
+        message is visible to `get_working_memory()` at once and is sent by
+        the next `flush_working_memory()` (or after `flush_interval` seconds).
+        Returns False when the queue was full and its oldest message dropped.
+        """
+        self._wm_pending.append({"role": role, "content": content})
+        if self._flush_interval > 0 and self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self._flush_interval, self._flush_soon)
+        if len(self._wm_pending) <= self._max_pending:
+            return True
+        excess = len(self._wm_pending) - self._max_pending
+        del self._wm_pending[:excess]
+        if self.dropped_appends == 0:
+            logger.warning(
+                "Working memory for %s: %d appends queued — dropping the oldest",
+                self.session_id, self._max_pending,
+            )
+        self.dropped_appends += excess
+        return False
+
+    def _flush_soon(self) -> None:
+        self._flush_handle = None
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush_working_memory())
+
+    async def flush_working_memory(self) -> bool:
+        """
+        Send all queued appends in one request.
+
+        Optimistic concurrency: the PUT carries `If-Match` with the ETag of
+        the mirrored state.  If another writer got there first (409/412),
+        the mirror is reloaded and the queued messages are rebased onto it.
+        Without an ETag there is nothing to guard on, so the mirror is
+        re-read immediately before the PUT.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        async with self._wm_lock:
+            if not self._wm_pending:
+                return True
+            if not await self._is_available():
+                return False
+            for _ in range(_MAX_FLUSH_ATTEMPTS):
+                if self._wm is None or self._wm_etag is None:
+                    await self._load_working_memory()
+                pending = list(self._wm_pending)
+                messages = list((self._wm or {}).get("messages", [])) + pending
+                body = self._working_memory_body(messages)
+                try:
+                    status, data, etag = await self._put_working_memory(body, if_match=self._wm_etag)
+                except Exception as exc:
+                    logger.warning("flush_working_memory error: %s", exc)
+                    return False
+                if status in (409, 412):
+                    await self._load_working_memory()  # rebase onto the winner
+                    continue
+                if status >= 400:
+                    logger.warning("flush_working_memory error: HTTP %d", status)
+                    return False
+                self._wm = data if data and "messages" in data else body
+                self._wm_etag = etag
+                # Appends that arrived during the PUT stay queued
+                del self._wm_pending[:len(pending)]
+                return True
+            logger.warning(
+                "flush_working_memory: gave up after %d version conflicts", _MAX_FLUSH_ATTEMPTS
+            )
+            return False
 
     async def clear_working_memory(self) -> bool:
         """Delete the entire session working memory."""
         if not await self._is_available():
             return False
         try:
-            async with self._get_session().delete(
-                f"{self._base}/v1/working-memory/{self.session_id}"
+            async with self._request(
+                "DELETE", f"/v1/working-memory/{self.session_id}", "clear_working_memory"
             ) as resp:
-                return resp.status in (200, 204, 404)
+                if resp.status in (200, 204, 404):
+                    self._wm, self._wm_etag = {}, None
+                    self._wm_pending.clear()
+                    return True
+                return False
         except Exception as exc:
             logger.warning("clear_working_memory error: %s", exc)
             return False
@@ -250,8 +528,8 @@ class RedisMemoryManager:
             namespace=self.project_id,
         )
         try:
-            async with self._get_session().post(
-                f"{self._base}/v1/long-term-memory/",
+            async with self._request(
+                "POST", "/v1/long-term-memory/", "add_long_term",
                 json={"memories": [record.to_dict()]},
             ) as resp:
                 resp.raise_for_status()
@@ -267,8 +545,8 @@ class RedisMemoryManager:
         if not await self._is_available() or not records:
             return []
         try:
-            async with self._get_session().post(
-                f"{self._base}/v1/long-term-memory/",
+            async with self._request(
+                "POST", "/v1/long-term-memory/", "add_long_term",
                 json={"memories": [r.to_dict() for r in records]},
             ) as resp:
                 resp.raise_for_status()
@@ -319,9 +597,7 @@ class RedisMemoryManager:
             body["filters"] = {"conditions": filters}
 
         try:
-            async with self._get_session().post(
-                f"{self._base}/v1/long-term-memory/search", json=body
-            ) as resp:
+            async with self._request("POST", "/v1/long-term-memory/search", "search", json=body) as resp:
                 resp.raise_for_status()
                 data = await resp.json()
                 results = []
@@ -346,8 +622,8 @@ class RedisMemoryManager:
         if not await self._is_available():
             return False
         try:
-            async with self._get_session().delete(
-                f"{self._base}/v1/long-term-memory",
+            async with self._request(
+                "DELETE", "/v1/long-term-memory", "delete_long_term",
                 json={"memory_ids": memory_ids},
             ) as resp:
                 return resp.status in (200, 204)
@@ -387,9 +663,7 @@ class RedisMemoryManager:
             body["topics"] = topics
 
         try:
-            async with self._get_session().post(
-                f"{self._base}/v1/memory/prompt", json=body
-            ) as resp:
+            async with self._request("POST", "/v1/memory/prompt", "hydrate_prompt", json=body) as resp:
                 resp.raise_for_status()
                 data = await resp.json()
                 return data.get("prompt", "")
@@ -417,10 +691,19 @@ class RedisMemoryManager:
 
     async def enrich_system_prompt(self, base_prompt: str, query: str) -> str:
         """Prepend relevant memory context to a system prompt."""
-        context = await self.hydrate_prompt(query)
+        return self.apply_context(base_prompt, await self.hydrate_prompt(query))
+
+    @staticmethod
+    def apply_context(base_prompt: str, context: str) -> str:
+        """Wrap hydrated memory `context` into `base_prompt` (unchanged if empty)."""
         if not context:
             return base_prompt
-        return f"{base_prompt}\n\n--- Memory Context ---\n{context}\n--- End Context ---"
+        return f"{base_prompt}\n\n{RedisMemoryManager.context_block(context)}"
+
+    @staticmethod
+    def context_block(context: str) -> str:
+        """Hydrated memory `context` as a delimited block for a per-turn context slot."""
+        return f"--- Memory Context ---\n{context}\n--- End Context ---"
 
     def __repr__(self) -> str:
         return (
@@ -429,6 +712,110 @@ class RedisMemoryManager:
         )
 
 
+class MemoryWriteBatcher:
+    """
+    Moves post-turn memory writes off the request path.
+
+    `submit()` queues a long-term record and `request_flush()` marks working
+    memory dirty; both return at once.  A background task wakes, waits
+    `flush_interval` seconds for more writes to pile up, then sends one
+    `flush_working_memory()` and one `add_long_term_batch()` per batch.
+
+    Usage::
+
+        writer = MemoryWriteBatcher(mem)
+        writer.submit("Q: ...\nA: ...", agent_id="analyst", memory_type="conversation")
+        writer.request_flush()
+        ...
+        await writer.close()   # drains everything still queued
+
+    Writes submitted after `close()` raise `RuntimeError` rather than being
+    queued for a task that will never send them.
+    """
+
+    def __init__(
+        self,
+        memory: RedisMemoryManager,
+        batch_size: int = 50,
+        flush_interval: float = 0.2,
+    ) -> None:
+        self._memory = memory
+        self._batch_size = max(1, batch_size)
+        self._flush_interval = flush_interval
+        self._records: List[MemoryRecord] = []
+        self._flush_wm = False
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    @property
+    def pending(self) -> int:
+        return len(self._records) + int(self._flush_wm)
+
+    def submit(
+        self,
+        text: str,
+        agent_id: Optional[str] = None,
+        memory_type: str = "semantic",
+        topics: Optional[List[str]] = None,
+    ) -> None:
+        self._check_open()
+        self._records.append(MemoryRecord(
+            text=text,
+            memory_type=memory_type,
+            topics=topics or [],
+            agent_id=agent_id,
+            session_id=self._memory.session_id,
+            namespace=self._memory.project_id,
+        ))
+        self._kick()
+
+    def request_flush(self) -> None:
+        self._check_open()
+        self._flush_wm = True
+        self._kick()
+
+    def _check_open(self) -> None:
+        if self._closed:
+            raise RuntimeError("MemoryWriteBatcher is closed")
+
+    def _kick(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        self._wake.set()
+
+    async def _run(self) -> None:
+        while not self._closed:
+            await self._wake.wait()
+            self._wake.clear()
+            if self._flush_interval > 0 and len(self._records) < self._batch_size:
+                await asyncio.sleep(self._flush_interval)  # let the batch fill
+            await self.drain()
+
+    async def drain(self) -> None:
+        """Send everything queued so far."""
+        if self._flush_wm:
+            self._flush_wm = False
+            try:
+                await self._memory.flush_working_memory()
+            except Exception as exc:
+                logger.warning("Background working-memory flush failed: %s", exc)
+        while self._records:
+            batch = self._records[:self._batch_size]
+            del self._records[:self._batch_size]
+            try:
+                await self._memory.add_long_term_batch(batch)
+            except Exception as exc:
+                logger.warning("Background long-term write of %d records failed: %s", len(batch), exc)
+
+    async def close(self) -> None:
+        self._closed = True
+        self._wake.set()
+        if self._task is not None:
+            await self._task  # finishes its current batch, then exits
+        await self.drain()
+
+
 class SharedSessionMemory:
     """
     Context manager that wraps RedisMemoryManager for a runtime session.
@@ -0,0 +1,354 @@
+"""Write-behind replication of memories to Weaviate.
+
+`MemoryManager.store()` must not wait on Weaviate: it hands the object to a
+`WeaviateReplicator` and returns.  A daemon thread drains the queue in
+batches through the Weaviate batch API (`insert_many`).
+
+Failure handling:
+
+  • A failed batch is retried with capped exponential backoff and jitter.
+  • After `max_attempts` consecutive failures Weaviate is treated as down:
+    the worker thread appends the batch and everything queued behind it to
+    a local JSONL journal, and keeps spilling new writes there while it
+    backs off.  `enqueue()` itself only touches memory.
+  • Each retry first replays the journal.  When the replay succeeds the
+    journal is truncated and normal batching resumes.  A journal left over
+    from a previous process is replayed on start.
+  • Without a journal (`journal_path=None`, the default) nothing is
+    durable: once `max_queue` writes are waiting, new ones are dropped.
+
+Every object carries a deterministic UUID (project + key), so replaying a
+batch that partly landed overwrites rather than duplicates.
+
+`on_replicated(properties_list)` is called on the worker thread after each
+batch Weaviate accepts, so readers can drop results cached before the write
+was visible.
+
+Metrics (process-wide registry, labelled by project):
+`oflo_memory_replication_lag_seconds` is the age of the oldest unreplicated
+write; `oflo_memory_replication_pending` counts queued plus journalled writes.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from oflo_agent_protocol.audit.metrics import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+_UUID_NAMESPACE = uuid.UUID("6f1c0a3e-2b7d-5c43-9e5a-0f10a9e7d001")
+
+# (enqueued_at wall-clock seconds, weaviate properties)
+_Item = Tuple[float, Dict[str, Any]]
+
+
+def object_uuid(project_id: str, key: str) -> str:
+    """Stable Weaviate object id for a memory key."""
+    return str(uuid.uuid5(_UUID_NAMESPACE, f"{project_id}:{key}"))
+
+
+class _Journal:
+    """Append-only JSONL spill file: one `{"t": enqueued_at, "obj": {...}}` per line."""
+
+    def __init__(self, path: str) -> None:
+        self.path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.count = 0
+        self.oldest: Optional[float] = None
+        for t, _ in self.read():
+            self.count += 1
+            if self.oldest is None:
+                self.oldest = t
+
+    def append(self, items: List[_Item]) -> None:
+        if not items:
+            return
+        with open(self.path, "a", encoding="utf-8") as fh:
+            for t, obj in items:
+                fh.write(json.dumps({"t": t, "obj": obj}, default=str) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        if self.oldest is None:
+            self.oldest = items[0][0]
+        self.count += len(items)
+
+    def read(self) -> List[_Item]:
+        items: List[_Item] = []
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # torn final line from a crash mid-append
+                    items.append((float(rec["t"]), rec["obj"]))
+        except FileNotFoundError:
+            pass
+        return items
+
+    def rewrite(self, items: List[_Item]) -> None:
+        """Atomically replace the journal with `items` (empty → delete)."""
+        if not items:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.count, self.oldest = 0, None
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            for t, obj in items:
+                fh.write(json.dumps({"t": t, "obj": obj}, default=str) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.path)
+        self.count, self.oldest = len(items), items[0][0]
+
+
+class WeaviateReplicator:
+    """
+    Background, batching writer for the `OfloMemory` collection.
+
+    `client` is a connected `weaviate.WeaviateClient` (or anything exposing
+    `collections.get(name).data.insert_many(objects)`).
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        project_id: str,
+        collection: str = "OfloMemory",
+        journal_path: Optional[str] = None,
+        batch_size: int = 100,
+        flush_interval: float = 0.5,
+        max_queue: int = 10_000,
+        max_attempts: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        on_replicated: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    ) -> None:
+        self._client = client
+        self.project_id = project_id
+        self._collection = collection
+        self._journal = _Journal(journal_path) if journal_path else None
+        self._batch_size = max(1, batch_size)
+        self._flush_interval = flush_interval
+        self._max_queue = max_queue
+        self._max_attempts = max(1, max_attempts)
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._queue: Deque[_Item] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._failures = 0
+        self._thread: Optional[threading.Thread] = None
+        self.replicated = 0
+        self.dropped = 0
+        self.on_replicated = on_replicated
+
+        reg = get_metrics_registry()
+        self._lag_gauge = reg.gauge(
+            "oflo_memory_replication_lag_seconds",
+            "Age of the oldest memory write not yet in Weaviate",
+            ["project"],
+        )
+        self._lag_gauge.set_function(self.lag_seconds, project_id)
+        self._pending_gauge = reg.gauge(
+            "oflo_memory_replication_pending",
+            "Memory writes queued or journalled for Weaviate",
+            ["project"],
+        )
+        self._pending_gauge.set_function(self.pending, project_id)
+
+        if self._journal is not None and self._journal.count:
+            logger.info("Replaying %d journalled memory writes", self._journal.count)
+            self._start_worker()
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+
+    @property
+    def is_down(self) -> bool:
+        """True while writes are being spilled to the journal."""
+        return self._journal is not None and self._journal.count > 0
+
+    def enqueue(self, key: str, properties: Dict[str, Any]) -> bool:
+        """
+        Queue one object for replication; never blocks on the network or
+        the disk (the worker thread does the journalling).  False if dropped.
+        """
+        item = (time.time(), {"uuid": object_uuid(self.project_id, key), "properties": properties})
+        with self._lock:
+            if self._journal is None and len(self._queue) >= self._max_queue:
+                self.dropped += 1
+                logger.warning("Weaviate replication queue full — dropping write %s", key)
+                return False
+            self._queue.append(item)
+            queued = len(self._queue)
+        if self._thread is None:
+            self._start_worker()
+        if queued >= self._batch_size or queued >= self._max_queue or self.is_down:
+            self._wakeup.set()
+        return True
+
+    def lag_seconds(self) -> float:
+        oldest = None
+        if self._journal is not None and self._journal.oldest is not None:
+            oldest = self._journal.oldest
+        elif self._queue:
+            oldest = self._queue[0][0]
+        return max(0.0, time.time() - oldest) if oldest is not None else 0.0
+
+    def pending(self) -> int:
+        return len(self._queue) + (self._journal.count if self._journal is not None else 0)
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _start_worker(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="oflo-weaviate-replicator", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            if not self.flush():
+                self._back_off()
+
+    def _back_off(self) -> None:
+        # Wakeups during the backoff only spill to the journal; they must not
+        # cut the wait short and hammer Weaviate with retries.
+        deadline = time.monotonic() + self._backoff_delay()
+        while not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if self._wakeup.wait(remaining):
+                self._wakeup.clear()
+                with self._flush_lock:
+                    if self.is_down or len(self._queue) >= self._max_queue:
+                        self._spill()
+
+    def _backoff_delay(self) -> float:
+        delay = min(self._backoff_max, self._backoff_base * (2 ** max(0, self._failures - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def flush(self) -> bool:
+        """
+        Replay the journal, then drain the queue.  Blocking; returns False if
+        Weaviate rejected a batch (the caller should back off).
+        """
+        with self._flush_lock:
+            return self._flush()
+
+    def _flush(self) -> bool:
+        if len(self._queue) >= self._max_queue:
+            self._spill()  # keep memory bounded while Weaviate is slow
+        if self.is_down and not self._replay():
+            self._spill()
+            return False
+        while self._queue:
+            with self._lock:
+                batch = [self._queue.popleft() for _ in range(min(self._batch_size, len(self._queue)))]
+            try:
+                self._write(batch)
+            except Exception as exc:
+                self._failures += 1
+                logger.warning(
+                    "Weaviate batch of %d failed (attempt %d): %s", len(batch), self._failures, exc
+                )
+                with self._lock:
+                    self._queue.extendleft(reversed(batch))
+                if self._failures >= self._max_attempts:
+                    self._spill()  # down: move the batch and its backlog to disk, in order
+                return False
+        return True
+
+    def _spill(self) -> None:
+        """Move the whole queue to the journal.  Caller holds `_flush_lock`."""
+        if self._journal is None:
+            return
+        with self._lock:
+            items = list(self._queue)
+            self._queue.clear()
+        # Outside `_lock`: enqueue() must not wait on an fsync.
+        self._journal.append(items)
+
+    def _replay(self) -> bool:
+        # The journal is only touched under `_flush_lock`, which the caller holds.
+        assert self._journal is not None
+        items = self._journal.read()
+        done = 0
+        try:
+            for start in range(0, len(items), self._batch_size):
+                self._write(items[start:start + self._batch_size])
+                done = start + self._batch_size
+        except Exception as exc:
+            self._failures += 1
+            logger.warning("Weaviate journal replay failed (attempt %d): %s", self._failures, exc)
+            return False
+        finally:
+            if done:
+                self._journal.rewrite(items[done:])
+        logger.info("Replayed %d journalled memory writes to Weaviate", len(items))
+        return True
+
+    def _write(self, batch: List[_Item]) -> None:
+        objects = [self._data_object(obj) for _, obj in batch]
+        col = self._client.collections.get(self._collection)
+        result = col.data.insert_many(objects)
+        # Per-object errors are validation failures, not outages: log and move on.
+        errors = getattr(result, "errors", None) or {}
+        for index, error in errors.items():
+            logger.warning("Weaviate rejected memory object %s: %s", index, error)
+        self._failures = 0
+        self.replicated += len(batch) - len(errors)
+        if self.on_replicated is not None:
+            try:
+                self.on_replicated([obj["properties"] for _, obj in batch])
+            except Exception:
+                logger.exception("on_replicated callback failed")
+
+    @staticmethod
+    def _data_object(obj: Dict[str, Any]) -> Any:
+        try:
+            from weaviate.classes.data import DataObject
+        except ImportError:
+            return obj
+        return DataObject(properties=obj["properties"], uuid=obj["uuid"])
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Stop the worker after a final flush; leftovers go to the journal."""
+        self._lag_gauge.remove_function(self.lag_seconds, self.project_id)
+        self._pending_gauge.remove_function(self.pending, self.project_id)
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._queue and not self.flush():
+            with self._flush_lock:
+                if self._journal is not None:
+                    self._spill()
+                    return
+                with self._lock:
+                    leftovers = len(self._queue)
+                    self._queue.clear()
+                self.dropped += leftovers
+                logger.warning("Dropping %d unreplicated memory writes", leftovers)
@@ -0,0 +1,535 @@
+"""Embedded approximate-nearest-neighbour index for agent memory.
+
+IVF-flat over one contiguous float32 matrix — no external service:
+
+  • Vectors live in a single `(capacity, dim)` float32 array, grown by
+    doubling.  Cosine vectors are normalised on insert so every search is a
+    plain matrix–vector product.
+  • Below `train_threshold` vectors the index is exact (brute force).  Past
+    it, spherical k-means picks `nlist` centroids and each vector is filed
+    under its nearest one; a search only scans the `nprobe` closest lists.
+    The index retrains itself whenever it has grown 4x since the last
+    training.  `add()` never trains inline: k-means runs on a background
+    thread over a snapshot of the matrix, and only the swap of centroids
+    and lists takes the lock.  Until it lands, searches use the previous
+    lists (or stay exact).  `train()` does the same work synchronously.
+  • Deletes set a tombstone; the matrix is compacted once half of it is dead.
+  • agent_id / memory_type filters are integer-coded columns, applied as
+    vectorised masks over the candidate rows.  If a selective filter leaves
+    fewer than `k` candidates, more lists are probed.
+  • `save()` writes plain `.npy` files; `load(mmap=True)` memory-maps the
+    matrix so a large index opens instantly and pages in on demand.
+
+Requires NumPy (`pip install oflo-ai-agent-protocol[vector]`).
+
+Usage::
+
+    index = VectorIndex(dim=384)
+    index.add("k1", embedding, agent_id="abc", memory_type="semantic")
+    for key, score in index.search(query_embedding, k=10, agent_id="abc"):
+        ...
+    index.save("/var/lib/oflo/memory-index")
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_NO_CODE = -1
+
+
+class _Codes:
+    """Interns label strings (agent ids, memory types) to small ints."""
+
+    def __init__(self, names: Optional[List[str]] = None) -> None:
+        self.names: List[str] = list(names or [])
+        self._codes: Dict[str, int] = {n: i for i, n in enumerate(self.names)}
+
+    def code(self, name: str) -> int:
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def lookup(self, name: str) -> int:
+        return self._codes.get(name, _NO_CODE)
+
+
+class VectorIndex:
+    """IVF-flat ANN index with tombstone deletes and label filters."""
+
+    _CATCH_UP_ROWS = 4096  # rows added during training that are filed under the lock
+
+    def __init__(
+        self,
+        dim: int,
+        metric: str = "cosine",
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        train_threshold: int = 4096,
+        initial_capacity: int = 1024,
+    ) -> None:
+        if metric not in ("cosine", "ip"):
+            raise ValueError(f"Unsupported metric {metric!r} (use 'cosine' or 'ip')")
+        self.dim = dim
+        self.metric = metric
+        self.nprobe = nprobe
+        self._nlist_override = nlist
+        self._train_threshold = train_threshold
+        self._lock = threading.RLock()
+
+        cap = max(1, initial_capacity)
+        self._vectors = np.zeros((cap, dim), dtype=np.float32)
+        self._alive = np.zeros(cap, dtype=bool)
+        self._agents = np.full(cap, _NO_CODE, dtype=np.int32)
+        self._types = np.full(cap, _NO_CODE, dtype=np.int32)
+        self._assign = np.full(cap, _NO_CODE, dtype=np.int32)
+        self._n = 0          # rows used (alive + tombstoned)
+        self._dead = 0
+        self._keys: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._agent_codes = _Codes()
+        self._type_codes = _Codes()
+
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        self._list_len: List[int] = []
+        self._trained_at = 0
+        self._training: Optional[threading.Thread] = None
+        self._epoch = 0      # bumped by compact(); invalidates in-flight training
+
+    # ------------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._rows
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    # ------------------------------------------------------------------
+    # Mutation
+    # ------------------------------------------------------------------
+
+    def add(
+        self,
+        key: str,
+        vector: Sequence[float],
+        agent_id: str = "",
+        memory_type: str = "episodic",
+    ) -> None:
+        """Insert (or replace) the vector stored under `key`."""
+        vec = self._prepare(vector)
+        with self._lock:
+            if key in self._rows:
+                self._tombstone(self._rows.pop(key))
+            self._ensure_capacity(self._n + 1)
+            row = self._n
+            self._vectors[row] = vec
+            self._alive[row] = True
+            self._agents[row] = self._agent_codes.code(agent_id)
+            self._types[row] = self._type_codes.code(memory_type)
+            self._keys.append(key)
+            self._rows[key] = row
+            self._n += 1
+            if self._centroids is not None:
+                lst = int(np.argmax(self._centroids @ vec))
+                self._assign[row] = lst
+                self._append_to_list(lst, row)
+
+            self._maybe_start_training()
+
+    def remove(self, key: str) -> bool:
+        with self._lock:
+            row = self._rows.pop(key, None)
+            if row is None:
+                return False
+            self._tombstone(row)
+            self._maybe_compact()
+            return True
+
+    def remove_agent(self, agent_id: str) -> int:
+        """Tombstone every vector belonging to `agent_id`."""
+        with self._lock:
+            code = self._agent_codes.lookup(agent_id)
+            if code == _NO_CODE:
+                return 0
+            rows = np.flatnonzero(self._alive[: self._n] & (self._agents[: self._n] == code))
+            for row in rows.tolist():
+                key = self._keys[row]
+                if key is not None:
+                    del self._rows[key]
+                self._tombstone(row)
+            self._maybe_compact()
+            return len(rows)
+
+    def _tombstone(self, row: int) -> None:
+        self._alive[row] = False
+        self._keys[row] = None
+        self._dead += 1
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def search(
+        self,
+        vector: Sequence[float],
+        k: int = 10,
+        agent_id: Optional[str] = None,
+        memory_type: Optional[str] = None,
+        nprobe: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """Return up to `k` (key, score) pairs, best first."""
+        if k <= 0:
+            return []
+        q = self._prepare(vector)
+        with self._lock:
+            if not self._rows:
+                return []
+            agent_code = memory_code = None
+            if agent_id is not None:
+                agent_code = self._agent_codes.lookup(agent_id)
+                if agent_code == _NO_CODE:
+                    return []
+            if memory_type is not None:
+                memory_code = self._type_codes.lookup(memory_type)
+                if memory_code == _NO_CODE:
+                    return []
+
+            if self._centroids is None:
+                rows = self._filter(np.arange(self._n), agent_code, memory_code)
+            else:
+                nlist = len(self._lists)
+                probe = min(nprobe or self.nprobe, nlist)
+                order = np.argsort(-(self._centroids @ q))
+                while True:
+                    candidates = [self._lists[i][: self._list_len[i]] for i in order[:probe]]
+                    rows = self._filter(np.concatenate(candidates), agent_code, memory_code)
+                    if len(rows) >= k or probe >= nlist:
+                        break
+                    probe = min(probe * 4, nlist)  # selective filter — widen
+
+            if not len(rows):
+                return []
+            scores = self._vectors[rows] @ q
+            if len(rows) > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+            else:
+                top = np.arange(len(rows))
+            top = top[np.argsort(-scores[top], kind="stable")]
+            keys = self._keys
+            return [(keys[int(rows[i])], float(scores[i])) for i in top]  # type: ignore[misc]
+
+    def _filter(
+        self, rows: np.ndarray, agent_code: Optional[int], memory_code: Optional[int]
+    ) -> np.ndarray:
+        mask = self._alive[rows]
+        if agent_code is not None:
+            mask &= self._agents[rows] == agent_code
+        if memory_code is not None:
+            mask &= self._types[rows] == memory_code
+        return rows[mask]
+
+    # ------------------------------------------------------------------
+    # IVF training
+    # ------------------------------------------------------------------
+
+    def train(self) -> None:
+        """(Re)build the coarse quantiser now, regardless of thresholds."""
+        with self._lock:
+            if not self._rows:
+                return
+            snapshot = self._snapshot()
+        self._train(*snapshot)
+
+    def wait_for_training(self, timeout: Optional[float] = None) -> bool:
+        """Block until background training finishes; False if `timeout` expires first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                thread = self._training
+            if thread is None:
+                return True
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+            if thread.is_alive():
+                return False
+
+    def _snapshot(self) -> Tuple[np.ndarray, np.ndarray, int, int]:
+        # Rows below `_n` are never rewritten in place (adds append, compact()
+        # builds new arrays), so the current matrix can be read without a copy.
+        return self._vectors, np.flatnonzero(self._alive[: self._n]), self._n, self._epoch
+
+    def _maybe_start_training(self) -> None:
+        live = len(self._rows)
+        if self._centroids is None and live >= self._train_threshold:
+            self._start_training()
+        elif self._centroids is not None and live >= 4 * self._trained_at:
+            self._start_training()
+
+    def _start_training(self) -> None:
+        if self._training is not None:
+            return
+        self._training = threading.Thread(
+            target=self._train_in_background,
+            args=self._snapshot(),
+            name="vector-index-train",
+            daemon=True,
+        )
+        self._training.start()
+
+    def _train_in_background(self, *snapshot: object) -> None:
+        try:
+            self._train(*snapshot)  # type: ignore[arg-type]
+        except Exception:
+            logger.exception("VectorIndex background training failed")
+            with self._lock:
+                self._training = None
+            return
+        with self._lock:
+            self._training = None
+            self._maybe_start_training()  # grew past the next step while this ran
+
+    def _train(self, vectors: np.ndarray, live: np.ndarray, n_rows: int, epoch: int) -> None:
+        centroids = self._kmeans(vectors, live)
+        rows, assign = [live], [self._nearest(vectors, centroids, live)]
+        while True:
+            with self._lock:
+                if epoch != self._epoch:
+                    logger.debug("VectorIndex compacted during training — result discarded")
+                    return
+                if self._n - n_rows <= self._CATCH_UP_ROWS:
+                    self._install(centroids, rows, assign, n_rows, len(live))
+                    break
+                vectors, end = self._vectors, self._n
+            # Many rows arrived while training ran — file them off-lock too.
+            newer = np.arange(n_rows, end)
+            rows.append(newer)
+            assign.append(self._nearest(vectors, centroids, newer))
+            n_rows = end
+        logger.debug("VectorIndex trained: %d vectors, %d lists", len(live), len(centroids))
+
+    def _install(
+        self,
+        centroids: np.ndarray,
+        rows: List[np.ndarray],
+        assign: List[np.ndarray],
+        n_rows: int,
+        trained_at: int,
+    ) -> None:
+        self._centroids = centroids
+        self._assign[: self._n] = _NO_CODE
+        self._assign[np.concatenate(rows)] = np.concatenate(assign)
+        if self._n > n_rows:
+            newer = np.arange(n_rows, self._n)
+            self._assign[newer] = self._nearest(self._vectors, centroids, newer)
+        self._rebuild_lists()
+        self._trained_at = trained_at
+
+    def _kmeans(
+        self, vectors: np.ndarray, live: np.ndarray, iterations: int = 10, sample_per_list: int = 32
+    ) -> np.ndarray:
+        n = len(live)
+        nlist = self._nlist_override or max(1, int(2 * np.sqrt(n)))
+        nlist = min(nlist, n)
+        rng = np.random.default_rng(0)
+        sample_rows = live if n <= nlist * sample_per_list else rng.choice(
+            live, nlist * sample_per_list, replace=False
+        )
+        sample = vectors[sample_rows]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = self._nearest(sample, centroids)
+            order = np.argsort(assign, kind="stable")
+            counts = np.bincount(assign, minlength=nlist)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            sums = np.zeros_like(centroids)
+            nonempty = counts > 0
+            sums[nonempty] = np.add.reduceat(sample[order], starts[nonempty], axis=0)
+            empty = counts == 0
+            if empty.any():  # reseed empty lists from random sample points
+                sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+                counts[empty] = 1
+            centroids = sums / counts[:, None]
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            centroids /= np.where(norms == 0, 1, norms)
+        return centroids.astype(np.float32)
+
+    @staticmethod
+    def _nearest(
+        vectors: np.ndarray,
+        centroids: np.ndarray,
+        rows: Optional[np.ndarray] = None,
+        chunk: int = 65536,
+    ) -> np.ndarray:
+        n = len(vectors) if rows is None else len(rows)
+        out = np.empty(n, dtype=np.int32)
+        for start in range(0, n, chunk):
+            block = vectors[start:start + chunk] if rows is None else vectors[rows[start:start + chunk]]
+            out[start:start + chunk] = np.argmax(block @ centroids.T, axis=1)
+        return out
+
+    def _rebuild_lists(self) -> None:
+        assert self._centroids is not None
+        nlist = len(self._centroids)
+        rows = np.flatnonzero(self._alive[: self._n])
+        assign = self._assign[rows]
+        order = np.argsort(assign, kind="stable")
+        rows, assign = rows[order], assign[order]
+        bounds = np.searchsorted(assign, np.arange(nlist + 1))
+        self._lists = []
+        self._list_len = []
+        for i in range(nlist):
+            members = rows[bounds[i]:bounds[i + 1]].astype(np.int64)
+            buf = np.empty(max(16, 2 * len(members)), dtype=np.int64)
+            buf[: len(members)] = members
+            self._lists.append(buf)
+            self._list_len.append(len(members))
+
+    def _append_to_list(self, lst: int, row: int) -> None:
+        n = self._list_len[lst]
+        buf = self._lists[lst]
+        if n == len(buf):
+            grown = np.empty(2 * len(buf), dtype=np.int64)
+            grown[:n] = buf
+            self._lists[lst] = buf = grown
+        buf[n] = row
+        self._list_len[lst] = n + 1
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _prepare(self, vector: Sequence[float]) -> np.ndarray:
+        vec = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if vec.shape[0] != self.dim:
+            raise ValueError(f"Expected a {self.dim}-dim vector, got {vec.shape[0]}")
+        if self.metric == "cosine":
+            norm = float(np.linalg.norm(vec))
+            if norm:
+                vec = vec / norm
+        return vec
+
+    def _ensure_capacity(self, needed: int) -> None:
+        cap = len(self._vectors)
+        if needed <= cap and self._vectors.flags.writeable:
+            return
+        new_cap = max(needed, cap * 2 if needed > cap else cap)
+        self._vectors = _grow(self._vectors, new_cap, 0)
+        self._alive = _grow(self._alive, new_cap, False)
+        self._agents = _grow(self._agents, new_cap, _NO_CODE)
+        self._types = _grow(self._types, new_cap, _NO_CODE)
+        self._assign = _grow(self._assign, new_cap, _NO_CODE)
+
+    def _maybe_compact(self) -> None:
+        if self._dead > 1024 and self._dead * 2 > self._n:
+            self.compact()
+
+    def compact(self) -> None:
+        """Drop tombstoned rows and renumber the rest."""
+        with self._lock:
+            live = np.flatnonzero(self._alive[: self._n])
+            n = len(live)
+            self._vectors = self._vectors[live].copy() if n else np.zeros((1, self.dim), np.float32)
+            self._alive = np.ones(max(n, 1), dtype=bool)
+            self._alive[n:] = False
+            self._agents = self._agents[live].copy() if n else np.full(1, _NO_CODE, np.int32)
+            self._types = self._types[live].copy() if n else np.full(1, _NO_CODE, np.int32)
+            self._assign = self._assign[live].copy() if n else np.full(1, _NO_CODE, np.int32)
+            self._keys = [self._keys[r] for r in live.tolist()]
+            self._rows = {key: i for i, key in enumerate(self._keys)}  # type: ignore[misc]
+            self._n = n
+            self._dead = 0
+            self._epoch += 1
+            if self._centroids is not None:
+                self._rebuild_lists()
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        """Write the index to directory `path` (created if missing)."""
+        with self._lock:
+            if self._dead:
+                self.compact()
+            os.makedirs(path, exist_ok=True)
+            n = self._n
+            np.save(os.path.join(path, "vectors.npy"), self._vectors[:n])
+            np.save(os.path.join(path, "agents.npy"), self._agents[:n])
+            np.save(os.path.join(path, "types.npy"), self._types[:n])
+            np.save(os.path.join(path, "assign.npy"), self._assign[:n])
+            if self._centroids is not None:
+                np.save(os.path.join(path, "centroids.npy"), self._centroids)
+            meta = {
+                "dim": self.dim,
+                "metric": self.metric,
+                "nprobe": self.nprobe,
+                "nlist": self._nlist_override,
+                "train_threshold": self._train_threshold,
+                "trained_at": self._trained_at,
+                "keys": self._keys,
+                "agents": self._agent_codes.names,
+                "types": self._type_codes.names,
+            }
+            tmp = os.path.join(path, "meta.json.tmp")
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(meta, fh)
+            os.replace(tmp, os.path.join(path, "meta.json"))
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "VectorIndex":
+        """Open an index written by `save()`; `mmap=True` maps the matrix lazily."""
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as fh:
+            meta = json.load(fh)
+        index = cls(
+            dim=meta["dim"],
+            metric=meta["metric"],
+            nlist=meta.get("nlist"),
+            nprobe=meta["nprobe"],
+            train_threshold=meta["train_threshold"],
+        )
+        index._agent_codes = _Codes(meta["agents"])
+        index._type_codes = _Codes(meta["types"])
+        if not meta["keys"]:
+            return index
+
+        mode = "r" if mmap else None
+        index._vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode=mode)
+        n = len(index._vectors)
+        index._alive = np.ones(n, dtype=bool)
+        index._agents = np.load(os.path.join(path, "agents.npy"))
+        index._types = np.load(os.path.join(path, "types.npy"))
+        index._assign = np.load(os.path.join(path, "assign.npy"))
+        index._n = n
+        index._keys = list(meta["keys"])
+        index._rows = {key: i for i, key in enumerate(index._keys)}
+        index._trained_at = meta.get("trained_at", 0)
+        centroids_path = os.path.join(path, "centroids.npy")
+        if os.path.exists(centroids_path):
+            index._centroids = np.load(centroids_path)
+            index._rebuild_lists()
+        return index
+
+
+def _grow(arr: np.ndarray, capacity: int, fill: object) -> np.ndarray:
+    shape = (capacity,) + arr.shape[1:]
+    out = np.empty(shape, dtype=arr.dtype)
+    n = min(len(arr), capacity)
+    out[:n] = arr[:n]
+    out[n:] = fill
+    return out
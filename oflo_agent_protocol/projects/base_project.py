@@ -142,15 +142,17 @@ class Project:
         message: str,
         api_key: Optional[str] = None,
     ) -> str:
-        """Send a message to a remote project's A2A endpoint."""
-        from oflo_agent_protocol.protocols.a2a.client import A2AClient
-        async with A2AClient(remote_url, api_key=api_key) as client:
-            task = await client.send_and_wait(message)
-            if task.artifacts:
-                for part in task.artifacts[0].parts:
-                    if hasattr(part, "text"):
-                        return part.text
-            return task.status.message.text if task.status.message else ""
+        """
+        Send a message to a remote project's A2A endpoint.  Uses the pooled
+        client for `remote_url`, so repeated calls share warm connections.
+        """
+        from oflo_agent_protocol.protocols.a2a.client import get_client
+        task = await get_client(remote_url, api_key=api_key).send_and_wait(message)
+        if task.artifacts:
+            for part in task.artifacts[0].parts:
+                if hasattr(part, "text"):
+                    return part.text
+        return task.status.message.text if task.status.message else ""
 
     # ------------------------------------------------------------------
     # Serving
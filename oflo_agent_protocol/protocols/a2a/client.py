@@ -1,23 +1,70 @@
-"""Google A2A client — call remote A2A-compliant agents."""
+"""Google A2A client — call remote A2A-compliant agents.
+
+`get_client(base_url)` returns a process-wide pooled client: one long-lived
+aiohttp session per remote base URL (per event loop) whose connector keeps
+connections alive, caps them per host and caches DNS, so repeated
+cross-project calls reuse warm TCP/TLS connections.  Release them all with
+`close_clients()` at shutdown.  AgentCards fetched by `discover()` are cached
+per base URL for `card_ttl` seconds (or the server's `Cache-Control:
+max-age`).
+
+`send_many()` fans a stream of messages out as JSON-RPC 2.0 batches — one
+POST per `chunk_size` tasks, several batches in flight — instead of one round
+trip per task; `batch()` sends arbitrary JSON-RPC requests the same way.
+
+With a `push.PushReceiver`, `send_and_wait(..., receiver=r)` submits the task
+non-blocking with a webhook and waits for the server to push the result,
+rather than holding a request open or polling `tasks/get`.
+
+aiohttp speaks HTTP/1.1 only, so there is no HTTP/2 multiplexing; concurrent
+calls to one host use parallel keep-alive connections instead.
+"""
 from __future__ import annotations
 
 import asyncio
+import itertools
 import json
 import logging
+import re
+import time
 import uuid
-from typing import Any, AsyncIterator, Dict, Optional
+import weakref
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
 
 import aiohttp
 
+from oflo_agent_protocol.audit.tracing import get_tracer
 from oflo_agent_protocol.protocols.a2a.types import (
     A2AMessage,
     A2ATask,
     AgentCard,
+    PushNotificationConfig,
+    TaskStatusUpdate,
+    jsonrpc_error,
     jsonrpc_request,
+    A2A_ERRORS,
 )
 
 logger = logging.getLogger(__name__)
 
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+# base URL → (expires at, monotonic; card)
+_card_cache: Dict[str, Tuple[float, AgentCard]] = {}
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, Optional[str]], A2AClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+class A2AError(RuntimeError):
+    """JSON-RPC error returned by a remote A2A agent (e.g. -32000 server busy)."""
+
+    def __init__(self, code: int, message: str, data: Any = None) -> None:
+        super().__init__(f"A2A error {code}: {message}")
+        self.code = code
+        self.data = data
+
 
 class A2AClient:
     """
@@ -31,33 +78,56 @@ class A2AClient:
             print(task.artifacts[0].parts[0].text)
     """
 
-    def __init__(self, base_url: str, api_key: Optional[str] = None, timeout: float = 60.0) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        api_key: Optional[str] = None,
+        timeout: float = 60.0,
+        card_ttl: float = 300.0,
+        pooled: bool = False,
+    ) -> None:
         self._base = base_url.rstrip("/")
         self._api_key = api_key
         self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._card_ttl = card_ttl
+        self._pooled = pooled
         self._session: Optional[aiohttp.ClientSession] = None
 
     async def __aenter__(self) -> "A2AClient":
-        self._session = aiohttp.ClientSession(timeout=self._timeout)
+        self._get_session()
         return self
 
     async def __aexit__(self, *_: Any) -> None:
+        if not self._pooled:  # pooled clients outlive the `async with`
+            await self.close()
+
+    async def close(self) -> None:
         if self._session:
             await self._session.close()
+            self._session = None
 
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
 
-    async def discover(self) -> AgentCard:
-        """Fetch the remote agent's AgentCard."""
-        data = await self._get("/.well-known/agent.json")
-        return AgentCard(
-            name=data.get("name", ""),
-            description=data.get("description", ""),
-            url=data.get("url", self._base),
-            version=data.get("version", "1.0.0"),
-        )
+    async def discover(self, refresh: bool = False) -> AgentCard:
+        """The remote agent's AgentCard, from the process-wide cache while fresh."""
+        cached = _card_cache.get(self._base)
+        if cached is not None and not refresh and cached[0] > time.monotonic():
+            return cached[1]
+        session = self._get_session()
+        async with session.get(
+            f"{self._base}/.well-known/agent.json", headers=self._headers()
+        ) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+            max_age = _MAX_AGE_RE.search(resp.headers.get("Cache-Control", ""))
+        if not data.get("url"):
+            data["url"] = self._base
+        card = AgentCard.from_dict(data)
+        ttl = float(max_age.group(1)) if max_age else self._card_ttl
+        _card_cache[self._base] = (time.monotonic() + ttl, card)
+        return card
 
     async def send(
         self,
@@ -65,79 +135,296 @@ class A2AClient:
         session_id: Optional[str] = None,
         task_id: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
+        blocking: bool = True,
+        timeout: Optional[float] = None,
+        push: Optional[PushNotificationConfig] = None,
     ) -> A2ATask:
-        """Send a task and wait for completion."""
-        task_id = task_id or str(uuid.uuid4())
-        payload = jsonrpc_request(
-            "tasks/send",
-            params={
-                "id": task_id,
-                "sessionId": session_id,
-                "message": {
-                    "role": "user",
-                    "parts": [{"type": "text", "text": message}],
-                },
-                "metadata": metadata or {},
-            },
-        )
-        result = await self._post("/", payload)
-        return self._parse_task(result.get("result", {}))
+        """
+        Send a task.  With `blocking=True` the server replies once the task
+        is done; otherwise it replies at once with the `submitted` task.
+        `timeout` overrides the client's request timeout for this call;
+        `push` registers a webhook for the task's status transitions.
+        """
+        params = self._task_params(message, session_id, task_id, metadata)
+        params["configuration"] = {"blocking": blocking}
+        if push is not None:
+            params["pushNotification"] = push.to_dict()
+        result = await self._post("/", jsonrpc_request("tasks/send", params), timeout=timeout)
+        return self._parse_task(self._result(result))
+
+    async def send_many(
+        self,
+        messages: Iterable[str],
+        metadata: Optional[Dict[str, Any]] = None,
+        chunk_size: int = 25,
+        max_in_flight: int = 4,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[A2ATask]:
+        """
+        Send many tasks and yield each one once finished.
+
+        Messages are sent as JSON-RPC batches of `chunk_size` blocking
+        `tasks/send` calls, with up to `max_in_flight` batches pipelined, and
+        `messages` is consumed lazily.  Tasks are yielded batch by batch in
+        completion order, not input order — match them up by `task_id` or
+        `history[0].text`.  A task the server refused (e.g. busy) is yielded
+        as `failed` with the JSON-RPC error in `metadata["error"]`.
+
+        There is no `session_id`: a session's turns run one at a time and
+        share one history, which defeats a fan-out.  Each task gets its own
+        session; use `send()` for a conversation.
+        """
+        it = iter(messages)
+        pending: Set[asyncio.Future] = set()
+
+        def fill() -> None:
+            while len(pending) < max(1, max_in_flight):
+                chunk = list(itertools.islice(it, max(1, chunk_size)))
+                if not chunk:
+                    return
+                pending.add(asyncio.ensure_future(
+                    self._send_chunk(chunk, metadata, timeout)
+                ))
+
+        try:
+            fill()
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                pending.difference_update(done)
+                fill()  # keep the pipeline full while the caller consumes results
+                for fut in done:
+                    for task in fut.result():
+                        yield task
+        finally:
+            for fut in pending:
+                fut.cancel()
+
+    async def batch(
+        self, requests: List[Dict[str, Any]], timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Send JSON-RPC requests in one POST.  Returns one response per request,
+        in request order; per-request errors are left in the responses.
+        """
+        if not requests:
+            return []
+        responses = await self._post("/", requests, timeout=timeout)
+        if isinstance(responses, dict):  # the batch as a whole was rejected
+            self._result(responses)
+        by_id = {r.get("id"): r for r in responses}
+        code, msg = A2A_ERRORS["internal_error"]
+        return [
+            by_id.get(req.get("id")) or jsonrpc_error(code, f"{msg}: no response", req_id=req.get("id"))
+            for req in requests
+        ]
 
     async def get_task(self, task_id: str) -> A2ATask:
         """Get the current state of a task."""
         payload = jsonrpc_request("tasks/get", params={"id": task_id})
         result = await self._post("/", payload)
-        return self._parse_task(result.get("result", {}))
+        return self._parse_task(self._result(result))
 
     async def cancel_task(self, task_id: str) -> A2ATask:
         """Cancel a running task."""
         payload = jsonrpc_request("tasks/cancel", params={"id": task_id})
         result = await self._post("/", payload)
-        return self._parse_task(result.get("result", {}))
+        return self._parse_task(self._result(result))
+
+    async def set_push_notification(
+        self, task_id: str, config: PushNotificationConfig
+    ) -> PushNotificationConfig:
+        """Register a webhook for an existing task (its outcome is pushed at once if done)."""
+        payload = jsonrpc_request(
+            "tasks/pushNotification/set",
+            params={"id": task_id, "pushNotificationConfig": config.to_dict()},
+        )
+        result = self._result(await self._post("/", payload))
+        return PushNotificationConfig.from_dict(result.get("pushNotificationConfig") or {})
+
+    async def get_push_notification(self, task_id: str) -> PushNotificationConfig:
+        payload = jsonrpc_request("tasks/pushNotification/get", params={"id": task_id})
+        result = self._result(await self._post("/", payload))
+        return PushNotificationConfig.from_dict(result.get("pushNotificationConfig") or {})
+
+    async def send_subscribe(
+        self,
+        message: str,
+        session_id: Optional[str] = None,
+        task_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Start a task and stream its status and artifact events as they happen."""
+        params = self._task_params(message, session_id, task_id, metadata)
+        result = await self._post("/", jsonrpc_request("tasks/sendSubscribe", params))
+        async for event in self.stream(self._result(result).get("taskId", params["id"])):
+            yield event
 
-    async def stream(self, task_id: str) -> AsyncIterator[Dict[str, Any]]:
-        """Subscribe to SSE updates for a task."""
+    async def stream(
+        self,
+        task_id: str,
+        last_event_id: Optional[str] = None,
+        idle_timeout: float = 60.0,
+        max_reconnects: int = 3,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Subscribe to SSE updates for a task until its final event.
+
+        A dropped or idle connection (no bytes, heartbeats included, for
+        `idle_timeout` seconds) is resumed with `Last-Event-ID`, so no event
+        is lost or repeated across reconnects.
+        """
         session = self._get_session()
         url = f"{self._base}/tasks/{task_id}/stream"
-        async with session.get(url, headers=self._headers()) as resp:
-            async for line in resp.content:
-                line = line.decode().strip()
-                if line.startswith("data:"):
-                    try:
-                        yield json.loads(line[5:].strip())
-                    except json.JSONDecodeError:
-                        pass
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=idle_timeout)
+        attempts = 0
+        while True:
+            headers = self._headers()
+            if last_event_id:
+                headers["Last-Event-ID"] = last_event_id
+            try:
+                async with session.get(url, headers=headers, timeout=timeout) as resp:
+                    resp.raise_for_status()
+                    async for raw in resp.content:
+                        line = raw.decode().strip()
+                        if line.startswith("id:"):
+                            last_event_id = line[3:].strip()
+                        elif line.startswith("data:"):
+                            try:
+                                event = json.loads(line[5:].strip())
+                            except json.JSONDecodeError:
+                                continue
+                            attempts = 0
+                            yield event
+                            if event.get("final") or "error" in event:
+                                return
+                return  # server closed the stream cleanly
+            except (aiohttp.ClientPayloadError, aiohttp.ServerDisconnectedError, asyncio.TimeoutError) as exc:
+                attempts += 1
+                if attempts > max_reconnects:
+                    raise
+                logger.debug("A2A stream for %s dropped (%s) — resuming after %s", task_id, exc, last_event_id)
 
     async def send_and_wait(
         self,
         message: str,
         poll_interval: float = 0.5,
         timeout: float = 120.0,
+        session_id: Optional[str] = None,
+        receiver: Optional[Any] = None,
     ) -> A2ATask:
-        """Send a task and poll until it completes."""
-        task = await self.send(message)
-        elapsed = 0.0
-        while task.status.state not in ("completed", "failed", "canceled"):
-            await asyncio.sleep(poll_interval)
-            elapsed += poll_interval
-            if elapsed >= timeout:
-                raise TimeoutError(f"A2A task {task.task_id} timed out after {timeout}s")
-            task = await self.get_task(task.task_id)
+        """
+        Send a task and return it once finished.  The send blocks server-side,
+        so a task usually finishes in one round trip on a pooled connection;
+        servers that answer early are polled.  With a `PushReceiver` the send
+        returns at once and the result arrives by webhook instead.  On timeout
+        the remote task is cancelled before `TimeoutError` is raised.
+        """
+        task_id = str(uuid.uuid4())
+        deadline = asyncio.get_running_loop().time() + timeout
+        try:
+            if receiver is not None:
+                return await self._await_push(message, session_id, task_id, receiver, timeout)
+            task = await self.send(message, session_id=session_id, task_id=task_id, timeout=timeout)
+            while not task.is_terminal:
+                if asyncio.get_running_loop().time() >= deadline:
+                    raise asyncio.TimeoutError
+                await asyncio.sleep(poll_interval)
+                task = await self.get_task(task_id)
+        except asyncio.TimeoutError:
+            try:
+                await self.cancel_task(task_id)
+            except (A2AError, aiohttp.ClientError, asyncio.TimeoutError):
+                pass
+            raise TimeoutError(f"A2A task {task_id} timed out after {timeout}s") from None
         return task
 
     # ------------------------------------------------------------------
     # Helpers
     # ------------------------------------------------------------------
 
+    async def _await_push(
+        self,
+        message: str,
+        session_id: Optional[str],
+        task_id: str,
+        receiver: Any,
+        timeout: float,
+    ) -> A2ATask:
+        task = await self.send(
+            message, session_id=session_id, task_id=task_id, blocking=False, push=receiver.config()
+        )
+        if task.is_terminal:
+            return task
+        event = await receiver.wait(task_id, timeout=timeout)
+        if "task" in event:
+            return self._parse_task(event["task"])
+        return await self.get_task(task_id)
+
+    @staticmethod
+    def _task_params(
+        message: str,
+        session_id: Optional[str],
+        task_id: Optional[str],
+        metadata: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        return {
+            "id": task_id or str(uuid.uuid4()),
+            "sessionId": session_id,
+            "message": {
+                "role": "user",
+                "parts": [{"type": "text", "text": message}],
+            },
+            "metadata": metadata or {},
+        }
+
+    async def _send_chunk(
+        self,
+        messages: List[str],
+        metadata: Optional[Dict[str, Any]],
+        timeout: Optional[float],
+    ) -> List[A2ATask]:
+        requests = []
+        for message in messages:
+            params = self._task_params(message, None, None, metadata)
+            params["configuration"] = {"blocking": True}
+            requests.append(jsonrpc_request("tasks/send", params))
+        responses = await self.batch(requests, timeout=timeout)
+        tasks = []
+        for request, response in zip(requests, responses):
+            error = response.get("error")
+            if error:
+                params = request["params"]
+                tasks.append(A2ATask(
+                    task_id=params["id"],
+                    status=TaskStatusUpdate(
+                        state="failed",
+                        message=A2AMessage.text_message(role="agent", text=error.get("message", "")),
+                    ),
+                    history=[A2AMessage.text_message(
+                        role="user", text=params["message"]["parts"][0]["text"]
+                    )],
+                    metadata={"error": error},
+                ))
+            else:
+                tasks.append(self._parse_task(response.get("result", {})))
+        return tasks
+
     def _get_session(self) -> aiohttp.ClientSession:
-        if self._session is None:
-            self._session = aiohttp.ClientSession(timeout=self._timeout)
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=32,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+            )
+            self._session = aiohttp.ClientSession(timeout=self._timeout, connector=connector)
         return self._session
 
     def _headers(self) -> Dict[str, str]:
         h = {"Content-Type": "application/json"}
         if self._api_key:
             h["Authorization"] = f"Bearer {self._api_key}"
+        get_tracer().inject(h)
         return h
 
     async def _get(self, path: str) -> Dict[str, Any]:
@@ -146,46 +433,47 @@ class A2AClient:
             resp.raise_for_status()
             return await resp.json()
 
-    async def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    async def _post(self, path: str, payload: Any, timeout: Optional[float] = None) -> Any:
         session = self._get_session()
-        async with session.post(
-            f"{self._base}{path}", json=payload, headers=self._headers()
-        ) as resp:
-            resp.raise_for_status()
-            return await resp.json()
+        kwargs: Dict[str, Any] = {}
+        if timeout is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+        method = "batch" if isinstance(payload, list) else payload.get("method", "post")
+        with get_tracer().span(f"a2a.client.{method}", peer=self._base):
+            async with session.post(
+                f"{self._base}{path}", json=payload, headers=self._headers(), **kwargs
+            ) as resp:
+                resp.raise_for_status()
+                return await resp.json()
+
+    @staticmethod
+    def _result(response: Dict[str, Any]) -> Dict[str, Any]:
+        error = response.get("error")
+        if error:
+            raise A2AError(error.get("code", 0), error.get("message", ""), error.get("data"))
+        return response.get("result", {})
 
     @staticmethod
     def _parse_task(data: Dict[str, Any]) -> A2ATask:
-        from oflo_agent_protocol.protocols.a2a.types import (
-            A2AMessage, Artifact, TaskStatusUpdate, TextPart
-        )
-        status_data = data.get("status", {})
-        status_msg_data = status_data.get("message")
-        status_msg = None
-        if status_msg_data:
-            status_msg = A2AMessage.text_message(
-                role=status_msg_data.get("role", "agent"),
-                text=" ".join(
-                    p.get("text", "") for p in status_msg_data.get("parts", [])
-                    if isinstance(p, dict)
-                ),
-            )
-        status = TaskStatusUpdate(
-            state=status_data.get("state", "submitted"),
-            message=status_msg,
-            timestamp=status_data.get("timestamp", ""),
-        )
+        return A2ATask.from_dict(data)
 
-        artifacts = []
-        for a in data.get("artifacts", []):
-            parts = [TextPart(text=p.get("text", "")) for p in a.get("parts", []) if isinstance(p, dict)]
-            artifacts.append(
-                Artifact(name=a.get("name", ""), parts=parts, artifact_id=a.get("artifactId", str(uuid.uuid4())))
-            )
 
-        return A2ATask(
-            task_id=data.get("id", str(uuid.uuid4())),
-            session_id=data.get("sessionId"),
-            status=status,
-            artifacts=artifacts,
-        )
+def get_client(base_url: str, api_key: Optional[str] = None, **kwargs: Any) -> A2AClient:
+    """
+    Pooled client for `base_url`, shared by every caller on this event loop.
+    Safe to use in `async with` — leaving the block does not close it.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _clients.setdefault(loop, {})
+    key = (base_url.rstrip("/"), api_key)
+    client = pool.get(key)
+    if client is None:
+        client = pool[key] = A2AClient(base_url, api_key=api_key, pooled=True, **kwargs)
+    return client
+
+
+async def close_clients() -> None:
+    """Close every pooled client on the running loop."""
+    pool = _clients.pop(asyncio.get_running_loop(), {})
+    for client in pool.values():
+        await client.close()
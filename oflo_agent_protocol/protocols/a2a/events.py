@@ -0,0 +1,234 @@
+"""Per-task event bus for A2A streaming (tasks/sendSubscribe, tasks/resubscribe).
+
+Every task gets a broadcast channel.  The server publishes two kinds of
+event as they happen — no polling:
+
+  status    {"id": task_id, "status": {...}, "final": bool}
+  artifact  {"id": task_id, "artifact": {...}}   (token deltas: append=True)
+
+Each event carries a monotonically increasing per-task id, written as the SSE
+`id:` field.  A channel keeps a bounded replay buffer, so a client that
+reconnects with `Last-Event-ID` receives exactly the events it missed, and a
+late subscriber sees the task from the start.  Channels are kept for
+`retention` seconds after their final event so reconnects still work; the
+bus also bounds idle channels and the total number of buffered events.
+
+Subscribers get `None` after `heartbeat` seconds without an event; the SSE
+layer turns that into a comment frame to keep proxies from closing the stream.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from oflo_agent_protocol.core import serialization
+from oflo_agent_protocol.protocols.a2a.types import TERMINAL_STATES
+
+logger = logging.getLogger(__name__)
+
+_DISCONNECT: Any = object()  # queued to end a subscriber that fell behind
+
+
+@dataclass
+class TaskEvent:
+    event_id: int
+    kind: str  # "status" | "artifact"
+    data: Dict[str, Any]
+    _frame: Optional[str] = field(default=None, repr=False, compare=False)
+
+    @property
+    def final(self) -> bool:
+        return bool(self.data.get("final"))
+
+    def to_sse(self, payload: Optional[Dict[str, Any]] = None) -> str:
+        """SSE frame for this event; `payload` replaces `data` (e.g. a JSON-RPC envelope)."""
+        if payload is not None:
+            return self._render(payload)
+        if self._frame is None:  # encoded once, however many subscribers replay it
+            self._frame = self._render(self.data)
+        return self._frame
+
+    def _render(self, body: Dict[str, Any]) -> str:
+        return f"id: {self.event_id}\nevent: {self.kind}\ndata: {serialization.dumps_str(body)}\n\n"
+
+
+class TaskChannel:
+    """Broadcast channel for one task: replay buffer + live subscriber queues."""
+
+    def __init__(self, task_id: str, buffer_size: int = 4096, queue_size: int = 1024) -> None:
+        self.task_id = task_id
+        self._buffer: Deque[TaskEvent] = deque(maxlen=buffer_size)
+        self._subscribers: List[asyncio.Queue] = []
+        self._queue_size = queue_size
+        self._next_id = 1
+        self.closed_at: Optional[float] = None
+        self.updated_at = time.monotonic()  # time of the last publish
+
+    @property
+    def closed(self) -> bool:
+        return self.closed_at is not None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    def publish(self, kind: str, data: Dict[str, Any]) -> TaskEvent:
+        event = TaskEvent(self._next_id, kind, data)
+        self._next_id += 1
+        self._buffer.append(event)
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A consumer this far behind is dropped; it can reconnect
+                # with Last-Event-ID and replay from the buffer.
+                logger.warning("A2A subscriber on task %s fell behind — disconnecting", self.task_id)
+                self._subscribers.remove(queue)
+                self._drop(queue)
+        self.updated_at = time.monotonic()
+        if event.final and self.closed_at is None:
+            self.closed_at = self.updated_at
+        return event
+
+    @staticmethod
+    def _drop(queue: asyncio.Queue) -> None:
+        # Make room for the end-of-stream marker.
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+        queue.put_nowait(_DISCONNECT)
+
+    async def subscribe(
+        self, last_event_id: Optional[int] = None, heartbeat: float = 15.0
+    ) -> AsyncIterator[Optional[TaskEvent]]:
+        """
+        Replay buffered events after `last_event_id`, then follow live ones
+        until the final event.  Yields None as a heartbeat tick.
+        """
+        after = last_event_id or 0
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        # Snapshot and register together (no await in between) so no event is missed or doubled.
+        backlog = [e for e in self._buffer if e.event_id > after]
+        if not self.closed:
+            self._subscribers.append(queue)
+        try:
+            for event in backlog:
+                yield event
+                if event.final:
+                    return
+            if self.closed:
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event is _DISCONNECT:
+                    return
+                yield event
+                if event.final:
+                    return
+        finally:
+            if queue in self._subscribers:
+                self._subscribers.remove(queue)
+
+
+class TaskEventBus:
+    """
+    Registry of task channels with bounded retention.
+
+    A finished channel is kept for `retention` seconds, or less once the
+    finished channels together buffer more than `max_buffered_events` (oldest
+    go first).  A channel that never publishes a final event is dropped after
+    `idle_timeout` seconds without one, unless someone is still subscribed.
+    Both sweeps are amortised O(1) per publish.
+    """
+
+    def __init__(
+        self,
+        retention: float = 300.0,
+        buffer_size: int = 4096,
+        idle_timeout: float = 3600.0,
+        max_buffered_events: int = 262144,
+    ) -> None:
+        # Ordered by last publish, least recent first.
+        self._channels: "OrderedDict[str, TaskChannel]" = OrderedDict()
+        self._closed: Deque[Tuple[str, TaskChannel]] = deque()  # by closed_at
+        self._closed_events = 0  # events buffered by finished channels
+        self._retention = retention
+        self._buffer_size = buffer_size
+        self._idle_timeout = idle_timeout
+        self._max_buffered = max_buffered_events
+
+    def channel(self, task_id: str) -> TaskChannel:
+        ch = self._channels.get(task_id)
+        if ch is None:
+            ch = self._channels[task_id] = TaskChannel(task_id, buffer_size=self._buffer_size)
+        return ch
+
+    def get(self, task_id: str) -> Optional[TaskChannel]:
+        return self._channels.get(task_id)
+
+    def discard(self, task_id: str) -> None:
+        """Forget `task_id`'s channel; live subscribers keep their reference until they finish."""
+        ch = self._channels.pop(task_id, None)
+        if ch is not None and ch.closed:
+            self._closed_events -= ch.buffered
+
+    def publish_status(self, task_id: str, status: Dict[str, Any], final: Optional[bool] = None) -> TaskEvent:
+        if final is None:
+            final = status.get("state") in TERMINAL_STATES
+        return self._publish(task_id, "status", {"id": task_id, "status": status, "final": final})
+
+    def publish_artifact(self, task_id: str, artifact: Dict[str, Any]) -> TaskEvent:
+        return self._publish(task_id, "artifact", {"id": task_id, "artifact": artifact})
+
+    def _publish(self, task_id: str, kind: str, data: Dict[str, Any]) -> TaskEvent:
+        ch = self.channel(task_id)
+        was_closed = ch.closed
+        before = ch.buffered
+        event = ch.publish(kind, data)
+        self._channels.move_to_end(task_id)
+        if was_closed:
+            self._closed_events += ch.buffered - before
+        elif ch.closed:
+            self._closed.append((task_id, ch))
+            self._closed_events += ch.buffered
+        self._purge()
+        return event
+
+    def _purge(self) -> None:
+        now = time.monotonic()
+        cutoff = now - self._retention
+        while self._closed and (
+            self._closed[0][1].closed_at < cutoff  # type: ignore[operator]
+            or self._closed_events > self._max_buffered
+        ):
+            task_id, ch = self._closed.popleft()
+            if self._channels.get(task_id) is ch:
+                self.discard(task_id)
+
+        idle_cutoff = now - self._idle_timeout
+        while self._channels:
+            task_id, ch = next(iter(self._channels.items()))
+            if ch.updated_at >= idle_cutoff:
+                break
+            if ch.subscriber_count:
+                ch.updated_at = now  # still watched: counts as activity
+                self._channels.move_to_end(task_id)
+                continue
+            logger.debug("Dropping idle A2A event channel for task %s", task_id)
+            self.discard(task_id)
+
+    def __len__(self) -> int:
+        return len(self._channels)
@@ -0,0 +1,175 @@
+"""Bounded background execution of A2A tasks.
+
+`A2AServer` hands every task to a `TaskExecutor` instead of awaiting the agent
+inside the HTTP request:
+
+  • At most `max_workers` tasks run at once; up to `max_queue` more wait for
+    a slot.  Beyond that `submit()` raises `ExecutorBusy` — the server turns
+    it into a JSON-RPC "server busy" error rather than queueing without bound.
+  • Tasks sharing a session run one after another, in submission order, so a
+    conversation's turns never interleave.  A waiting session does not hold a
+    worker slot.  Each turn has a "turn done" future that resolves only once
+    the turn *and every earlier turn* have finished, so cancelling a queued
+    turn does not let the one behind it overtake a turn still running.
+  • Every task has an asyncio handle; `cancel()` interrupts it wherever it is
+    (queued, waiting on its session, or mid-generation).
+
+Slots are handed over with plain futures rather than `asyncio.Semaphore`, so
+one executor can outlive the event loop it was first used on.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorBusy(RuntimeError):
+    """Raised by `TaskExecutor.submit()` when the worker pool and queue are full."""
+
+
+class TaskExecutor:
+    """Worker pool with admission control and per-session ordering."""
+
+    def __init__(self, max_workers: int = 8, max_queue: int = 64) -> None:
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._handles: Dict[str, asyncio.Task] = {}
+        self._session_tail: Dict[str, asyncio.Future] = {}
+        self.rejected = 0
+
+    @property
+    def running(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return len(self._handles) - self._active
+
+    @property
+    def has_capacity(self) -> bool:
+        return len(self._handles) < self.max_workers + self.max_queue
+
+    def handle(self, task_id: str) -> Optional[asyncio.Task]:
+        return self._handles.get(task_id)
+
+    def submit(
+        self,
+        task_id: str,
+        fn: Callable[[], Awaitable[Any]],
+        session_id: Optional[str] = None,
+        on_start: Optional[Callable[[], None]] = None,
+    ) -> asyncio.Task:
+        """
+        Schedule `fn()` and return its handle at once.  `on_start` is called
+        when the task gets a worker slot.
+        """
+        if task_id in self._handles:
+            raise ValueError(f"Task {task_id} is already running")
+        if not self.has_capacity:
+            self.rejected += 1
+            raise ExecutorBusy(
+                f"{len(self._handles)} tasks in flight (limit {self.max_workers + self.max_queue})"
+            )
+        loop = asyncio.get_running_loop()
+        previous: Optional[asyncio.Future] = None
+        turn: Optional[asyncio.Future] = None
+        if session_id:
+            previous = self._session_tail.get(session_id)
+            turn = self._session_tail[session_id] = loop.create_future()
+            turn.add_done_callback(lambda f: self._turn_done(session_id, f))
+        handle = loop.create_task(self._run(fn, previous, turn, on_start))
+        self._handles[task_id] = handle
+        handle.add_done_callback(lambda h: self._finished(task_id, h))
+        return handle
+
+    def cancel(self, task_id: str) -> bool:
+        handle = self._handles.get(task_id)
+        if handle is None or handle.done():
+            return False
+        handle.cancel()
+        return True
+
+    async def shutdown(self, timeout: float = 5.0) -> None:
+        """Cancel everything in flight and wait (up to `timeout`) for it to unwind."""
+        handles = list(self._handles.values())
+        for handle in handles:
+            handle.cancel()
+        if handles:
+            await asyncio.wait(handles, timeout=timeout)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    async def _run(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        previous: Optional[asyncio.Future],
+        turn: Optional[asyncio.Future],
+        on_start: Optional[Callable[[], None]],
+    ) -> Any:
+        try:
+            if previous is not None and not previous.done():
+                # Wait for the session's earlier turns (asyncio.wait never cancels them).
+                await asyncio.wait([previous])
+            await self._acquire()
+            try:
+                if on_start is not None:
+                    on_start()
+                return await fn()
+            finally:
+                self._release()
+        finally:
+            if turn is not None:
+                self._pass_turn(previous, turn)
+
+    async def _acquire(self) -> None:
+        if self._active < self.max_workers and not self._waiters:
+            self._active += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()  # the slot was handed over just as we were cancelled
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    def _release(self) -> None:
+        # Hand the slot straight to the next waiter; `_active` stays the same.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    @staticmethod
+    def _pass_turn(previous: Optional[asyncio.Future], turn: asyncio.Future) -> None:
+        """Resolve `turn` once `previous` has — a cancelled waiter hands its wait on."""
+        def resolve(_: Any = None) -> None:
+            if not turn.done():
+                turn.set_result(None)
+
+        if previous is None or previous.done():
+            resolve()
+        else:
+            previous.add_done_callback(resolve)
+
+    def _turn_done(self, session_id: str, turn: asyncio.Future) -> None:
+        if self._session_tail.get(session_id) is turn:
+            del self._session_tail[session_id]
+
+    def _finished(self, task_id: str, handle: asyncio.Task) -> None:
+        self._handles.pop(task_id, None)
+        if not handle.cancelled() and handle.exception() is not None:
+            logger.error("A2A task %s crashed: %s", task_id, handle.exception())
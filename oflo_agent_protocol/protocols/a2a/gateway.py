@@ -0,0 +1,110 @@
+"""Multi-agent A2A server with skill-based routing.
+
+`A2AGateway` serves all of a project's agents from one endpoint.  Each agent
+is published as an `AgentSkill` on the card; a task is routed by
+`params.metadata.skillId` when given, otherwise by keyword overlap between the
+message and each skill's name, tags and description, falling back to the
+default agent.  Each agent keeps its own per-session state.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from oflo_agent_protocol.protocols.a2a.server import A2AServer
+from oflo_agent_protocol.protocols.a2a.types import AgentCard, AgentSkill
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _words(text: str) -> set:
+    return {w for w in _WORD_RE.findall(text.lower()) if len(w) > 2}
+
+
+def skill_id(name: str) -> str:
+    return "-".join(_WORD_RE.findall(name.lower())) or "agent"
+
+
+class SkillRouter:
+    """Maps A2A skills to agents and picks one for a message."""
+
+    def __init__(
+        self,
+        agents: Sequence[Any],
+        default: Optional[str] = None,
+        tags: Optional[Dict[str, List[str]]] = None,
+    ) -> None:
+        if not agents:
+            raise ValueError("SkillRouter needs at least one agent")
+        tags = tags or {}
+        self._agents: Dict[str, Any] = {}
+        self._skills: List[AgentSkill] = []
+        self._vocab: Dict[str, Tuple[set, set, set]] = {}
+        for agent in agents:
+            sid = skill_id(agent.name)
+            prompt = getattr(agent, "system_prompt", "") or ""
+            skill = AgentSkill(
+                id=sid,
+                name=agent.name,
+                description=prompt.strip().splitlines()[0] if prompt.strip() else agent.name,
+                tags=list(tags.get(agent.name, [])),
+            )
+            self._agents[sid] = agent
+            self._skills.append(skill)
+            self._vocab[sid] = (
+                _words(agent.name), _words(" ".join(skill.tags)), _words(skill.description)
+            )
+        self._default = skill_id(default) if default else self._skills[0].id
+        if self._default not in self._agents:
+            raise ValueError(f"Default agent '{default}' is not one of the routed agents")
+
+    @property
+    def skills(self) -> List[AgentSkill]:
+        return list(self._skills)
+
+    @property
+    def default_agent(self) -> Any:
+        return self._agents[self._default]
+
+    def route(self, text: str, requested: Optional[str] = None) -> Tuple[str, Any]:
+        """(skill id, agent) for a message; `requested` must name a known skill."""
+        if requested:
+            sid = skill_id(requested)
+            if sid not in self._agents:
+                raise ValueError(f"Unknown skill '{requested}'")
+            return sid, self._agents[sid]
+        words = _words(text)
+        best, best_score = self._default, 0
+        for sid, (name, tag_words, description) in self._vocab.items():
+            score = 3 * len(words & name) + 2 * len(words & tag_words) + len(words & description)
+            if score > best_score:
+                best, best_score = sid, score
+        return best, self._agents[best]
+
+
+class A2AGateway(A2AServer):
+    """
+    One A2A server for a whole project.
+
+    Usage::
+
+        gateway = A2AGateway(card, agents=[analyst, writer], tags={"Writer": ["blog", "copy"]})
+        # tasks/send with params.metadata.skillId = "writer" → Writer
+    """
+
+    def __init__(
+        self,
+        card: AgentCard,
+        agents: Sequence[Any],
+        default: Optional[str] = None,
+        tags: Optional[Dict[str, List[str]]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._router = SkillRouter(agents, default=default, tags=tags)
+        known = {s.id for s in card.skills}
+        card.skills = list(card.skills) + [s for s in self._router.skills if s.id not in known]
+        super().__init__(card, agent=self._router.default_agent, **kwargs)
+
+    def _select_agent(self, params: Dict[str, Any], text: str) -> Tuple[Optional[str], Any]:
+        requested = (params.get("metadata") or {}).get("skillId")
+        return self._router.route(text, requested)
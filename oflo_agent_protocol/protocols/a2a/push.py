@@ -0,0 +1,332 @@
+"""A2A push notifications: webhook delivery on the server, a receiver on the client.
+
+Instead of polling `tasks/get`, a client registers a webhook for a task —
+`tasks/pushNotification/set`, or `params.pushNotification` on `tasks/send` —
+and the server POSTs the task's status transitions to it.  Each event is the
+same object the SSE stream carries (`{"id", "status", "final"}`); the final
+one also carries the whole task under `"task"`, so no follow-up `tasks/get`
+is needed.
+
+  • `WebhookDispatcher` (server) queues events per webhook and delivers them
+    in the background, up to `max_batch` events per POST as a JSON array.
+    Connection errors, 5xx and 429 are retried with exponential backoff; a
+    webhook that stays down loses its oldest events once `max_pending` are
+    queued.  The config's token is sent as `X-A2A-Notification-Token`.
+  • `PushReceiver` (client) is a small embedded aiohttp server that accepts
+    those POSTs, checks the token and resolves `wait(task_id)` on each
+    task's final status.
+
+Trust model: a webhook makes the server send requests to a URL chosen by
+whoever can call it, so push is off by default (`A2AServer(push_notifications=
+True)` enables it).  Unless `allow_private_hosts=True`, the dispatcher only
+delivers to public addresses — loopback, private, link-local (cloud metadata)
+and reserved ranges are refused when the URL is registered (`check_webhook_url`)
+and again when its host is resolved, so DNS rebinding cannot reach them either.
+Redirects are not followed.  A task's webhook cannot be replaced once set, and
+its token is never echoed back.
+
+Usage::
+
+    async with PushReceiver(port=8765) as receiver:
+        task = await client.send_and_wait("Summarise Q4", receiver=receiver)
+"""
+from __future__ import annotations
+
+import asyncio
+import hmac
+import ipaddress
+import logging
+import secrets
+import socket
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+from aiohttp.abc import AbstractResolver
+
+from oflo_agent_protocol.protocols.a2a.types import PushNotificationConfig
+
+logger = logging.getLogger(__name__)
+
+TOKEN_HEADER = "X-A2A-Notification-Token"
+
+
+def _is_public_ip(host: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(host.split("%", 1)[0])
+    except ValueError:
+        return False
+    return ip.is_global and not ip.is_multicast
+
+
+def check_webhook_url(url: str, allow_private: bool = False) -> None:
+    """
+    Raise ValueError unless `url` is an http(s) URL a server may POST to.
+
+    Hostnames other than `localhost` pass here; the addresses they resolve
+    to are checked at delivery time.
+    """
+    parts = urlsplit(url)
+    host = parts.hostname
+    if parts.scheme not in ("http", "https") or not host:
+        raise ValueError(f"Push notification url must be http(s), got {url!r}")
+    if allow_private:
+        return
+    if host == "localhost" or host.endswith(".localhost"):
+        raise ValueError(f"Push notification url must not point at localhost, got {url!r}")
+    try:
+        ipaddress.ip_address(host.split("%", 1)[0])
+    except ValueError:
+        return
+    if not _is_public_ip(host):
+        raise ValueError(f"Push notification url must be a public address, got {url!r}")
+
+
+class _PublicResolver(AbstractResolver):
+    """Resolver that drops non-public addresses, so webhooks cannot reach internal hosts."""
+
+    def __init__(self, resolver: Optional[AbstractResolver] = None) -> None:
+        self._resolver = resolver or aiohttp.DefaultResolver()
+
+    async def resolve(
+        self, host: str, port: int = 0, family: socket.AddressFamily = socket.AF_INET
+    ) -> List[Dict[str, Any]]:
+        results = await self._resolver.resolve(host, port, family)
+        public = [r for r in results if _is_public_ip(r["host"])]
+        if not public:
+            raise OSError(f"{host} resolves only to non-public addresses")
+        return public
+
+    async def close(self) -> None:
+        await self._resolver.close()
+
+
+class WebhookDispatcher:
+    """
+    Batched, retrying delivery of task events to push-notification webhooks.
+
+    `allow_private_hosts=True` lifts the public-address restriction, for
+    webhooks on the same host or network (tests, sidecars).
+    """
+
+    def __init__(
+        self,
+        max_batch: int = 50,
+        max_pending: int = 1000,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 10.0,
+        allow_private_hosts: bool = False,
+    ) -> None:
+        self.allow_private_hosts = allow_private_hosts
+        self.max_batch = max(1, max_batch)
+        self.max_pending = max(1, max_pending)
+        self.max_retries = max(0, max_retries)
+        self.backoff = backoff
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._queues: Dict[Tuple[str, Optional[str]], Deque[Dict[str, Any]]] = {}
+        self._workers: Dict[Tuple[str, Optional[str]], asyncio.Task] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.delivered = 0
+        self.failed = 0
+        self.dropped = 0
+
+    @property
+    def pending(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def enqueue(self, config: PushNotificationConfig, event: Dict[str, Any]) -> None:
+        """Queue `event` for `config.url`; delivery happens in the background."""
+        try:
+            check_webhook_url(config.url, self.allow_private_hosts)
+        except ValueError as exc:
+            self.failed += 1
+            logger.warning("Push event not sent: %s", exc)
+            return
+        key = (config.url, config.token)
+        queue = self._queues.setdefault(key, deque())
+        if len(queue) >= self.max_pending:
+            queue.popleft()
+            self.dropped += 1
+            logger.warning("Push webhook %s is %d events behind — dropping the oldest",
+                           config.url, len(queue))
+        queue.append(event)
+        worker = self._workers.get(key)
+        if worker is None or worker.done():
+            self._workers[key] = asyncio.get_running_loop().create_task(self._drain(key))
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Give queued events up to `timeout` to go out, then stop."""
+        workers = list(self._workers.values())
+        if workers:
+            _, late = await asyncio.wait(workers, timeout=timeout)
+            for worker in late:
+                worker.cancel()
+            if late:
+                await asyncio.wait(late)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    async def _drain(self, key: Tuple[str, Optional[str]]) -> None:
+        url, token = key
+        queue = self._queues[key]
+        try:
+            while queue:
+                await asyncio.sleep(0)  # let events published in the same tick share a POST
+                batch = [queue.popleft() for _ in range(min(self.max_batch, len(queue)))]
+                if await self._deliver(url, token, batch):
+                    self.delivered += len(batch)
+                else:
+                    self.failed += len(batch)
+        finally:
+            self._workers.pop(key, None)
+            if not queue:
+                self._queues.pop(key, None)
+
+    async def _deliver(self, url: str, token: Optional[str], events: List[Dict[str, Any]]) -> bool:
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers[TOKEN_HEADER] = token
+        delay = self.backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._get_session().post(
+                    url, json=events, headers=headers, allow_redirects=False
+                ) as resp:
+                    if resp.status < 300:
+                        return True
+                    if resp.status < 500 and resp.status != 429:
+                        logger.warning("Push webhook %s rejected %d events: HTTP %d",
+                                       url, len(events), resp.status)
+                        return False
+                    reason = f"HTTP {resp.status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                reason = str(exc) or type(exc).__name__
+            if attempt < self.max_retries:
+                logger.debug("Push webhook %s failed (%s) — retrying in %.1fs", url, reason, delay)
+                await asyncio.sleep(delay)
+                delay *= 2
+        logger.warning("Push webhook %s unreachable (%s) — %d events lost", url, reason, len(events))
+        return False
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            resolver = None if self.allow_private_hosts else _PublicResolver()
+            connector = aiohttp.TCPConnector(
+                limit=100, limit_per_host=8, ttl_dns_cache=300, resolver=resolver
+            )
+            self._session = aiohttp.ClientSession(timeout=self._timeout, connector=connector)
+        return self._session
+
+
+class PushReceiver:
+    """
+    Embedded webhook endpoint for A2A push notifications.
+
+    `port=0` binds an ephemeral port; pass `public_url` when the remote
+    server reaches this process through a different address.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        path: str = "/a2a/push",
+        public_url: Optional[str] = None,
+        token: Optional[str] = None,
+        on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+        max_unclaimed: int = 1000,
+    ) -> None:
+        self._host = host
+        self._port = port
+        self._path = path
+        self._public_url = public_url
+        self.token = token or secrets.token_urlsafe(24)
+        self._on_event = on_event
+        self._waiters: Dict[str, asyncio.Future] = {}
+        # Final events that arrived before anyone waited for them.
+        self._unclaimed: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._max_unclaimed = max(1, max_unclaimed)
+        self._runner: Optional[Any] = None
+
+    async def __aenter__(self) -> "PushReceiver":
+        return await self.start()
+
+    async def __aexit__(self, *_: Any) -> None:
+        await self.stop()
+
+    @property
+    def url(self) -> str:
+        if self._public_url:
+            return self._public_url
+        return f"http://{self._host}:{self._port}{self._path}"
+
+    def config(self) -> PushNotificationConfig:
+        return PushNotificationConfig(url=self.url, token=self.token)
+
+    async def start(self) -> "PushReceiver":
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_post(self._path, self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self._host, self._port).start()
+        self._port = self._runner.addresses[0][1]
+        return self
+
+    async def stop(self) -> None:
+        for fut in self._waiters.values():
+            fut.cancel()
+        self._waiters.clear()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def wait(self, task_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """The final status event for `task_id` (raises `asyncio.TimeoutError`)."""
+        event = self._unclaimed.pop(task_id, None)
+        if event is not None:
+            return event
+        fut = self._waiters.get(task_id)
+        if fut is None:
+            fut = self._waiters[task_id] = asyncio.get_running_loop().create_future()
+        try:
+            return await asyncio.wait_for(asyncio.shield(fut), timeout)
+        finally:
+            if self._waiters.get(task_id) is fut:
+                del self._waiters[task_id]
+
+    async def _handle(self, request: Any) -> Any:
+        from aiohttp import web
+
+        if not hmac.compare_digest(request.headers.get(TOKEN_HEADER, ""), self.token):
+            return web.Response(status=401)
+        try:
+            body = await request.json()
+        except ValueError:
+            return web.Response(status=400)
+        for event in body if isinstance(body, list) else [body]:
+            if not isinstance(event, dict):
+                continue
+            if self._on_event is not None:
+                self._on_event(event)
+            if event.get("final"):
+                self._resolve(event)
+        return web.Response(status=204)
+
+    def _resolve(self, event: Dict[str, Any]) -> None:
+        task_id = event.get("id", "")
+        fut = self._waiters.get(task_id)
+        if fut is not None and not fut.done():
+            fut.set_result(event)
+            return
+        self._unclaimed[task_id] = event
+        while len(self._unclaimed) > self._max_unclaimed:
+            self._unclaimed.popitem(last=False)
@@ -2,8 +2,51 @@
 
 Endpoints:
   GET  /.well-known/agent.json       → AgentCard discovery
-  POST /                             → JSON-RPC dispatch (tasks/send, tasks/get, tasks/cancel)
+  POST /                             → JSON-RPC dispatch (tasks/send, tasks/get, tasks/cancel,
+                                       tasks/sendSubscribe, tasks/resubscribe,
+                                       tasks/pushNotification/set, tasks/pushNotification/get)
   GET  /tasks/{id}/stream            → SSE streaming (tasks/sendSubscribe)
+  GET  /metrics                      → OpenMetrics exposition (Prometheus scrape target)
+
+Tasks run in the background on a bounded `executor.TaskExecutor`: at most
+`max_concurrent_tasks` at once, turns of one session in order, and a
+"server busy" error (-32000) once `max_queued_tasks` more are waiting.
+`tasks/send` waits for the result unless `params.configuration.blocking` is
+false, in which case it returns the `submitted` task immediately; poll with
+`tasks/get` or follow `/tasks/{id}/stream`.  `tasks/cancel` interrupts the
+running agent call.
+
+Each `sessionId` runs on its own `SessionState` in the agent's session store,
+so concurrent conversations never share history; a task without a session
+gets a throwaway state.
+`gateway.A2AGateway` extends this server to route between several agents.
+
+Tasks live in a `store.TaskStore`: bounded and expiring in memory by default,
+or durable across restarts with `SQLiteTaskStore` (set `OFLO_A2A_TASK_DB`).
+
+Streaming is event-driven (see `events.TaskEventBus`): `tasks/sendSubscribe`
+starts the task in the background and every status change and token delta is
+pushed to subscribers the moment it is produced.  Streams resume from the
+`Last-Event-ID` header and send heartbeat comments while idle.  A
+`tasks/sendSubscribe` / `tasks/resubscribe` POST with `Accept:
+text/event-stream` gets the SSE stream directly, one JSON-RPC response per
+event.
+
+A POST body may also be a JSON-RPC 2.0 batch (an array of requests).  Its
+calls run concurrently, at most `batch_concurrency` at a time, and the reply
+is an array with one response per request that has an `id`; batches larger
+than `max_batch_size` are rejected whole.  Blocking `tasks/send` calls in a
+batch therefore queue on the batch limit rather than overflowing the executor.
+
+Push notifications (see `push`): a task with a webhook — registered with
+`tasks/pushNotification/set` or `params.pushNotification` on `tasks/send` —
+has every status transition delivered to it by a `WebhookDispatcher`, so
+callers need not poll.  Off by default: this server does not authenticate
+callers, and a webhook makes it POST to a URL the caller chose.  Enable with
+`push_notifications=True` only behind an authenticating gateway or on a
+trusted network; webhook URLs must then be public addresses (see `push`)
+unless `push_url_validator` — called with each URL, raising ValueError to
+reject it — says otherwise.
 
 Usage::
 
@@ -21,20 +64,37 @@ Usage::
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
+import os
 import uuid
-from typing import Any, AsyncIterator, Callable, Dict, Optional
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 
 from fastapi import FastAPI, Request, Response
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import StreamingResponse
 import uvicorn
 
+from oflo_agent_protocol.audit.metrics import (
+    OPENMETRICS_CONTENT_TYPE,
+    Gauge,
+    MetricsRegistry,
+    get_metrics_registry,
+)
+from oflo_agent_protocol.audit.tracing import SpanContext, get_tracer
+from oflo_agent_protocol.core import serialization
+from oflo_agent_protocol.core.message import CanonicalMessage
+from oflo_agent_protocol.core.session import SessionState
+from oflo_agent_protocol.protocols.a2a.events import TaskEventBus
+from oflo_agent_protocol.protocols.a2a.executor import ExecutorBusy, TaskExecutor
+from oflo_agent_protocol.protocols.a2a.push import WebhookDispatcher, check_webhook_url
+from oflo_agent_protocol.protocols.a2a.store import InMemoryTaskStore, SQLiteTaskStore, TaskStore
+from oflo_agent_protocol.protocols.responses import FastJSONResponse
 from oflo_agent_protocol.protocols.a2a.types import (
     A2AMessage,
     A2ATask,
     AgentCard,
     Artifact,
+    PushNotificationConfig,
     TaskStatusUpdate,
     TextPart,
     jsonrpc_error,
@@ -45,12 +105,28 @@ from oflo_agent_protocol.protocols.a2a.types import (
 logger = logging.getLogger(__name__)
 
 
+def _parse_event_id(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def _public_push_config(config: PushNotificationConfig) -> Dict[str, Any]:
+    # The token authenticates us to the webhook; never hand it back out.
+    d = config.to_dict()
+    d.pop("token", None)
+    return d
+
+
 class A2AServer:
     """
     Hosts an Oflo agent as a Google A2A-compliant HTTP server.
 
     The `agent` parameter must have a `chat(text: str) -> str` coroutine.
-    Any BaseAgentV2 instance satisfies this.
+    Any BaseAgentV2 instance satisfies this.  If it also has
+    `stream(CanonicalMessage)` yielding text deltas, streamed tasks forward
+    each delta as an artifact chunk.
     """
 
     def __init__(
@@ -59,37 +135,121 @@ class A2AServer:
         agent: Any,
         host: str = "0.0.0.0",
         port: int = 9000,
+        metrics: Optional[MetricsRegistry] = None,
+        heartbeat_interval: float = 15.0,
+        max_concurrent_tasks: int = 8,
+        max_queued_tasks: int = 64,
+        task_store: Optional[TaskStore] = None,
+        card_max_age: int = 300,
+        batch_concurrency: int = 16,
+        max_batch_size: int = 100,
+        push_notifications: bool = False,
+        webhook_dispatcher: Optional[WebhookDispatcher] = None,
+        push_url_validator: Optional[Callable[[str], None]] = None,
     ) -> None:
         self._card = card
+        self._card_max_age = card_max_age
+        self._card_body: Optional[bytes] = None  # rendered on first request
+        self._batch_concurrency = max(1, batch_concurrency)
+        self._max_batch_size = max(1, max_batch_size)
         self._agent = agent
         self._host = host
         self._port = port
-        self._tasks: Dict[str, A2ATask] = {}
+        if task_store is None:
+            db_path = os.getenv("OFLO_A2A_TASK_DB")
+            task_store = SQLiteTaskStore(db_path) if db_path else InMemoryTaskStore()
+        self._tasks = task_store
+        self._events = TaskEventBus()
+        self._executor = TaskExecutor(max_concurrent_tasks, max_queued_tasks)
+        self._heartbeat = heartbeat_interval
+        card.capabilities["pushNotifications"] = push_notifications
+        self._push: Optional[WebhookDispatcher] = None
+        if push_notifications:
+            self._push = webhook_dispatcher or WebhookDispatcher()
+        self._push_url_validator = push_url_validator
+        self._push_configs: "OrderedDict[str, PushNotificationConfig]" = OrderedDict()
+        self._max_push_configs = 10_000
+        self._metrics = metrics or get_metrics_registry()
+        # Bound methods, held weakly by the registry and unregistered on shutdown.
+        # Servers sharing a card name are summed into one series.
+        tasks_gauge = self._metrics.gauge(
+            "oflo_a2a_tasks", "A2A tasks in the executor", ["agent", "state"]
+        )
+        self._gauges: List[Tuple[Gauge, Callable[[], float], Tuple[str, ...]]] = [
+            (tasks_gauge, self._running_tasks, (card.name, "running")),
+            (tasks_gauge, self._queued_tasks, (card.name, "queued")),
+            (tasks_gauge, self._stored_tasks, (card.name, "stored")),
+            (self._metrics.gauge(
+                "oflo_a2a_task_store_bytes", "Serialised size of A2A tasks held in memory", ["agent"]
+            ), self._task_store_bytes, (card.name,)),
+        ]
+        if self._push is not None:
+            self._gauges.append((self._metrics.gauge(
+                "oflo_a2a_push_pending", "Task events waiting for webhook delivery", ["agent"]
+            ), self._push_pending, (card.name,)))
+        for gauge, fn, labels in self._gauges:
+            gauge.set_function(fn, *labels)
         self._app = self._build_app()
 
+    def _running_tasks(self) -> float:
+        return self._executor.running
+
+    def _queued_tasks(self) -> float:
+        return self._executor.queued
+
+    def _stored_tasks(self) -> float:
+        return len(self._tasks)
+
+    def _task_store_bytes(self) -> float:
+        return self._tasks.memory_bytes
+
+    def _push_pending(self) -> float:
+        return self._push.pending if self._push is not None else 0
+
     # ------------------------------------------------------------------
     # FastAPI app construction
     # ------------------------------------------------------------------
 
     def _build_app(self) -> FastAPI:
-        app = FastAPI(title=f"A2A: {self._card.name}", docs_url=None, redoc_url=None)
+        app = FastAPI(
+            title=f"A2A: {self._card.name}",
+            docs_url=None,
+            redoc_url=None,
+            default_response_class=FastJSONResponse,
+        )
 
         @app.get("/.well-known/agent.json")
-        async def agent_card() -> JSONResponse:
-            return JSONResponse(content=self._card.to_dict())
+        async def agent_card() -> Response:
+            if self._card_body is None:
+                self._card_body = serialization.dumps(self._card.to_dict())
+            # Lets pooled clients cache the card instead of re-fetching per call.
+            return Response(
+                content=self._card_body,
+                media_type="application/json",
+                headers={"Cache-Control": f"public, max-age={self._card_max_age}"},
+            )
+
+        @app.get("/metrics")
+        async def metrics() -> Response:
+            return Response(content=self._metrics.render(), media_type=OPENMETRICS_CONTENT_TYPE)
 
         @app.post("/")
-        async def jsonrpc_dispatch(request: Request) -> JSONResponse:
+        async def jsonrpc_dispatch(request: Request) -> Response:
             body = await request.json()
-            return await self._dispatch(body)
+            parent = get_tracer().extract(request.headers)
+            if isinstance(body, list):
+                return await self._dispatch_batch(body, parent)
+            if (
+                body.get("method") in ("tasks/sendSubscribe", "tasks/resubscribe")
+                and "text/event-stream" in request.headers.get("accept", "")
+            ):
+                return await self._dispatch_stream(body, request.headers.get("last-event-id"))
+            return await self._dispatch(body, parent=parent)
 
         @app.get("/tasks/{task_id}/stream")
-        async def task_stream(task_id: str) -> StreamingResponse:
-            return StreamingResponse(
-                self._sse_stream(task_id),
-                media_type="text/event-stream",
-                headers={"Cache-Control": "no-cache"},
-            )
+        async def task_stream(task_id: str, request: Request) -> StreamingResponse:
+            last_id = request.headers.get("last-event-id") or request.query_params.get("lastEventId")
+            return self._sse_response(self._sse_stream(task_id, _parse_event_id(last_id)))
 
         return app
 
@@ -97,7 +257,42 @@ class A2AServer:
     # JSON-RPC dispatch
     # ------------------------------------------------------------------
 
-    async def _dispatch(self, body: Dict[str, Any]) -> JSONResponse:
+    async def _dispatch(
+        self, body: Dict[str, Any], parent: Optional[SpanContext] = None
+    ) -> FastJSONResponse:
+        return FastJSONResponse(content=await self._call(body, parent))
+
+    async def _dispatch_batch(
+        self, body: List[Any], parent: Optional[SpanContext] = None
+    ) -> Response:
+        if not body or len(body) > self._max_batch_size:
+            code, msg = A2A_ERRORS["invalid_request"]
+            reason = "empty batch" if not body else f"batch exceeds {self._max_batch_size} requests"
+            return FastJSONResponse(content=jsonrpc_error(code, f"{msg}: {reason}"))
+
+        limit = asyncio.Semaphore(self._batch_concurrency)
+
+        async def call(item: Any) -> Dict[str, Any]:
+            if not isinstance(item, dict):
+                code, msg = A2A_ERRORS["invalid_request"]
+                return jsonrpc_error(code, msg)
+            async with limit:
+                return await self._call(item)  # child of the batch span
+
+        with get_tracer().span("a2a.batch", parent=parent, agent=self._card.name, size=len(body)):
+            results = await asyncio.gather(*(call(item) for item in body))
+        # Notifications (requests without an id) get no response.
+        replies = [
+            r for item, r in zip(body, results) if not isinstance(item, dict) or "id" in item
+        ]
+        if not replies:
+            return Response(status_code=204)
+        return FastJSONResponse(content=replies)
+
+    async def _call(
+        self, body: Dict[str, Any], parent: Optional[SpanContext] = None
+    ) -> Dict[str, Any]:
+        """Run one JSON-RPC request; errors come back as JSON-RPC error objects."""
         req_id = body.get("id")
         method = body.get("method", "")
         params = body.get("params", {})
@@ -107,59 +302,152 @@ class A2AServer:
             "tasks/get": self._handle_get,
             "tasks/cancel": self._handle_cancel,
             "tasks/sendSubscribe": self._handle_send_subscribe,
+            "tasks/pushNotification/set": self._handle_push_set,
+            "tasks/pushNotification/get": self._handle_push_get,
         }
 
         handler = handlers.get(method)
         if handler is None:
             code, msg = A2A_ERRORS["method_not_found"]
-            return JSONResponse(content=jsonrpc_error(code, msg, req_id=req_id))
+            return jsonrpc_error(code, msg, req_id=req_id)
 
         try:
-            result = await handler(params, req_id)
-            return JSONResponse(content=result)
+            with get_tracer().span(f"a2a.{method}", parent=parent, agent=self._card.name):
+                return await handler(params, req_id)
         except Exception as exc:
             logger.exception("A2A handler error: %s", exc)
             code, msg = A2A_ERRORS["internal_error"]
-            return JSONResponse(content=jsonrpc_error(code, f"{msg}: {exc}", req_id=req_id))
+            return jsonrpc_error(code, f"{msg}: {exc}", req_id=req_id)
 
     # ------------------------------------------------------------------
     # Method handlers
     # ------------------------------------------------------------------
 
     async def _handle_send(self, params: Dict[str, Any], req_id: Any) -> Dict[str, Any]:
-        task_id = params.get("id", str(uuid.uuid4()))
-        session_id = params.get("sessionId")
-        message_data = params.get("message", {})
+        try:
+            task, handle = self._submit(params, self._run_chat)
+        except ExecutorBusy as exc:
+            return self._busy_error(exc, req_id)
+        except ValueError as exc:
+            code, _ = A2A_ERRORS["invalid_params"]
+            return jsonrpc_error(code, str(exc), req_id=req_id)
+
+        if (params.get("configuration") or {}).get("blocking", True):
+            # asyncio.wait: a client disconnect must not cancel the task itself
+            await asyncio.wait([handle])
+        return jsonrpc_response(task.to_dict(), req_id=req_id)
 
+    def _submit(
+        self, params: Dict[str, Any], run: Callable[[A2ATask, Any], Awaitable[None]]
+    ) -> Tuple[A2ATask, asyncio.Task]:
+        """Register a `submitted` task and hand `run(task, agent)` to the executor."""
+        task_id = params.get("id") or str(uuid.uuid4())
+        if self._tasks.get(task_id) is not None:
+            # Reusing an id would overwrite the stored task and replay its old events.
+            raise ValueError(f"Task {task_id} already exists")
         user_msg = A2AMessage.text_message(
-            role="user", text=self._extract_text(message_data)
+            role="user", text=self._extract_text(params.get("message", {}))
         )
-        task = A2ATask(
-            task_id=task_id,
-            session_id=session_id,
-            status=TaskStatusUpdate(state="working"),
-            history=[user_msg],
+        skill, agent = self._select_agent(params, user_msg.text)
+        push = self._push_config(params["pushNotification"]) if params.get("pushNotification") else None
+        task = A2ATask(task_id=task_id, session_id=params.get("sessionId"), history=[user_msg])
+        if skill:
+            task.metadata["skillId"] = skill
+
+        # Raises before anything is recorded, so a rejected send leaves no trace.
+        handle = self._executor.submit(
+            task_id,
+            lambda: run(task, agent),
+            session_id=task.session_id,
+            on_start=lambda: self._set_status(task, TaskStatusUpdate(state="working")),
         )
-        self._tasks[task_id] = task
+        if push is not None:
+            self._remember_push(task_id, push)
+        self._events.discard(task_id)  # a stale channel outliving its stored task
+        self._set_status(task, task.status)
+        return task, handle
 
-        # Process with the underlying agent
+    def _select_agent(self, params: Dict[str, Any], text: str) -> Tuple[Optional[str], Any]:
+        """(skill id, agent) for a new task; A2AGateway routes between several."""
+        return None, self._agent
+
+    @staticmethod
+    def _session_kwargs(agent: Any, task: A2ATask) -> Dict[str, Any]:
+        """Session arguments for agents that keep per-session state (BaseAgentV2)."""
+        if not hasattr(agent, "sessions"):
+            return {}
+        if task.session_id:
+            return {"session_id": task.session_id}
+        return {"session": SessionState(session_id=task.task_id)}
+
+    def _busy_error(self, exc: ExecutorBusy, req_id: Any) -> Dict[str, Any]:
+        code, msg = A2A_ERRORS["server_busy"]
+        logger.warning("A2A server '%s' rejected a task: %s", self._card.name, exc)
+        return jsonrpc_error(code, msg, data={"reason": str(exc)}, req_id=req_id)
+
+    async def _run_chat(self, task: A2ATask, agent: Any) -> None:
         try:
-            reply_text = await self._agent.chat(user_msg.text)
-            agent_msg = A2AMessage.text_message(role="agent", text=reply_text)
-            task.history.append(agent_msg)
+            reply_text = await agent.chat(task.history[0].text, **self._session_kwargs(agent, task))
             artifact = Artifact(name="reply", parts=[TextPart(text=reply_text)])
-            task.artifacts.append(artifact)
-            task.status = TaskStatusUpdate(
-                state="completed",
-                message=agent_msg,
-            )
+            self._events.publish_artifact(task.task_id, artifact.to_dict())
+            self._complete(task, reply_text, artifact)
+        except asyncio.CancelledError:
+            self._cancelled(task)
+            raise
         except Exception as exc:
-            task.status = TaskStatusUpdate(
-                state="failed",
-                message=A2AMessage.text_message(role="agent", text=str(exc)),
-            )
+            self._fail(task, exc)
+
+    def _set_status(self, task: A2ATask, status: TaskStatusUpdate) -> None:
+        task.status = status
+        self._tasks.put(task)
+        event = self._events.publish_status(task.task_id, status.to_dict())
+        self._notify(task, event.data)
+
+    def _notify(self, task: A2ATask, data: Dict[str, Any]) -> None:
+        """Queue a status event for the task's webhook, if it has one."""
+        config = self._push_configs.get(task.task_id)
+        if config is None or self._push is None:
+            return
+        if data.get("final"):
+            data = {**data, "task": task.to_dict()}  # spares the receiver a tasks/get
+        self._push.enqueue(config, data)
+
+    def _push_config(self, raw: Any) -> PushNotificationConfig:
+        if self._push is None:
+            raise ValueError("Push notifications are not enabled on this server")
+        config = PushNotificationConfig.from_dict(raw if isinstance(raw, dict) else {})
+        if self._push_url_validator is not None:
+            self._push_url_validator(config.url)
+        else:
+            check_webhook_url(config.url, self._push.allow_private_hosts)
+        return config
+
+    def _remember_push(self, task_id: str, config: PushNotificationConfig) -> None:
+        self._push_configs[task_id] = config
+        self._push_configs.move_to_end(task_id)
+        while len(self._push_configs) > self._max_push_configs:
+            self._push_configs.popitem(last=False)
+
+    def _complete(self, task: A2ATask, reply_text: str, artifact: Artifact) -> None:
+        if task.status.state == "canceled":
+            return
+        agent_msg = A2AMessage.text_message(role="agent", text=reply_text)
+        task.history.append(agent_msg)
+        task.artifacts.append(artifact)
+        self._set_status(task, TaskStatusUpdate(state="completed", message=agent_msg))
 
-        return jsonrpc_response(task.to_dict(), req_id=req_id)
+    def _fail(self, task: A2ATask, exc: BaseException) -> None:
+        if task.status.state == "canceled":
+            return
+        self._set_status(task, TaskStatusUpdate(
+            state="failed",
+            message=A2AMessage.text_message(role="agent", text=str(exc)),
+        ))
+
+    def _cancelled(self, task: A2ATask) -> None:
+        # tasks/cancel has normally published this already; shutdown has not.
+        if not task.is_terminal:
+            self._set_status(task, TaskStatusUpdate(state="canceled"))
 
     async def _handle_get(self, params: Dict[str, Any], req_id: Any) -> Dict[str, Any]:
         task_id = params.get("id")
@@ -175,36 +463,156 @@ class A2AServer:
         if task is None:
             code, msg = A2A_ERRORS["task_not_found"]
             return jsonrpc_error(code, msg, req_id=req_id)
-        if task.status.state in ("completed", "failed", "canceled"):
+        if task.is_terminal:
             code, msg = A2A_ERRORS["task_not_cancelable"]
             return jsonrpc_error(code, msg, req_id=req_id)
-        task.status = TaskStatusUpdate(state="canceled")
+        self._set_status(task, TaskStatusUpdate(state="canceled"))
+        self._executor.cancel(task_id)
         return jsonrpc_response(task.to_dict(), req_id=req_id)
 
+    async def _handle_push_set(self, params: Dict[str, Any], req_id: Any) -> Dict[str, Any]:
+        if self._push is None:
+            code, msg = A2A_ERRORS["push_not_supported"]
+            return jsonrpc_error(code, msg, req_id=req_id)
+        task = self._tasks.get(params.get("id"))
+        if task is None:
+            code, msg = A2A_ERRORS["task_not_found"]
+            return jsonrpc_error(code, msg, req_id=req_id)
+        try:
+            config = self._push_config(params.get("pushNotificationConfig"))
+        except ValueError as exc:
+            code, _ = A2A_ERRORS["invalid_params"]
+            return jsonrpc_error(code, str(exc), req_id=req_id)
+        current = self._push_configs.get(task.task_id)
+        if current is not None and current != config:
+            # Otherwise any caller could redirect someone else's task result.
+            code, _ = A2A_ERRORS["invalid_params"]
+            return jsonrpc_error(code, "Task already has a push notification webhook", req_id=req_id)
+        self._remember_push(task.task_id, config)
+        if task.is_terminal:
+            # Finished before the webhook was registered: deliver the outcome now.
+            self._notify(task, {"id": task.task_id, "status": task.status.to_dict(), "final": True})
+        return jsonrpc_response(
+            {"id": task.task_id, "pushNotificationConfig": _public_push_config(config)}, req_id=req_id
+        )
+
+    async def _handle_push_get(self, params: Dict[str, Any], req_id: Any) -> Dict[str, Any]:
+        if self._push is None:
+            code, msg = A2A_ERRORS["push_not_supported"]
+            return jsonrpc_error(code, msg, req_id=req_id)
+        config = self._push_configs.get(params.get("id"))
+        if config is None:
+            code, msg = A2A_ERRORS["task_not_found"]
+            return jsonrpc_error(code, msg, req_id=req_id)
+        return jsonrpc_response(
+            {"id": params["id"], "pushNotificationConfig": _public_push_config(config)}, req_id=req_id
+        )
+
     async def _handle_send_subscribe(self, params: Dict[str, Any], req_id: Any) -> Dict[str, Any]:
-        # Return task ID so caller can connect to /tasks/{id}/stream
-        task_id = params.get("id", str(uuid.uuid4()))
-        return jsonrpc_response({"taskId": task_id, "streamUrl": f"/tasks/{task_id}/stream"}, req_id=req_id)
+        # Start processing now; the caller connects to /tasks/{id}/stream
+        try:
+            task, _ = self._submit(params, self._run_streaming)
+        except ExecutorBusy as exc:
+            return self._busy_error(exc, req_id)
+        except ValueError as exc:
+            code, _ = A2A_ERRORS["invalid_params"]
+            return jsonrpc_error(code, str(exc), req_id=req_id)
+        return jsonrpc_response(
+            {"taskId": task.task_id, "streamUrl": f"/tasks/{task.task_id}/stream"}, req_id=req_id
+        )
+
+    async def _run_streaming(self, task: A2ATask, agent: Any) -> None:
+        """Run the agent, publishing each text delta as an artifact chunk."""
+        artifact_id = str(uuid.uuid4())
+        chunks = []
+
+        def chunk(text: str, last: bool) -> None:
+            self._events.publish_artifact(task.task_id, Artifact(
+                name="reply",
+                parts=[TextPart(text=text)] if text else [],
+                artifact_id=artifact_id,
+                append=bool(chunks) or last,
+                last_chunk=last,
+            ).to_dict())
+
+        try:
+            stream = getattr(agent, "stream", None)
+            if stream is not None:
+                message = CanonicalMessage.user(task.history[0].text)
+                async for delta in stream(message, **self._session_kwargs(agent, task)):
+                    if delta:
+                        chunk(delta, last=False)
+                        chunks.append(delta)
+                reply_text = "".join(chunks)
+            else:
+                reply_text = await agent.chat(task.history[0].text, **self._session_kwargs(agent, task))
+                chunk(reply_text, last=False)
+                chunks.append(reply_text)
+            chunk("", last=True)
+            self._complete(task, reply_text, Artifact(
+                name="reply", parts=[TextPart(text=reply_text)], artifact_id=artifact_id
+            ))
+        except asyncio.CancelledError:
+            self._cancelled(task)
+            raise
+        except Exception as exc:
+            logger.exception("A2A streaming task %s failed: %s", task.task_id, exc)
+            self._fail(task, exc)
 
     # ------------------------------------------------------------------
     # SSE streaming
     # ------------------------------------------------------------------
 
-    async def _sse_stream(self, task_id: str) -> AsyncIterator[str]:
-        task = self._tasks.get(task_id)
-        if task is None:
-            yield f"data: {json.dumps({'error': 'task not found'})}\n\n"
-            return
+    @staticmethod
+    def _sse_response(frames: AsyncIterator[str]) -> StreamingResponse:
+        return StreamingResponse(
+            frames,
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
 
-        # Send current status
-        yield f"data: {json.dumps(task.to_dict())}\n\n"
+    async def _dispatch_stream(self, body: Dict[str, Any], last_event_id: Optional[str]) -> Response:
+        """JSON-RPC over SSE: tasks/sendSubscribe starts a task, tasks/resubscribe rejoins one."""
+        req_id = body.get("id")
+        params = body.get("params", {})
+        if body.get("method") == "tasks/sendSubscribe":
+            result = await self._handle_send_subscribe(params, req_id)
+            if "error" in result:
+                return FastJSONResponse(content=result)
+            task_id = result["result"]["taskId"]
+        else:
+            task_id = params.get("id")
+            if task_id not in self._tasks:
+                code, msg = A2A_ERRORS["task_not_found"]
+                return FastJSONResponse(content=jsonrpc_error(code, msg, req_id=req_id))
+        return self._sse_response(
+            self._sse_stream(task_id, _parse_event_id(last_event_id), rpc_id=req_id, rpc=True)
+        )
 
-        # Poll until done (simple approach; replace with asyncio.Event for production)
-        for _ in range(60):
-            await asyncio.sleep(0.5)
-            yield f"data: {json.dumps({'status': task.status.state})}\n\n"
-            if task.status.state in ("completed", "failed", "canceled"):
-                break
+    async def _sse_stream(
+        self,
+        task_id: str,
+        last_event_id: Optional[int] = None,
+        rpc_id: Any = None,
+        rpc: bool = False,
+    ) -> AsyncIterator[str]:
+        channel = self._events.get(task_id)
+        if channel is None:
+            task = self._tasks.get(task_id)
+            if task is None:
+                yield f"data: {serialization.dumps_str({'error': 'task not found'})}\n\n"
+                return
+            # Events for this task have expired: replay the current status as one event
+            self._events.publish_status(task_id, task.status.to_dict())
+            channel = self._events.get(task_id)
+
+        async for event in channel.subscribe(last_event_id, heartbeat=self._heartbeat):
+            if event is None:
+                yield ": keep-alive\n\n"
+            elif rpc:
+                yield event.to_sse(jsonrpc_response(event.data, req_id=rpc_id))
+            else:
+                yield event.to_sse()
 
     # ------------------------------------------------------------------
     # Helpers
@@ -241,6 +649,15 @@ class A2AServer:
             self._port,
         )
 
+    async def shutdown(self, timeout: float = 5.0) -> None:
+        """Cancel in-flight tasks (they end as `canceled`), flush pending webhooks and task writes."""
+        for gauge, fn, labels in self._gauges:
+            gauge.remove_function(fn, *labels)
+        await self._executor.shutdown(timeout)
+        if self._push is not None:
+            await self._push.close(timeout)
+        await asyncio.get_running_loop().run_in_executor(None, self._tasks.flush)
+
     @property
     def app(self) -> FastAPI:
         return self._app
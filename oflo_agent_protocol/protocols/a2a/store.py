@@ -0,0 +1,349 @@
+"""Task storage for the A2A server.
+
+`A2AServer` keeps every task it has seen in a `TaskStore` so `tasks/get`
+can answer after the task has finished.  Two backends:
+
+  • `InMemoryTaskStore` — bounded: finished tasks expire `ttl` seconds after
+    they reach a terminal state, and least-recently-used finished tasks are
+    evicted whenever the store holds more than `max_tasks` tasks or
+    `max_bytes` of serialised task data.  Live (submitted/working) tasks are
+    never evicted; the executor's admission control already bounds them.
+  • `SQLiteTaskStore` — write-behind to a SQLite file in front of an
+    `InMemoryTaskStore` cache, so `tasks/get` keeps working across restarts.
+    `put()` only updates the cache and records the row; a single writer
+    thread commits pending rows in batches, so the event loop never waits on
+    SQLite.  Tasks that were still running when the process stopped come
+    back as `failed`.  Rows expire on the same TTL.
+
+Sizes are measured as the length of the task's JSON encoding (see
+`core.serialization`), recomputed on every `put()` — the server calls it once
+per state change, not per token.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from oflo_agent_protocol.core import serialization
+from oflo_agent_protocol.protocols.a2a.types import (
+    A2AMessage,
+    A2ATask,
+    TaskStatusUpdate,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _encode(task: A2ATask) -> str:
+    return serialization.dumps_str(task.to_dict())
+
+
+class TaskStore(ABC):
+    """Where `A2AServer` keeps tasks.  `put()` is called after every state change."""
+
+    @abstractmethod
+    def get(self, task_id: str) -> Optional[A2ATask]:
+        ...
+
+    @abstractmethod
+    def put(self, task: A2ATask) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, task_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def __contains__(self, task_id: object) -> bool:
+        return isinstance(task_id, str) and self.get(task_id) is not None
+
+    @property
+    def memory_bytes(self) -> int:
+        """Serialised size of the tasks held in process memory."""
+        return 0
+
+    def flush(self) -> None:
+        """Block until every `put()` so far is durable."""
+
+    def close(self) -> None:
+        pass
+
+
+class InMemoryTaskStore(TaskStore):
+    """LRU + TTL task store with a task-count and byte ceiling."""
+
+    def __init__(
+        self,
+        max_tasks: int = 10_000,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 3600.0,
+    ) -> None:
+        self.max_tasks = max(1, max_tasks)
+        self.max_bytes = max(1, max_bytes)
+        self.ttl = ttl
+        self._tasks: "OrderedDict[str, A2ATask]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        # Terminal tasks only, in the order they finished → TTL expiry is a prefix scan.
+        self._finished_at: Dict[str, float] = {}
+        self._bytes = 0
+        self.evicted = 0
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, task_id: str) -> Optional[A2ATask]:
+        task = self._tasks.get(task_id)
+        if task is None:
+            return None
+        finished = self._finished_at.get(task_id)
+        if finished is not None and time.monotonic() - finished > self.ttl:
+            self._remove(task_id)
+            self.evicted += 1
+            return None
+        self._tasks.move_to_end(task_id)
+        return task
+
+    def put(self, task: A2ATask) -> None:
+        tid = task.task_id
+        size = len(_encode(task))
+        self._bytes += size - self._sizes.get(tid, 0)
+        self._sizes[tid] = size
+        self._tasks[tid] = task
+        self._tasks.move_to_end(tid)
+        if task.is_terminal:
+            self._finished_at.setdefault(tid, time.monotonic())
+        else:
+            self._finished_at.pop(tid, None)  # re-opened by a follow-up send
+        self._enforce()
+
+    def delete(self, task_id: str) -> None:
+        if task_id in self._tasks:
+            self._remove(task_id)
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def _remove(self, task_id: str) -> None:
+        del self._tasks[task_id]
+        self._bytes -= self._sizes.pop(task_id, 0)
+        self._finished_at.pop(task_id, None)
+
+    def _enforce(self) -> None:
+        cutoff = time.monotonic() - self.ttl
+        expired = []
+        for tid, finished in self._finished_at.items():
+            if finished >= cutoff:
+                break
+            expired.append(tid)
+        for tid in expired:
+            self._remove(tid)
+        self.evicted += len(expired)
+
+        excess_tasks = len(self._tasks) - self.max_tasks
+        excess_bytes = self._bytes - self.max_bytes
+        if excess_tasks <= 0 and excess_bytes <= 0:
+            return
+        victims = []
+        for tid in self._tasks:  # least recently used first
+            if tid not in self._finished_at:
+                continue
+            victims.append(tid)
+            excess_tasks -= 1
+            excess_bytes -= self._sizes[tid]
+            if excess_tasks <= 0 and excess_bytes <= 0:
+                break
+        for tid in victims:
+            self._remove(tid)
+        self.evicted += len(victims)
+        if excess_tasks > 0 or excess_bytes > 0:
+            logger.warning(
+                "A2A task store over its ceiling with only live tasks left (%d tasks, %d bytes)",
+                len(self._tasks), self._bytes,
+            )
+
+
+# (state, finished_at, body) to upsert, or None to delete
+_Row = Optional[Tuple[str, Optional[float], str]]
+
+
+class SQLiteTaskStore(TaskStore):
+    """Durable task store: SQLite file plus a bounded in-memory cache."""
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = 7 * 24 * 3600.0,
+        cache: Optional[InMemoryTaskStore] = None,
+        purge_every: int = 500,
+    ) -> None:
+        self.path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.ttl = ttl
+        self._cache = cache or InMemoryTaskStore(ttl=ttl)
+        self._purge_every = max(1, purge_every)
+        self._puts = 0
+        self._purge_due = True  # once at startup, then every `purge_every` puts
+        # Latest row per task not yet committed; guarded by `_lock`.
+        self._pending: Dict[str, _Row] = {}
+        self._lock = threading.Lock()
+        # Held for every use of the connection, and across a whole batch so
+        # batches commit in the order they were taken.
+        self._db_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS a2a_tasks ("
+            " id TEXT PRIMARY KEY, state TEXT NOT NULL,"
+            " finished_at REAL, body TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS a2a_tasks_finished ON a2a_tasks (finished_at)"
+        )
+        self._conn.commit()
+        self._rows = self._conn.execute("SELECT COUNT(*) FROM a2a_tasks").fetchone()[0]
+        self._writer = threading.Thread(target=self._run, name="oflo-a2a-task-store", daemon=True)
+        self._writer.start()
+        self._fail_interrupted()
+        self.flush()
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._cache.memory_bytes
+
+    def get(self, task_id: str) -> Optional[A2ATask]:
+        task = self._cache.get(task_id)
+        if task is not None:
+            return task
+        with self._lock:
+            pending = task_id in self._pending
+            row = self._pending.get(task_id)
+        if pending:
+            body = row[2] if row is not None else None
+        else:
+            with self._db_lock:
+                found = self._conn.execute(
+                    "SELECT body, finished_at FROM a2a_tasks WHERE id = ?", (task_id,)
+                ).fetchone()
+            expired = found is not None and found[1] is not None and found[1] < time.time() - self.ttl
+            body = found[0] if found is not None and not expired else None
+        if body is None:
+            return None
+        task = A2ATask.from_dict(serialization.loads(body))
+        self._cache.put(task)
+        return task
+
+    def put(self, task: A2ATask) -> None:
+        self._cache.put(task)
+        row = (task.status.state, time.time() if task.is_terminal else None, _encode(task))
+        with self._lock:
+            self._pending[task.task_id] = row
+            self._puts += 1
+            if self._puts % self._purge_every == 0:
+                self._purge_due = True
+        self._wakeup.set()
+
+    def delete(self, task_id: str) -> None:
+        self._cache.delete(task_id)
+        with self._lock:
+            self._pending[task_id] = None
+        self._wakeup.set()
+
+    def __len__(self) -> int:
+        # Committed rows; trails the writer by at most one batch.
+        return self._rows
+
+    def flush(self) -> None:
+        self._write_pending()
+
+    def close(self) -> None:
+        self._closed = True
+        self._wakeup.set()
+        self._writer.join()
+        self._write_pending()
+        with self._db_lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Writer
+    # ------------------------------------------------------------------
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            self._write_pending()
+
+    def _write_pending(self) -> None:
+        with self._db_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                purge, self._purge_due = self._purge_due, False
+            if not batch and not purge:
+                return
+            upserts = [(tid,) + row for tid, row in batch.items() if row is not None]
+            deletes = [(tid,) for tid, row in batch.items() if row is None]
+            try:
+                existing = self._existing([row[0] for row in upserts])
+                self._conn.executemany(
+                    "INSERT INTO a2a_tasks (id, state, finished_at, body) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT(id) DO UPDATE SET state = excluded.state, body = excluded.body,"
+                    " finished_at = CASE WHEN excluded.finished_at IS NULL THEN NULL"
+                    "  ELSE COALESCE(a2a_tasks.finished_at, excluded.finished_at) END",
+                    upserts,
+                )
+                removed = self._conn.executemany(
+                    "DELETE FROM a2a_tasks WHERE id = ?", deletes
+                ).rowcount if deletes else 0
+                if purge:
+                    removed += self._conn.execute(
+                        "DELETE FROM a2a_tasks WHERE finished_at IS NOT NULL AND finished_at < ?",
+                        (time.time() - self.ttl,),
+                    ).rowcount
+                self._conn.commit()
+            except sqlite3.Error:
+                logger.exception("A2A task store write failed — will retry %d rows", len(batch))
+                self._conn.rollback()
+                with self._lock:
+                    for tid, row in batch.items():
+                        self._pending.setdefault(tid, row)
+                    self._purge_due = self._purge_due or purge
+                return
+            self._rows += len(upserts) - existing - removed
+
+    def _existing(self, ids: List[str]) -> int:
+        count = 0
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            count += self._conn.execute(
+                f"SELECT COUNT(*) FROM a2a_tasks WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchone()[0]
+        return count
+
+    def _fail_interrupted(self) -> None:
+        """Tasks left running by a previous process will never finish: mark them failed."""
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT body FROM a2a_tasks WHERE finished_at IS NULL"
+            ).fetchall()
+        for (body,) in rows:
+            task = A2ATask.from_dict(serialization.loads(body))
+            task.status = TaskStatusUpdate(
+                state="failed",
+                message=A2AMessage.text_message(role="agent", text="Interrupted by server restart"),
+            )
+            self.put(task)
+        if rows:
+            logger.info("Marked %d interrupted A2A tasks as failed", len(rows))
@@ -42,6 +42,18 @@ class AgentSkill:
             "outputModes": self.output_modes,
         }
 
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "AgentSkill":
+        return cls(
+            id=d.get("id", ""),
+            name=d.get("name", ""),
+            description=d.get("description", ""),
+            tags=list(d.get("tags") or []),
+            examples=list(d.get("examples") or []),
+            input_modes=list(d.get("inputModes") or ["text"]),
+            output_modes=list(d.get("outputModes") or ["text"]),
+        )
+
 
 @dataclass
 class AgentCard:
@@ -80,11 +92,29 @@ class AgentCard:
             d["provider"] = self.provider
         return d
 
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "AgentCard":
+        return cls(
+            name=d.get("name", ""),
+            description=d.get("description", ""),
+            url=d.get("url", ""),
+            version=d.get("version", "1.0.0"),
+            skills=[AgentSkill.from_dict(s) for s in d.get("skills") or []],
+            default_input_modes=list(d.get("defaultInputModes") or ["text"]),
+            default_output_modes=list(d.get("defaultOutputModes") or ["text"]),
+            documentation_url=d.get("documentationUrl"),
+            provider=d.get("provider"),
+            capabilities=dict(d.get("capabilities") or {}),
+        )
+
 
 # ---------------------------------------------------------------------------
 # Task & Artifact
 # ---------------------------------------------------------------------------
 
+TERMINAL_STATES = ("completed", "failed", "canceled")
+
+
 @dataclass
 class TextPart:
     text: str
@@ -103,6 +133,17 @@ class DataPart:
         return {"type": "data", "data": self.data, "mimeType": self.mime_type}
 
 
+def part_from_dict(d: Any) -> Any:
+    """Inverse of `TextPart.to_dict` / `DataPart.to_dict`; unknown parts pass through."""
+    if not isinstance(d, dict):
+        return d
+    if d.get("type") == "text":
+        return TextPart(text=d.get("text", ""), mime_type=d.get("mimeType", "text/plain"))
+    if d.get("type") == "data":
+        return DataPart(data=d.get("data") or {}, mime_type=d.get("mimeType", "application/json"))
+    return d
+
+
 @dataclass
 class A2AMessage:
     role: str  # "user" | "agent"
@@ -131,6 +172,14 @@ class A2AMessage:
     def text_message(cls, role: str, text: str) -> "A2AMessage":
         return cls(role=role, parts=[TextPart(text=text)])
 
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "A2AMessage":
+        msg = cls(role=d.get("role", "agent"), parts=[part_from_dict(p) for p in d.get("parts", [])])
+        msg.message_id = d.get("messageId") or msg.message_id
+        msg.timestamp = d.get("timestamp") or msg.timestamp
+        msg.metadata = d.get("metadata") or {}
+        return msg
+
 
 @dataclass
 class Artifact:
@@ -153,6 +202,19 @@ class Artifact:
             "lastChunk": self.last_chunk,
         }
 
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Artifact":
+        art = cls(
+            name=d.get("name", ""),
+            parts=[part_from_dict(p) for p in d.get("parts", [])],
+            description=d.get("description"),
+            index=d.get("index", 0),
+            append=d.get("append", False),
+            last_chunk=d.get("lastChunk", True),
+        )
+        art.artifact_id = d.get("artifactId") or art.artifact_id
+        return art
+
 
 @dataclass
 class TaskStatusUpdate:
@@ -166,6 +228,14 @@ class TaskStatusUpdate:
             d["message"] = self.message.to_dict()
         return d
 
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "TaskStatusUpdate":
+        status = cls(state=d.get("state", "submitted"))
+        if d.get("message"):
+            status.message = A2AMessage.from_dict(d["message"])
+        status.timestamp = d.get("timestamp") or status.timestamp
+        return status
+
 
 @dataclass
 class A2ATask:
@@ -179,6 +249,21 @@ class A2ATask:
     metadata: Dict[str, Any] = field(default_factory=dict)
 
     def to_dict(self) -> Dict[str, Any]:
+        """
+        Wire form of the task.  A finished task no longer changes, so its
+        dict is built once and reused (treat it as read-only); any new
+        status, message or artifact rebuilds it.
+        """
+        if not self.is_terminal:
+            return self._build_dict()
+        key = (id(self.status), id(self.status.message), self.status.timestamp,
+               len(self.history), len(self.artifacts))
+        cached = self.__dict__.get("_dict_cache")
+        if cached is None or cached[0] != key:
+            cached = self.__dict__["_dict_cache"] = (key, self._build_dict())
+        return cached[1]
+
+    def _build_dict(self) -> Dict[str, Any]:
         return {
             "id": self.task_id,
             "sessionId": self.session_id,
@@ -188,6 +273,45 @@ class A2ATask:
             "metadata": self.metadata,
         }
 
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "A2ATask":
+        task = cls(
+            session_id=d.get("sessionId"),
+            status=TaskStatusUpdate.from_dict(d.get("status") or {}),
+            history=[A2AMessage.from_dict(m) for m in d.get("history", [])],
+            artifacts=[Artifact.from_dict(a) for a in d.get("artifacts", [])],
+            metadata=d.get("metadata") or {},
+        )
+        task.task_id = d.get("id") or task.task_id
+        return task
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.status.state in TERMINAL_STATES
+
+
+@dataclass
+class PushNotificationConfig:
+    """Webhook a server POSTs a task's status transitions to."""
+    url: str
+    token: Optional[str] = None
+    authentication: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        d: Dict[str, Any] = {"url": self.url}
+        if self.token:
+            d["token"] = self.token
+        if self.authentication:
+            d["authentication"] = self.authentication
+        return d
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "PushNotificationConfig":
+        url = (d or {}).get("url") or ""
+        if not url.startswith(("http://", "https://")):
+            raise ValueError(f"Push notification url must be http(s), got {url!r}")
+        return cls(url=url, token=d.get("token"), authentication=d.get("authentication"))
+
 
 # ---------------------------------------------------------------------------
 # JSON-RPC 2.0 envelopes
@@ -221,7 +345,9 @@ A2A_ERRORS = {
     "task_not_cancelable": (-32002, "Task not cancelable"),
     "push_not_supported": (-32003, "Push notifications not supported"),
     "unsupported_operation": (-32004, "Unsupported operation"),
+    "server_busy": (-32000, "Server busy"),
     "internal_error": (-32603, "Internal error"),
     "invalid_params": (-32602, "Invalid params"),
     "method_not_found": (-32601, "Method not found"),
+    "invalid_request": (-32600, "Invalid Request"),
 }
@@ -9,6 +9,7 @@ Endpoints:
   POST /tools/call          → execute a tool
   POST /messages            → send a chat message to the agent
   GET  /health              → health check
+  GET  /metrics             → OpenMetrics exposition (Prometheus scrape target)
 """
 from __future__ import annotations
 
@@ -20,9 +21,17 @@ import uuid
 from typing import Any, Dict, List, Optional
 
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 import uvicorn
 
+from oflo_agent_protocol.audit.metrics import (
+    OPENMETRICS_CONTENT_TYPE,
+    MetricsRegistry,
+    get_metrics_registry,
+)
+from oflo_agent_protocol.audit.tracing import SpanContext, get_tracer
+from oflo_agent_protocol.protocols.responses import FastJSONResponse
+
 logger = logging.getLogger(__name__)
 
 
@@ -42,12 +51,14 @@ class MCPServer:
         version: str = "1.0.0",
         host: str = "0.0.0.0",
         port: int = 8080,
+        metrics: Optional[MetricsRegistry] = None,
     ) -> None:
         self._name = name
         self._version = version
         self._host = host
         self._port = port
         self._agents: Dict[str, Any] = {}  # name → BaseAgentV2
+        self._metrics = metrics or get_metrics_registry()
         self._app = self._build_app()
 
     # ------------------------------------------------------------------
@@ -67,28 +78,37 @@ class MCPServer:
     # ------------------------------------------------------------------
 
     def _build_app(self) -> FastAPI:
-        app = FastAPI(title=f"MCP: {self._name}", docs_url=None, redoc_url=None)
+        app = FastAPI(
+            title=f"MCP: {self._name}",
+            docs_url=None,
+            redoc_url=None,
+            default_response_class=FastJSONResponse,
+        )
 
         @app.get("/")
-        async def server_info() -> JSONResponse:
-            return JSONResponse(content=self._server_capabilities())
+        async def server_info() -> FastJSONResponse:
+            return FastJSONResponse(content=self._server_capabilities())
 
         @app.get("/health")
-        async def health() -> JSONResponse:
-            return JSONResponse(content={
+        async def health() -> FastJSONResponse:
+            return FastJSONResponse(content={
                 "status": "healthy",
                 "timestamp": time.time(),
                 "agents": list(self._agents.keys()),
             })
 
+        @app.get("/metrics")
+        async def metrics() -> Response:
+            return Response(content=self._metrics.render(), media_type=OPENMETRICS_CONTENT_TYPE)
+
         @app.post("/")
-        async def jsonrpc_handler(request: Request) -> JSONResponse:
+        async def jsonrpc_handler(request: Request) -> FastJSONResponse:
             body = await request.json()
-            return await self._dispatch(body)
+            return await self._dispatch(body, parent=get_tracer().extract(request.headers))
 
         @app.get("/agents")
-        async def list_agents() -> JSONResponse:
-            return JSONResponse(content={
+        async def list_agents() -> FastJSONResponse:
+            return FastJSONResponse(content={
                 "agents": [
                     {"name": name, **agent.to_dict()}
                     for name, agent in self._agents.items()
@@ -101,7 +121,9 @@ class MCPServer:
     # JSON-RPC dispatch
     # ------------------------------------------------------------------
 
-    async def _dispatch(self, body: Dict[str, Any]) -> JSONResponse:
+    async def _dispatch(
+        self, body: Dict[str, Any], parent: Optional[SpanContext] = None
+    ) -> FastJSONResponse:
         req_id = body.get("id")
         method = body.get("method", "")
         params = body.get("params", {})
@@ -116,17 +138,18 @@ class MCPServer:
 
         handler = handlers.get(method)
         if handler is None:
-            return JSONResponse(content={
+            return FastJSONResponse(content={
                 "jsonrpc": "2.0", "id": req_id,
                 "error": {"code": -32601, "message": "Method not found", "data": method},
             })
 
         try:
-            result = await handler(params, req_id)
-            return JSONResponse(content=result)
+            with get_tracer().span(f"mcp.{method}", parent=parent, server=self._name):
+                result = await handler(params, req_id)
+            return FastJSONResponse(content=result)
         except Exception as exc:
             logger.exception("MCP handler error: %s", exc)
-            return JSONResponse(content={
+            return FastJSONResponse(content={
                 "jsonrpc": "2.0", "id": req_id,
                 "error": {"code": -32603, "message": str(exc)},
             })
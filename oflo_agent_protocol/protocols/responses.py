@@ -0,0 +1,15 @@
+"""FastAPI response classes shared by the MCP and A2A servers."""
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from oflo_agent_protocol.core import serialization
+
+
+class FastJSONResponse(JSONResponse):
+    """`JSONResponse` encoded with the fastest installed backend (see `core.serialization`)."""
+
+    def render(self, content: Any) -> bytes:
+        return serialization.dumps(content)
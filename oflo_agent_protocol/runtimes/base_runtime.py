@@ -17,8 +17,33 @@ class BaseRuntime(ABC):
     ───────────────────────────
     Runtimes MUST populate TokenUsage including cache_read/write_tokens
     when the provider supports it (Anthropic prompt caching).
+
+    Per-turn context
+    ────────────────
+    Runtimes that set `supports_system_context = True` accept a
+    `system_context=[...]` keyword on `complete()` / `stream()` and send
+    those blocks after the cached system prefix.  For every other runtime
+    the agent folds them into the end of `system` with `compose_system()`,
+    which keeps the stable prompt as the prefix for automatic prefix caches.
+
+    Streaming usage
+    ───────────────
+    Runtimes that set `supports_stream_usage = True` accept a `usage=`
+    keyword on `stream()` — a `TokenUsage` they fill in from the usage the
+    provider reports in the stream, so streamed turns are metered and costed
+    like `complete()` ones.
     """
 
+    supports_system_context: bool = False
+    supports_stream_usage: bool = False
+
+    @staticmethod
+    def compose_system(system: Optional[str], context: Optional[List[str]] = None) -> Optional[str]:
+        """`system` followed by the per-turn context blocks, as one string."""
+        if not context:
+            return system
+        return "\n\n".join([system, *context] if system else context)
+
     @property
     @abstractmethod
     def provider_name(self) -> str:
@@ -7,6 +7,7 @@ from typing import Any, AsyncIterator, Dict, List, Optional
 
 import anthropic
 
+from oflo_agent_protocol.audit.tracing import get_tracer
 from oflo_agent_protocol.core.message import CanonicalMessage, ToolCall
 from oflo_agent_protocol.core.types import MessageRole, TokenUsage
 from oflo_agent_protocol.runtimes.base_runtime import BaseRuntime
@@ -31,9 +32,14 @@ class ClaudeRuntime(BaseRuntime):
     ───────────────────────
     When `use_cache=True` (default), the system prompt is wrapped with
     a `cache_control` breakpoint.  This reduces cost by ~90 % on repeated
-    calls with the same system prompt (cache TTL = 5 min).
+    calls with the same system prompt (cache TTL = 5 min).  Per-turn
+    `system_context` blocks go after the breakpoint, so they never
+    invalidate the cached prefix.
     """
 
+    supports_system_context = True
+    supports_stream_usage = True
+
     def __init__(
         self,
         model_id: str = "claude-sonnet-4-6",
@@ -61,11 +67,14 @@ class ClaudeRuntime(BaseRuntime):
         tools: Optional[List[Dict[str, Any]]] = None,
         max_tokens: int = 4096,
         temperature: float = 0.7,
+        system_context: Optional[List[str]] = None,
         **kwargs: Any,
     ) -> tuple[CanonicalMessage, TokenUsage]:
-        anthropic_messages = self._to_anthropic_messages(messages)
-        system_param = self._build_system(system)
-        anthropic_tools = self._convert_tools(tools or [])
+        tracer = get_tracer()
+        with tracer.span("runtime.convert_history", messages=len(messages)):
+            anthropic_messages = self._to_anthropic_messages(messages)
+            system_param = self._build_system(system, system_context)
+            anthropic_tools = self._convert_tools(tools or [])
 
         params: Dict[str, Any] = dict(
             model=self.model_id,
@@ -78,11 +87,12 @@ class ClaudeRuntime(BaseRuntime):
         if anthropic_tools:
             params["tools"] = anthropic_tools
 
-        try:
-            response = await self._client.messages.create(**params)
-        except anthropic.APIStatusError as e:
-            logger.error("Anthropic API error: %s", e)
-            raise
+        with tracer.span("anthropic.messages.create", model=self.model_id):
+            try:
+                response = await self._client.messages.create(**params)
+            except anthropic.APIStatusError as e:
+                logger.error("Anthropic API error: %s", e)
+                raise
 
         msg = CanonicalMessage.from_anthropic_response(response)
         usage = self._parse_usage(response.usage)
@@ -95,10 +105,13 @@ class ClaudeRuntime(BaseRuntime):
         tools: Optional[List[Dict[str, Any]]] = None,
         max_tokens: int = 4096,
         temperature: float = 0.7,
+        system_context: Optional[List[str]] = None,
+        usage: Optional[TokenUsage] = None,
         **kwargs: Any,
     ) -> AsyncIterator[str]:
-        anthropic_messages = self._to_anthropic_messages(messages)
-        system_param = self._build_system(system)
+        with get_tracer().span("runtime.convert_history", messages=len(messages)):
+            anthropic_messages = self._to_anthropic_messages(messages)
+            system_param = self._build_system(system, system_context)
 
         params: Dict[str, Any] = dict(
             model=self.model_id,
@@ -110,8 +123,21 @@ class ClaudeRuntime(BaseRuntime):
             params["system"] = system_param
 
         async with self._client.messages.stream(**params) as stream:
-            async for text in stream.text_stream:
-                yield text
+            async for event in stream:
+                if event.type == "text":
+                    yield event.text
+                elif usage is None:
+                    continue
+                elif event.type == "message_start":
+                    # Input and cache tokens; output so far
+                    start = self._parse_usage(event.message.usage)
+                    usage.prompt_tokens = start.prompt_tokens
+                    usage.completion_tokens = start.completion_tokens
+                    usage.cache_read_tokens = start.cache_read_tokens
+                    usage.cache_write_tokens = start.cache_write_tokens
+                elif event.type == "message_delta":
+                    # Cumulative output tokens for the message
+                    usage.completion_tokens = getattr(event.usage, "output_tokens", 0) or usage.completion_tokens
 
     async def health_check(self) -> bool:
         try:
@@ -128,18 +154,19 @@ class ClaudeRuntime(BaseRuntime):
     # Helpers
     # ------------------------------------------------------------------
 
-    def _build_system(self, system: Optional[str]) -> Any:
-        if not system:
-            return None
-        if self.use_cache:
-            return [
-                {
-                    "type": "text",
-                    "text": system,
-                    "cache_control": {"type": "ephemeral"},
-                }
-            ]
-        return system
+    def _build_system(self, system: Optional[str], context: Optional[List[str]] = None) -> Any:
+        if not self.use_cache:
+            return self.compose_system(system, context) or None
+        blocks: List[Dict[str, Any]] = []
+        if system:
+            blocks.append({
+                "type": "text",
+                "text": system,
+                "cache_control": {"type": "ephemeral"},
+            })
+        # Per-turn blocks sit after the breakpoint: uncached, prefix untouched
+        blocks.extend({"type": "text", "text": block} for block in context or () if block)
+        return blocks or None
 
     def _to_anthropic_messages(self, messages: List[CanonicalMessage]) -> List[Dict[str, Any]]:
         out = []
@@ -7,6 +7,7 @@ from typing import Any, AsyncIterator, Dict, List, Optional
 
 import openai
 
+from oflo_agent_protocol.audit.tracing import get_tracer
 from oflo_agent_protocol.core.message import CanonicalMessage, ToolCall
 from oflo_agent_protocol.core.types import MessageRole, TokenUsage
 from oflo_agent_protocol.runtimes.base_runtime import BaseRuntime
@@ -17,6 +18,8 @@ logger = logging.getLogger(__name__)
 class OpenAIRuntime(BaseRuntime):
     """OpenAI Chat Completions runtime with tool-call support."""
 
+    supports_stream_usage = True
+
     def __init__(
         self,
         model_id: str = "gpt-4o-mini",
@@ -42,7 +45,9 @@ class OpenAIRuntime(BaseRuntime):
         temperature: float = 0.7,
         **kwargs: Any,
     ) -> tuple[CanonicalMessage, TokenUsage]:
-        oai_messages = self._build_messages(messages, system)
+        tracer = get_tracer()
+        with tracer.span("runtime.convert_history", messages=len(messages)):
+            oai_messages = self._build_messages(messages, system)
 
         params: Dict[str, Any] = dict(
             model=self.model_id,
@@ -54,11 +59,12 @@ class OpenAIRuntime(BaseRuntime):
             params["tools"] = tools
             params["tool_choice"] = "auto"
 
-        try:
-            response = await self._client.chat.completions.create(**params)
-        except openai.APIStatusError as e:
-            logger.error("OpenAI API error: %s", e)
-            raise
+        with tracer.span("openai.chat.completions.create", model=self.model_id):
+            try:
+                response = await self._client.chat.completions.create(**params)
+            except openai.APIStatusError as e:
+                logger.error("OpenAI API error: %s", e)
+                raise
 
         choice = response.choices[0].message
         tool_calls: List[ToolCall] = []
@@ -90,6 +96,7 @@ class OpenAIRuntime(BaseRuntime):
         tools: Optional[List[Dict[str, Any]]] = None,
         max_tokens: int = 4096,
         temperature: float = 0.7,
+        usage: Optional[TokenUsage] = None,
         **kwargs: Any,
     ) -> AsyncIterator[str]:
         oai_messages = self._build_messages(messages, system)
@@ -100,10 +107,16 @@ class OpenAIRuntime(BaseRuntime):
             temperature=temperature,
             stream=True,
         )
+        if usage is not None:
+            # The last chunk then carries the usage, with no choices
+            params["stream_options"] = {"include_usage": True}
 
         async with self._client.chat.completions.stream(**params) as stream:
             async for chunk in stream:
-                delta = chunk.choices[0].delta.content
+                if usage is not None and getattr(chunk, "usage", None):
+                    usage.prompt_tokens = chunk.usage.prompt_tokens or 0
+                    usage.completion_tokens = chunk.usage.completion_tokens or 0
+                delta = chunk.choices[0].delta.content if chunk.choices else None
                 if delta:
                     yield delta
 
@@ -23,6 +23,7 @@ from typing import Any, AsyncIterator, Dict, List, Optional
 
 import openai
 
+from oflo_agent_protocol.audit.tracing import get_tracer
 from oflo_agent_protocol.core.message import CanonicalMessage, ToolCall
 from oflo_agent_protocol.core.types import MessageRole, TokenUsage
 from oflo_agent_protocol.runtimes.base_runtime import BaseRuntime
@@ -75,6 +76,8 @@ class OpenRouterRuntime(BaseRuntime):
         )
     """
 
+    supports_stream_usage = True
+
     def __init__(
         self,
         model_id: str = "anthropic/claude-sonnet-4-6",
@@ -160,14 +163,17 @@ class OpenRouterRuntime(BaseRuntime):
         temperature: float = 0.7,
         **kwargs: Any,
     ) -> tuple[CanonicalMessage, TokenUsage]:
-        oai_messages = self._build_messages(messages, system)
+        tracer = get_tracer()
+        with tracer.span("runtime.convert_history", messages=len(messages)):
+            oai_messages = self._build_messages(messages, system)
         params = self._build_params(oai_messages, tools, max_tokens, temperature, **kwargs)
 
-        try:
-            response = await self._client.chat.completions.create(**params)
-        except openai.APIStatusError as exc:
-            logger.error("OpenRouter error: %s", exc)
-            raise
+        with tracer.span("openrouter.chat.completions.create", model=self.model_id):
+            try:
+                response = await self._client.chat.completions.create(**params)
+            except openai.APIStatusError as exc:
+                logger.error("OpenRouter error: %s", exc)
+                raise
 
         choice = response.choices[0].message
         tool_calls: List[ToolCall] = []
@@ -207,13 +213,20 @@ class OpenRouterRuntime(BaseRuntime):
         tools: Optional[List[Dict[str, Any]]] = None,
         max_tokens: int = 4096,
         temperature: float = 0.7,
+        usage: Optional[TokenUsage] = None,
         **kwargs: Any,
     ) -> AsyncIterator[str]:
         oai_messages = self._build_messages(messages, system)
         params = self._build_params(oai_messages, tools, max_tokens, temperature, stream=True, **kwargs)
+        if usage is not None:
+            # The last chunk then carries the usage, with no choices
+            params["stream_options"] = {"include_usage": True}
 
         async with self._client.chat.completions.stream(**params) as stream:
             async for chunk in stream:
+                if usage is not None and getattr(chunk, "usage", None):
+                    usage.prompt_tokens = chunk.usage.prompt_tokens or 0
+                    usage.completion_tokens = chunk.usage.completion_tokens or 0
                 delta = chunk.choices[0].delta.content if chunk.choices else None
                 if delta:
                     yield delta
@@ -4,6 +4,8 @@ from typing import List, Dict, Any, Optional, Tuple, Union
 import numpy as np
 from dataclasses import dataclass
 
+from oflo_agent_protocol.memory.embeddings import EmbeddingService
+
 # Vector RAG components
 @dataclass
 class Document:
@@ -60,6 +62,7 @@ class ShapRAG:
     def __init__(self, vector_store: VectorStore, embedding_model: Any):
         self.vector_store = vector_store
         self.embedding_model = embedding_model
+        self.embeddings = _as_service(embedding_model)
         self.logger = logging.getLogger("shap_rag")
     
     async def query(self, query: str, top_k: int = 5, num_samples: int = 20) -> Dict[str, Any]:
@@ -84,7 +87,7 @@ class ShapRAG:
         
         # Calculate SHAP values
         documents = [doc for doc, _ in results]
-        shap_values = await self._calculate_shap_values(query, documents, num_samples)
+        shap_values = await self._calculate_shap_values(query_embedding, documents, num_samples)
         
         return {
             "documents": [{"id": doc.id, "content": doc.content, "metadata": doc.metadata} for doc in documents],
@@ -93,17 +96,15 @@ class ShapRAG:
         }
     
     async def _get_embedding(self, text: str) -> np.ndarray:
-        """Get embedding for text using the embedding model."""
-        # This is a placeholder - implement based on your embedding model
+        """Get embedding for text via the shared (batched, cached) embedding service."""
         try:
-            embedding = self.embedding_model.embed(text)
-            return embedding
+            return np.frombuffer(await self.embeddings.embed(text), dtype=np.float32)
         except Exception as e:
             self.logger.error(f"Error generating embedding: {e}")
             # Return a zero vector as fallback
             return np.zeros(self.vector_store.embedding_dim)
     
-    async def _calculate_shap_values(self, query: str, documents: List[Document], num_samples: int) -> List[float]:
+    async def _calculate_shap_values(self, query_embedding: np.ndarray, documents: List[Document], num_samples: int) -> List[float]:
         """
         Calculate SHAP values for documents using permutation sampling.
         
@@ -116,6 +117,12 @@ class ShapRAG:
         n = len(documents)
         shap_values = [0.0] * n
         
+        # Query/document similarities don't depend on the subset — compute once
+        similarities = [
+            self.vector_store._cosine_similarity(query_embedding, doc.embedding)
+            for doc in documents
+        ]
+        
         # Generate random permutations for sampling
         for _ in range(num_samples):
             # Random permutation of document indices
@@ -125,10 +132,10 @@ class ShapRAG:
             prev_score = 0
             for i, idx in enumerate(perm):
                 # Subset of documents up to and including current document
-                subset_docs = [documents[perm[j]] for j in range(i+1)]
+                subset = [similarities[perm[j]] for j in range(i+1)]
                 
                 # Calculate utility score for this subset
-                current_score = await self._calculate_utility(query, subset_docs)
+                current_score = self._calculate_utility(subset)
                 
                 # Marginal contribution is the difference in utility
                 marginal = current_score - prev_score
@@ -139,20 +146,16 @@ class ShapRAG:
         shap_values = [val / num_samples for val in shap_values]
         return shap_values
     
-    async def _calculate_utility(self, query: str, documents: List[Document]) -> float:
+    def _calculate_utility(self, similarities: List[float]) -> float:
         """
-        Calculate utility of a set of documents for answering the query.
+        Calculate utility of a set of documents for answering the query,
+        given each document's similarity to the query.
         This is a placeholder - implement based on your specific needs.
         """
-        if not documents:
+        if not similarities:
             return 0.0
         
         # Simple implementation: average similarity to query
-        query_embedding = await self._get_embedding(query)
-        similarities = [
-            self.vector_store._cosine_similarity(query_embedding, doc.embedding)
-            for doc in documents
-        ]
         return sum(similarities) / len(similarities)
 
 
@@ -248,6 +251,7 @@ class GraphRAG:
     def __init__(self, knowledge_graph: KnowledgeGraph, embedding_model: Any):
         self.knowledge_graph = knowledge_graph
         self.embedding_model = embedding_model
+        self.embeddings = _as_service(embedding_model)
         self.logger = logging.getLogger("graph_rag")
     
     async def query(self, query: str, top_k: int = 5, max_hops: int = 2) -> Dict[str, Any]:
@@ -283,11 +287,9 @@ class GraphRAG:
         }
     
     async def _get_embedding(self, text: str) -> np.ndarray:
-        """Get embedding for text using the embedding model."""
-        # This is a placeholder - implement based on your embedding model
+        """Get embedding for text via the shared (batched, cached) embedding service."""
         try:
-            embedding = self.embedding_model.embed(text)
-            return embedding
+            return np.frombuffer(await self.embeddings.embed(text), dtype=np.float32)
         except Exception as e:
             self.logger.error(f"Error generating embedding: {e}")
             # Return a zero vector as fallback
@@ -349,3 +351,10 @@ class GraphRAG:
     def _cosine_similarity(self, a: np.ndarray, b: np.ndarray) -> float:
         """Calculate cosine similarity between two vectors."""
         return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+
+
+def _as_service(embedding_model: Any) -> EmbeddingService:
+    """Wrap a raw embedding model so every pipeline gets batching and caching."""
+    if isinstance(embedding_model, EmbeddingService):
+        return embedding_model
+    return EmbeddingService(embedding_model)
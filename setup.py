@@ -50,12 +50,18 @@ setup(
             "langchain-openai>=0.1.0",
             "langgraph>=0.1.0",
             "weaviate-client>=4.5.0",
+            "numpy>=1.24.0",
+            "orjson>=3.9.0",
+            "jsonschema>=4.0.0",
         ],
         "anthropic": ["anthropic>=0.37.0"],
         "openai": ["openai>=1.30.0"],
         "composio": ["composio>=0.7.0"],
         "voice": ["elevenlabs>=1.0.0", "pyaudio>=0.2.14"],
         "daytona": ["daytona>=0.1.0"],
+        "vector": ["numpy>=1.24.0"],
+        "json": ["orjson>=3.9.0"],
+        "schema": ["jsonschema>=4.0.0"],
         "langchain": [
             "langchain>=0.2.0",
             "langchain-core>=0.2.0",
@@ -3,12 +3,24 @@ from __future__ import annotations
 
 import tempfile
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 
 from oflo_agent_protocol.audit.audit_logger import AuditLogger
-from oflo_agent_protocol.audit.guardrails import GuardrailConfig, Guardrails, GuardrailResult
-from oflo_agent_protocol.audit.telemetry import Telemetry
+from oflo_agent_protocol.audit.guardrails import (
+    GuardrailConfig,
+    Guardrails,
+    GuardrailResult,
+    StreamingGuardrails,
+    _KeywordMatcher,
+    compile_guardrails,
+)
+from oflo_agent_protocol.audit.metrics import MetricsRegistry
+from oflo_agent_protocol.audit.schema_validation import SchemaCompileError, compile_schema
+from oflo_agent_protocol.audit import tracing
+from oflo_agent_protocol.audit.telemetry import Telemetry, timed_call
+from oflo_agent_protocol.audit.tracing import InMemorySpanExporter, SpanContext, Tracer
 from oflo_agent_protocol.core.message import CanonicalMessage
 from oflo_agent_protocol.core.types import AuditRecord, ModelProvider, TokenUsage
 
@@ -38,6 +50,17 @@ class TestAuditLogger:
         assert len(results) == 1
         assert results[0]["agent_name"] == "TestAgent"
 
+    @pytest.mark.asyncio
+    async def test_unencodable_record_is_logged_not_raised(self, logger):
+        loop = {}
+        loop["self"] = loop
+        rec = AuditRecord(agent_id="a", agent_name="A", project_id="test-proj",
+                          provider="anthropic", model="m", metadata={"loop": loop})
+        await logger.log(rec)  # must not fail the turn
+        rec.metadata = {"big": 2**70}
+        await logger.log(rec)
+        assert [r["metadata"] for r in await logger.query()] == [{"big": 2**70}]
+
     @pytest.mark.asyncio
     async def test_summary(self, logger):
         for i in range(3):
@@ -126,6 +149,231 @@ class TestTelemetry:
         assert "cost_budget_exceeded" in alerts
 
 
+    @pytest.mark.asyncio
+    async def test_record_exports_metrics(self):
+        reg = MetricsRegistry()
+        tel = Telemetry(registry=reg)
+        rec = AuditRecord(
+            agent_id="a1", agent_name="Bot", project_id="proj",
+            provider="anthropic", model="claude-haiku-4-5-20251001",
+            token_usage=TokenUsage(prompt_tokens=100, completion_tokens=50),
+            cost_usd=0.5, latency_ms=120.0, success=False,
+        )
+        await tel.record(rec)
+        text = reg.render()
+        labels = 'project="proj",agent="Bot",provider="anthropic",model="claude-haiku-4-5-20251001",outcome="error"'
+        assert f"oflo_llm_calls_total{{{labels}}} 1" in text
+        assert f"oflo_llm_prompt_tokens_total{{{labels}}} 100" in text
+        assert f"oflo_llm_latency_ms_count{{{labels}}} 1" in text
+
+
+# ── Metrics ───────────────────────────────────────────────────────────────────
+
+class TestMetrics:
+    def test_counter_render(self):
+        reg = MetricsRegistry()
+        c = reg.counter("jobs", "Jobs processed", ["queue"])
+        c.labels("a").inc()
+        c.labels("a").inc(2)
+        c.labels("b").inc()
+        text = reg.render()
+        assert "# TYPE jobs counter" in text
+        assert 'jobs_total{queue="a"} 3' in text
+        assert 'jobs_total{queue="b"} 1' in text
+        assert text.endswith("# EOF\n")
+
+    def test_histogram_buckets_are_cumulative(self):
+        reg = MetricsRegistry()
+        h = reg.histogram("lat", "Latency", buckets=(10, 100))
+        for v in (5, 50, 500):
+            h.observe(v)
+        text = reg.render()
+        assert 'lat_bucket{le="10.0"} 1' in text
+        assert 'lat_bucket{le="100.0"} 2' in text
+        assert 'lat_bucket{le="+Inf"} 3' in text
+        assert "lat_count 3" in text
+        assert "lat_sum 555" in text
+
+    def test_cardinality_is_bounded(self):
+        reg = MetricsRegistry()
+        c = reg.counter("req", "Requests", ["user"], max_series=2)
+        for i in range(10):
+            c.labels(f"u{i}").inc()
+        text = reg.render()
+        assert 'req_total{user="__overflow__"} 8' in text
+        assert text.count("req_total{") == 3
+
+    def test_threads_write_to_separate_shards(self):
+        import threading
+        reg = MetricsRegistry()
+        c = reg.counter("hits", "Hits")
+
+        def work():
+            for _ in range(1000):
+                c.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert "hits_total 4000" in reg.render()
+
+    def test_gauge_function(self):
+        reg = MetricsRegistry()
+        g = reg.gauge("depth", "Queue depth")
+        g.set_function(lambda: 7)
+        assert "depth 7" in reg.render()
+
+    def test_gauge_functions_sum_and_unregister(self):
+        reg = MetricsRegistry()
+        g = reg.gauge("depth", "Queue depth", ["q"])
+        a, b = (lambda: 2), (lambda: 3)
+        g.set_function(a, "x")
+        g.set_function(b, "x")
+        assert 'depth{q="x"} 5' in reg.render()
+        g.remove_function(a, "x")
+        assert 'depth{q="x"} 3' in reg.render()
+        g.remove_function(b, "x")
+        assert 'q="x"' not in reg.render()
+        g.set_function(lambda: 1, "y")  # the freed slot is reused, zeroed
+        assert 'depth{q="y"} 1' in reg.render()
+
+    def test_gauge_holds_bound_methods_weakly(self):
+        import gc
+
+        class Queue:
+            def depth(self):
+                return 4
+
+        reg = MetricsRegistry()
+        q = Queue()
+        reg.gauge("depth", "Queue depth", ["q"]).set_function(q.depth, "x")
+        assert 'depth{q="x"} 4' in reg.render()
+        del q
+        gc.collect()
+        assert 'q="x"' not in reg.render()
+
+    def test_removed_series_slot_is_reused(self):
+        reg = MetricsRegistry()
+        c = reg.counter("hits", "Hits", ["route"], max_series=2)
+        c.labels("a").inc(5)
+        assert c.remove("a") and not c.remove("a")
+        c.labels("b").inc()
+        assert reg.render().count("hits_total") == 1 and 'hits_total{route="b"} 1' in reg.render()
+
+    def test_type_conflict_raises(self):
+        reg = MetricsRegistry()
+        reg.counter("x", "x")
+        with pytest.raises(ValueError):
+            reg.gauge("x", "x")
+
+
+# ── Tracing ───────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def span_exporter(monkeypatch):
+    exporter = InMemorySpanExporter()
+    monkeypatch.setattr(tracing, "_tracer", Tracer(exporter=exporter, sample_rate=1.0))
+    yield exporter
+
+
+class TestTracing:
+    def test_nested_spans_share_trace(self, span_exporter):
+        tracer = tracing.get_tracer()
+        with tracer.span("outer") as outer:
+            with tracer.span("inner", step=1) as inner:
+                pass
+        tracer.flush()
+        assert [s.name for s in span_exporter.spans] == ["inner", "outer"]
+        assert inner.context.trace_id == outer.context.trace_id
+        assert inner.parent_id == outer.context.span_id
+        assert inner.attributes["step"] == 1
+
+    def test_exception_marks_span(self, span_exporter):
+        tracer = tracing.get_tracer()
+        with pytest.raises(RuntimeError):
+            with tracer.span("boom"):
+                raise RuntimeError("bad")
+        tracer.flush()
+        assert span_exporter.spans[0].status == "error"
+
+    def test_zero_sample_rate_records_nothing(self):
+        exporter = InMemorySpanExporter()
+        tracer = Tracer(exporter=exporter, sample_rate=0.0)
+        with tracer.span("x") as span:
+            assert span.recording is False
+        tracer.flush()
+        assert exporter.spans == []
+
+    def test_unsampled_root_propagates_to_children(self):
+        exporter = InMemorySpanExporter()
+        tracer = Tracer(exporter=exporter, sample_rate=1.0)
+        parent = SpanContext(trace_id="a" * 32, span_id="b" * 16, sampled=False)
+        with tracer.span("remote-child", parent=parent) as span:
+            with tracer.span("grandchild") as child:
+                assert child.recording is False
+                assert child.context.trace_id == "a" * 32
+        tracer.flush()
+        assert exporter.spans == []
+
+    def test_traceparent_roundtrip(self):
+        ctx = SpanContext(trace_id="0af7651916cd43dd8448eb211c80319c", span_id="b7ad6b7169203331")
+        header = ctx.to_traceparent()
+        assert header == "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+        assert SpanContext.from_traceparent(header) == ctx
+        assert SpanContext.from_traceparent("garbage") is None
+
+    def test_inject_uses_current_span(self, span_exporter):
+        tracer = tracing.get_tracer()
+        headers = {}
+        with tracer.span("client") as span:
+            tracer.inject(headers)
+        assert headers["traceparent"] == span.context.to_traceparent()
+
+    @pytest.mark.asyncio
+    async def test_timed_call_emits_span(self, span_exporter):
+        async with timed_call("phase", kind="test") as data:
+            pass
+        tracing.get_tracer().flush()
+        assert data["latency_ms"] >= 0
+        assert span_exporter.spans[0].name == "phase"
+
+    @pytest.mark.asyncio
+    async def test_agent_stream_span_parents_runtime_and_audit(self, span_exporter):
+        from tests.conftest import StubRuntime
+        from oflo_agent_protocol.core.agent import BaseAgentV2
+
+        class TracedRuntime(StubRuntime):
+            async def stream(self, messages, system=None, tools=None, **kwargs):
+                with tracing.get_tracer().span("runtime.stream"):
+                    pass
+                yield "traced"
+
+        agent = BaseAgentV2(name="Traced", runtime=TracedRuntime())
+        outside = []
+        async for _ in agent.stream(CanonicalMessage.user("hello")):
+            outside.append(tracing.get_tracer().current_span().recording)
+        tracing.get_tracer().flush()
+        spans = {s.name: s for s in span_exporter.spans}
+        root = spans["agent.stream"].context.span_id
+        assert spans["runtime.stream"].parent_id == root
+        assert spans["audit.write"].parent_id == root
+        assert outside == [False]  # the consumer never runs inside the agent's span
+
+    @pytest.mark.asyncio
+    async def test_agent_turn_spans(self, span_exporter, agent):
+        await agent.chat("hello")
+        tracing.get_tracer().flush()
+        names = {s.name for s in span_exporter.spans}
+        assert {"agent.process", "agent.route", "runtime.complete",
+                "agent.guardrails", "audit.write"} <= names
+        root = next(s for s in span_exporter.spans if s.name == "agent.process")
+        assert all(
+            s.context.trace_id == root.context.trace_id for s in span_exporter.spans
+        )
+
+
 # ── Guardrails ────────────────────────────────────────────────────────────────
 
 class TestGuardrails:
@@ -190,3 +438,208 @@ class TestGuardrails:
         result = guardrails.check(msg, config)
         # No scrubbing — content unchanged
         assert result.scrubbed_content is None
+
+    def test_multiple_pii_types_redacted_in_one_pass(self, guardrails):
+        msg = CanonicalMessage.assistant("Mail a@b.io, call 555-123-4567, SSN 123-45-6789.")
+        config = GuardrailConfig(scrub_pii=True, block_pii=False)
+        result = guardrails.check(msg, config)
+        assert result.scrubbed_content == (
+            "Mail [EMAIL_REDACTED], call [PHONE_REDACTED], SSN [SSN_REDACTED]."
+        )
+        assert result.flags == ["pii:email", "pii:phone", "pii:ssn"]
+
+    @pytest.mark.parametrize("text", [
+        "reach 555-123-4567@example.com today",
+        "card 4111 1111 1111 1111, mail 4111111111111111@pay.io",
+        "Mail a@b.io, call 555-123-4567.",
+    ])
+    def test_overlapping_pii_is_flagged_like_separate_scans(self, guardrails, text):
+        from oflo_agent_protocol.audit.guardrails import _PII_PATTERNS
+
+        expected = [f"pii:{name}" for name, pattern in _PII_PATTERNS if pattern.search(text)]
+        result = guardrails.check(CanonicalMessage.assistant(text), GuardrailConfig(scrub_pii=True, block_pii=False))
+        assert sorted(result.flags) == sorted(expected)
+
+    def test_compiled_engine_is_cached(self):
+        a = compile_guardrails(GuardrailConfig(custom_blocks=["foo"]))
+        b = compile_guardrails(GuardrailConfig(custom_blocks=["foo"]))
+        c = compile_guardrails(GuardrailConfig(custom_blocks=["bar"]))
+        assert a is b
+        assert a is not c
+
+    @pytest.mark.parametrize("size", [3, 300])
+    def test_keyword_matcher_finds_overlapping_keywords(self, size):
+        keywords = {"he", "she", "hers", "his"} | {f"filler{i}" for i in range(size)}
+        matcher = _KeywordMatcher(frozenset(keywords))
+        assert matcher.find("ushers and filler1") == {"he", "she", "hers", "filler1"}
+
+
+    def test_nested_schema_violations_flagged(self, guardrails):
+        pytest.importorskip("jsonschema")
+        schema = {
+            "type": "object",
+            "required": ["items"],
+            "properties": {
+                "items": {
+                    "type": "array",
+                    "items": {"type": "object", "required": ["sku"], "properties": {"qty": {"type": "integer"}}},
+                },
+            },
+        }
+        msg = CanonicalMessage.assistant('{"items": [{"sku": "a", "qty": 1}, {"qty": "two"}]}')
+        result = guardrails.check(msg, GuardrailConfig(require_json=True, json_schema=schema))
+        assert result.flags == ["missing_required_key:items[1].sku", "schema:items[1].qty:type"]
+
+    def test_untyped_schema_still_requires_object(self, guardrails):
+        msg = CanonicalMessage.assistant("[1, 2]")
+        result = guardrails.check(msg, GuardrailConfig(require_json=True, json_schema={"required": ["id"]}))
+        assert result.flags == ["json_not_object"]
+
+    def test_without_jsonschema_only_top_level_required_is_checked(self, guardrails, monkeypatch):
+        from oflo_agent_protocol.audit import schema_validation
+
+        def missing():
+            raise ImportError("jsonschema")
+
+        monkeypatch.setattr(schema_validation, "_get_validator_class", missing)
+        monkeypatch.setattr(schema_validation, "_cache", type(schema_validation._cache)())
+        schema = {"type": "object", "required": ["id"], "properties": {"n": {"type": "integer"}}}
+        msg = CanonicalMessage.assistant('{"n": "x"}')
+        result = guardrails.check(msg, GuardrailConfig(require_json=True, json_schema=schema))
+        assert result.flags == ["missing_required_key:id"]
+
+    async def test_check_async_offloads_large_payloads(self):
+        config = GuardrailConfig(
+            require_json=True, json_schema={"type": "object", "required": ["id"]}, block_pii=False, scrub_pii=False
+        )
+        msg = CanonicalMessage.assistant('{"name": "' + "x" * 200 + '"}')
+        calls = []
+
+        class RecordingExecutor(ThreadPoolExecutor):
+            def submit(self, fn, *args, **kwargs):
+                calls.append(fn.__name__)
+                return super().submit(fn, *args, **kwargs)
+
+        with RecordingExecutor(max_workers=1) as pool:
+            result = await Guardrails(offload_threshold=100, executor=pool).check_async(msg, config)
+            small = await Guardrails(offload_threshold=10_000, executor=pool).check_async(msg, config)
+        assert calls == ["_check_text_in_worker"]
+        assert result.flags == small.flags == ["missing_required_key:id"]
+
+
+class TestSchemaValidation:
+    @pytest.fixture(autouse=True)
+    def _jsonschema(self):
+        pytest.importorskip("jsonschema")
+
+    def test_compiled_validator_is_cached(self):
+        assert compile_schema({"type": "string"}) is compile_schema({"type": "string"})
+
+    def test_keywords(self):
+        v = compile_schema({
+            "type": "object",
+            "properties": {
+                "name": {"type": "string", "minLength": 2, "pattern": "^[a-z]+$"},
+                "score": {"type": "number", "minimum": 0, "exclusiveMaximum": 1},
+                "tags": {"type": "array", "uniqueItems": True, "maxItems": 3},
+                "kind": {"enum": ["a", "b"]},
+            },
+            "additionalProperties": False,
+        })
+        assert v.is_valid({"name": "ok", "score": 0.5, "tags": ["x"], "kind": "a"})
+        errors = v.errors({"name": "A", "score": 1, "tags": [1, 1], "kind": "c", "extra": 0})
+        assert {(e.path, e.keyword) for e in errors} == {
+            ("name", "minLength"), ("name", "pattern"), ("score", "exclusiveMaximum"),
+            ("tags", "uniqueItems"), ("kind", "enum"), ("", "additionalProperties"),
+        }
+
+    @pytest.mark.parametrize("value, divisor", [(0.3, 0.1), (19.99, 0.01), (1e30, 0.1), (12, 3), (4.0, 2)])
+    def test_multiple_of_tolerates_float_rounding(self, value, divisor):
+        assert compile_schema({"multipleOf": divisor}).is_valid(value)
+
+    @pytest.mark.parametrize("value, divisor", [(0.35, 0.1), (19.995, 0.01), (13, 3), (4.5, 2)])
+    def test_multiple_of_rejects_non_multiples(self, value, divisor):
+        assert [e.keyword for e in compile_schema({"multipleOf": divisor}).errors(value)] == ["multipleOf"]
+
+    def test_combinators(self):
+        v = compile_schema({"oneOf": [{"type": "integer"}, {"type": "number", "minimum": 10}]})
+        assert v.is_valid(3)
+        assert v.is_valid(10.5)
+        assert [e.keyword for e in v.errors(12)] == ["oneOf"]
+        assert compile_schema({"not": {"type": "null"}}).errors(None)[0].keyword == "not"
+        cond = compile_schema({"if": {"type": "string"}, "then": {"maxLength": 1}, "else": {"type": "integer"}})
+        assert cond.is_valid("a") and cond.is_valid(5)
+        assert not cond.is_valid("ab") and not cond.is_valid(5.5)
+
+    def test_recursive_ref(self):
+        v = compile_schema({
+            "definitions": {
+                "node": {
+                    "type": "object",
+                    "required": ["value"],
+                    "properties": {"children": {"type": "array", "items": {"$ref": "#/definitions/node"}}},
+                },
+            },
+            "$ref": "#/definitions/node",
+        })
+        assert v.is_valid({"value": 1, "children": [{"value": 2, "children": []}]})
+        assert [e.path for e in v.errors({"value": 1, "children": [{"children": []}]})] == ["children[0].value"]
+
+    def test_bad_ref_raises(self):
+        with pytest.raises(SchemaCompileError):
+            compile_schema({"$ref": "#/definitions/missing"})
+        with pytest.raises(SchemaCompileError):
+            compile_schema({"type": "strng"})
+
+
+class TestStreamingGuardrails:
+    def _run(self, chunks, config, **kw):
+        guard = StreamingGuardrails(config, **kw)
+        out = []
+        for chunk in chunks:
+            out.append(guard.feed(chunk))
+            if guard.blocked:
+                break
+        out.append(guard.finish())
+        return guard, "".join(out)
+
+    def test_clean_stream_passes_through(self):
+        guard, text = self._run(["The weather ", "is sunny ", "and warm."], GuardrailConfig())
+        assert text == "The weather is sunny and warm."
+        assert guard.result.passed is True
+
+    def test_pii_split_across_chunks_is_redacted(self):
+        chunks = ["Call 555-", "123-", "4567 or mail john", ".doe@exa", "mple.com now."]
+        guard, text = self._run(chunks, GuardrailConfig(scrub_pii=True, block_pii=False))
+        assert text == "Call [PHONE_REDACTED] or mail [EMAIL_REDACTED] now."
+        assert guard.result.flags == ["pii:phone", "pii:email"]
+        assert guard.result.scrubbed_content == text
+
+    def test_overlapping_pii_in_stream_is_flagged(self):
+        chunks = ["write to 555-123-", "4567@example.com"]
+        guard, text = self._run(chunks, GuardrailConfig(scrub_pii=True, block_pii=False))
+        assert text == "write to [EMAIL_REDACTED]"
+        assert guard.result.flags == ["pii:email", "pii:phone"]
+
+    def test_keyword_split_across_chunks_blocks_before_release(self):
+        config = GuardrailConfig(custom_blocks=["forbidden content"], block_pii=False, scrub_pii=False)
+        filler = "safe text " * 20
+        chunks = [filler, "this is forb", "idden con", "tent", " and more"]
+        guard, text = self._run(chunks, config, window=4)
+        assert guard.blocked is True
+        assert "forb" not in text
+        assert guard.result.flags == ["custom_block:forbidden content"]
+
+    def test_pii_block_mode_stops_stream(self):
+        config = GuardrailConfig(block_pii=True, scrub_pii=False)
+        guard = StreamingGuardrails(config, window=8)
+        assert guard.feed("Email: user@test.com and then a long tail of text") == ""
+        assert guard.blocked is True
+        assert guard.feed("more") == ""
+
+    def test_json_checked_on_finish(self):
+        config = GuardrailConfig(require_json=True, json_schema={"required": ["id"]})
+        guard, text = self._run(['{"na', 'me": 1}'], config)
+        assert text == '{"name": 1}'
+        assert "missing_required_key:id" in guard.result.flags
+
@@ -1,11 +1,16 @@
 """Tests for core agent, message, and tool primitives."""
 from __future__ import annotations
 
+import asyncio
+import time
+from pathlib import PurePosixPath
+
 import pytest
 
 from oflo_agent_protocol.core.agent import BaseAgentV2, ToolDefinition, _python_type_to_json
 from oflo_agent_protocol.core.message import CanonicalMessage, ToolCall, ToolResult
 from oflo_agent_protocol.core.registry import AgentRegistry
+from oflo_agent_protocol.core.session import InMemorySessionStore, SessionState
 from oflo_agent_protocol.core.types import AgentStatus, MessageRole, TokenUsage
 
 from tests.conftest import StubRuntime
@@ -195,6 +200,86 @@ class TestBaseAgentV2:
         assert tool_called_with.get("ticker") == "AAPL"
         assert "182" in reply
 
+    @pytest.mark.asyncio
+    async def test_stream_yields_guarded_deltas(self, agent):
+        chunks = [c async for c in agent.stream(CanonicalMessage.user("Hello"))]
+        assert "".join(chunks).strip() == "stub reply"
+        assert agent._history[-1].content.strip() == "stub reply"
+        assert agent.status == AgentStatus.ACTIVE
+
+    @pytest.mark.asyncio
+    async def test_stream_block_closes_upstream(self):
+        produced = []
+        closed = []
+
+        class InfiniteRuntime(StubRuntime):
+            async def stream(self, messages, system=None, tools=None, **kwargs):
+                try:
+                    i = 0
+                    while True:
+                        i += 1
+                        produced.append(i)
+                        yield "hate " if i == 50 else "word "
+                finally:
+                    closed.append(True)
+
+        local_agent = BaseAgentV2(name="Streamer", runtime=InfiniteRuntime())
+        chunks = [c async for c in local_agent.stream(CanonicalMessage.user("Go"))]
+        assert closed == [True]
+        assert len(produced) == 50
+        assert chunks[-1] == "[Response blocked by content policy.]"
+        assert "hate" not in "".join(chunks)
+
+    @pytest.mark.asyncio
+    async def test_stream_records_runtime_usage(self):
+        audited = []
+
+        class MeteredRuntime(StubRuntime):
+            supports_stream_usage = True
+
+            async def stream(self, messages, system=None, tools=None, usage=None, **kwargs):
+                usage.prompt_tokens = 12
+                yield "metered "
+                usage.completion_tokens = 3
+
+        local_agent = BaseAgentV2(name="Metered", runtime=MeteredRuntime())
+
+        async def audit_turn(message, runtime, token_usage, *args):
+            audited.append(token_usage)
+
+        local_agent._audit_turn = audit_turn
+        chunks = [c async for c in local_agent.stream(CanonicalMessage.user("Hi"), session_id="s")]
+        assert "".join(chunks) == "metered "
+        assert audited[0].prompt_tokens == 12 and audited[0].completion_tokens == 3
+        assert local_agent.session("s").usage.completion_tokens == 3
+
+    @pytest.mark.asyncio
+    async def test_per_turn_context_is_ephemeral(self, agent, stub_runtime):
+        await agent.chat("Hello", context=["Memory: user likes brevity"])
+        await agent.chat("Again")
+        assert stub_runtime.calls[0]["system"] == (
+            "You are a test assistant.\n\nMemory: user likes brevity"
+        )
+        assert stub_runtime.calls[1]["system"] == "You are a test assistant."
+        assert agent.system_prompt == "You are a test assistant."
+        assert all("brevity" not in m.content for m in agent._history)
+
+    @pytest.mark.asyncio
+    async def test_context_blocks_go_to_capable_runtimes_separately(self):
+        class ContextRuntime(StubRuntime):
+            supports_system_context = True
+
+            async def complete(self, messages, system=None, tools=None, system_context=None, **kwargs):
+                self.context = system_context
+                return await super().complete(messages, system=system, tools=tools, **kwargs)
+
+        runtime = ContextRuntime()
+        local_agent = BaseAgentV2(name="Ctx", system_prompt="Stable.", runtime=runtime, max_context_tokens=5)
+        await local_agent.chat("Hi", context=["a" * 12, "b" * 40, "c"])
+        assert runtime.calls[0]["system"] == "Stable."
+        # 5 tokens ≈ 20 chars: the first block fits, the second is truncated, the third dropped
+        assert runtime.context == ["a" * 12, "b" * 8 + " …"]
+
     @pytest.mark.asyncio
     async def test_history_trimming(self):
         runtime = StubRuntime()
@@ -205,6 +290,53 @@ class TestBaseAgentV2:
         assert len(agent._history) <= 5
 
 
+
+# ── Sessions ──────────────────────────────────────────────────────────────────
+
+class TestSessions:
+    @pytest.mark.asyncio
+    async def test_concurrent_sessions_share_one_definition(self):
+        runtime = StubRuntime()
+        agent = BaseAgentV2(name="Shared", runtime=runtime)
+        await asyncio.gather(agent.chat("from alice", session_id="alice"),
+                             agent.chat("from bob", session_id="bob"))
+        await agent.chat("alice again", session_id="alice")
+
+        assert [m.content for m in runtime.calls[-1]["messages"]] == [
+            "from alice", "stub reply", "alice again",
+        ]
+        alice = agent.session("alice")
+        assert alice.turns == 2 and alice.usage.prompt_tokens == 20
+        assert agent.history == [] and agent.status == AgentStatus.ACTIVE
+
+    @pytest.mark.asyncio
+    async def test_serialising_store_round_trips_state(self):
+        store = InMemorySessionStore(serialize=True)
+        agent = BaseAgentV2(name="Compact", runtime=StubRuntime(), session_store=store)
+        await agent.chat("one", session_id="s")
+        await agent.chat("two", session_id="s")
+        state = store.get("s")
+        assert [m.content for m in state.history] == ["one", "stub reply", "two", "stub reply"]
+        assert state.turns == 2
+
+    def test_store_evicts_lru_and_idle_sessions(self, monkeypatch):
+        store = InMemorySessionStore(max_sessions=2, idle_ttl=60)
+        for sid in ("a", "b", "c"):
+            store.put(SessionState(session_id=sid))
+        assert "a" not in store and len(store) == 2
+
+        later = time.monotonic() + 61
+        monkeypatch.setattr(time, "monotonic", lambda: later)
+        assert store.get("b") is None and len(store) == 0
+        assert store.evicted == 3
+
+    def test_clear_history_drops_a_session(self):
+        agent = BaseAgentV2(name="Forgetful", runtime=StubRuntime())
+        agent.session("s")
+        agent.clear_history("s")
+        assert "s" not in agent.sessions
+
+
 # ── AgentRegistry ─────────────────────────────────────────────────────────────
 
 class TestAgentRegistry:
@@ -241,3 +373,51 @@ class TestAgentRegistry:
         active = registry.active_agents()
         assert a1 in active
         assert a2 not in active
+
+
+# ── JSON serialization ────────────────────────────────────────────────────────
+
+class TestSerialization:
+    @pytest.fixture(autouse=True)
+    def restore_backend(self):
+        from oflo_agent_protocol.core import serialization
+
+        original = serialization.backend()
+        yield
+        serialization.set_backend(original)
+
+    @pytest.mark.parametrize("name", ["orjson", "msgspec", "json"])
+    def test_backends_agree_on_plain_json(self, name):
+        from oflo_agent_protocol.core import serialization
+
+        pytest.importorskip(name)
+        serialization.set_backend(name)
+        data = {"id": "t1", "n": [1, 2.5, None, True], "text": "naïve ✓"}
+        encoded = serialization.dumps(data)
+        assert encoded == '{"id":"t1","n":[1,2.5,null,true],"text":"naïve ✓"}'.encode()
+        assert serialization.loads(encoded) == serialization.loads(encoded.decode()) == data
+        assert serialization.loads(serialization.dumps({"p": PurePosixPath("/tmp")})) == {"p": "/tmp"}
+
+    @pytest.mark.parametrize("name", ["orjson", "msgspec", "json"])
+    def test_big_ints_encode_on_every_backend(self, name):
+        from oflo_agent_protocol.core import serialization
+
+        pytest.importorskip(name)
+        serialization.set_backend(name)
+        assert serialization.loads(serialization.dumps({"n": 2**70})) == {"n": 2**70}
+
+    def test_default_prefers_fast_backend_and_rejects_unknown(self):
+        from oflo_agent_protocol.core import serialization
+
+        fastest = serialization.set_backend()
+        assert fastest != "json" or not any(
+            _installed(m) for m in ("orjson", "msgspec")
+        )
+        with pytest.raises(ValueError):
+            serialization.set_backend("yaml")
+
+
+def _installed(module: str) -> bool:
+    import importlib.util
+
+    return importlib.util.find_spec(module) is not None
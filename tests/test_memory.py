@@ -0,0 +1,847 @@
+"""Tests for the in-process memory store and MemoryManager."""
+from __future__ import annotations
+
+import asyncio
+import math
+import sys
+import threading
+
+import pytest
+
+from oflo_agent_protocol.core.agent import BaseAgentV2
+from oflo_agent_protocol.memory import memory_manager
+from oflo_agent_protocol.memory.embeddings import EmbeddingService, HashEmbedder
+from oflo_agent_protocol.memory.memory_manager import (
+    InMemoryStore,
+    LRUPolicy,
+    MemoryEntry,
+    MemoryManager,
+    RetrievalConfig,
+    reciprocal_rank_fusion,
+)
+from oflo_agent_protocol.memory.replication import WeaviateReplicator, object_uuid
+
+from tests.conftest import StubRuntime
+
+
+def _entry(key: str, content: str, agent_id: str = "a1", memory_type: str = "episodic") -> MemoryEntry:
+    return MemoryEntry(key=key, content=content, agent_id=agent_id, memory_type=memory_type)
+
+
+# ── InMemoryStore ─────────────────────────────────────────────────────────────
+
+class TestInMemoryStore:
+    @pytest.fixture
+    def store(self):
+        s = InMemoryStore()
+        s.add(_entry("k1", "User prefers concise answers"))
+        s.add(_entry("k2", "User lives in Berlin and prefers email", memory_type="semantic"))
+        s.add(_entry("k3", "Quarterly revenue report for Berlin office", agent_id="a2"))
+        return s
+
+    def test_search_ranks_by_bm25(self, store):
+        results = store.search("berlin email")
+        assert [e.key for e in results] == ["k2", "k3"]
+
+    def test_search_is_case_and_punctuation_insensitive(self, store):
+        assert [e.key for e in store.search("CONCISE!")] == ["k1"]
+
+    def test_search_scoped_to_agent(self, store):
+        assert [e.key for e in store.search("berlin", agent_id="a2")] == ["k3"]
+        assert store.search("berlin", agent_id="nobody") == []
+
+    def test_search_filters_memory_type(self, store):
+        assert [e.key for e in store.search("prefers", memory_type="semantic")] == ["k2"]
+
+    def test_search_limit(self, store):
+        assert len(store.search("user prefers berlin", limit=1)) == 1
+
+    def test_get_recent_newest_first(self, store):
+        assert [e.key for e in store.get_recent("a1")] == ["k2", "k1"]
+        assert [e.key for e in store.get_recent("a1", limit=1)] == ["k2"]
+
+    def test_same_key_replaces_entry(self, store):
+        store.add(_entry("k1", "User now prefers detailed answers"))
+        assert len(store) == 3
+        assert store.search("concise") == []
+        assert [e.key for e in store.get_recent("a1")] == ["k1", "k2"]
+
+    def test_eviction_drops_oldest_from_index(self):
+        store = InMemoryStore(max_entries=2)
+        store.add(_entry("k1", "alpha"))
+        store.add(_entry("k2", "beta"))
+        store.add(_entry("k3", "gamma"))
+        assert len(store) == 2
+        assert store.search("alpha") == []
+        assert [e.key for e in store.get_recent("a1")] == ["k3", "k2"]
+
+    def test_clear_agent(self, store):
+        assert store.clear_agent("a1") == 2
+        assert store.clear_agent("a1") == 0
+        assert [e.key for e in store.search("berlin")] == ["k3"]
+        assert store.get_recent("a1") == []
+
+
+class TestEviction:
+    def test_agent_quota_protects_other_agents(self):
+        store = InMemoryStore(max_entries=100, agent_quota=2)
+        store.add(_entry("quiet", "keep me", agent_id="quiet"))
+        for i in range(10):
+            store.add(_entry(f"c{i}", f"chatter {i}", agent_id="chatty"))
+        assert [e.key for e in store.get_recent("quiet")] == ["quiet"]
+        assert [e.key for e in store.get_recent("chatty")] == ["c9", "c8"]
+
+    def test_byte_cap(self):
+        store = InMemoryStore(max_entries=100, max_bytes=30)
+        store.add(_entry("k1", "x" * 12))
+        store.add(_entry("k2", "y" * 12))
+        assert len(store) == 2
+        store.add(_entry("k3", "z" * 12))
+        assert [e.key for e in store.get_recent("a1")] == ["k3", "k2"]
+        assert store.size_bytes <= 30
+        assert store.add(_entry("big", "w" * 100)) is False
+
+    def test_oversized_replacement_keeps_old_entry(self):
+        removed = []
+        store = InMemoryStore(max_bytes=30, on_remove=removed.append)
+        store.add(_entry("k1", "x" * 12))
+        assert store.add(_entry("k1", "w" * 100)) is False
+        assert store.get("k1").content == "x" * 12
+        assert removed == []
+
+    def test_agent_byte_cap(self):
+        store = InMemoryStore(agent_max_bytes=20)
+        store.add(_entry("k1", "x" * 15))
+        store.add(_entry("k2", "y" * 15))
+        assert [e.key for e in store.get_recent("a1")] == ["k2"]
+
+    def test_lru_keeps_recently_returned(self):
+        store = InMemoryStore(max_entries=2, policy="lru")
+        store.add(_entry("k1", "alpha"))
+        store.add(_entry("k2", "beta"))
+        store.search("alpha")
+        store.add(_entry("k3", "gamma"))
+        assert [e.key for e in store.search("alpha beta gamma")] == ["k3", "k1"]
+
+    def test_recency_order_does_not_grow_under_churn(self):
+        store = InMemoryStore(max_entries=10, policy="lru")
+        for i in range(2000):
+            store.add(_entry("same", f"v{i}"))
+            store.add(_entry(f"k{i}", f"value {i}"))
+            store.search("value")
+        assert len(store) == 10
+        assert len(store._recent["a1"]) == 10
+        assert store.get_recent("a1", limit=2)[0].key == "k1999"
+
+    def test_policy_instance_accepted(self):
+        store = InMemoryStore(policy=LRUPolicy())
+        store.add(_entry("k1", "alpha"))
+        assert len(store) == 1
+
+    def test_unknown_policy_rejected(self):
+        with pytest.raises(ValueError):
+            InMemoryStore(policy="random")
+
+    def test_ttl_expires_entries(self, monkeypatch):
+        clock = {"now": 1000.0}
+
+        class FakeTime:
+            @staticmethod
+            def monotonic():
+                return clock["now"]
+
+        monkeypatch.setattr(memory_manager, "time", FakeTime)
+        store = InMemoryStore(policy="ttl", ttl_seconds=60)
+        store.add(_entry("old", "alpha"))
+        clock["now"] += 30
+        store.add(_entry("new", "alpha"))
+        clock["now"] += 45
+        assert [e.key for e in store.search("alpha")] == ["new"]
+        assert len(store) == 1
+
+    def test_entry_is_compact(self):
+        entry = _entry("k", "c", agent_id="".join(["age", "nt-1"]))
+        assert not hasattr(entry, "__dict__")
+        assert entry.agent_id is sys.intern("agent-1")
+
+
+# ── MemoryManager ─────────────────────────────────────────────────────────────
+
+class TestMemoryManager:
+    async def test_store_and_search(self):
+        mem = MemoryManager(project_id="test")
+        key = await mem.store(agent_id="abc", content="User prefers concise answers", memory_type="semantic")
+        results = await mem.search("concise", agent_id="abc")
+        assert [e.key for e in results] == [key]
+        assert await mem.search("concise", agent_id="abc", memory_type="episodic") == []
+
+    def test_reciprocal_rank_fusion(self):
+        scores = reciprocal_rank_fusion([["a", "b"], ["b", "c"]], k=60)
+        assert scores["b"] == pytest.approx(1 / 62 + 1 / 61)
+        assert max(scores, key=scores.get) == "b"
+        weighted = reciprocal_rank_fusion([["a"], ["c"]], weights=[2.0, 1.0])
+        assert weighted["a"] > weighted["c"]
+
+    async def test_hybrid_fuses_keyword_and_vector_hits(self):
+        pytest.importorskip("numpy")
+        mem = MemoryManager(project_id="test", embedding_model=HashEmbedder(dim=64))
+        await mem.store(agent_id="abc", content="deploy the billing service on friday", key="both")
+        await mem.store(agent_id="abc", content="billing", key="kw")
+        await mem.store(agent_id="abc", content="unrelated gardening notes", key="none")
+        results = await mem.search("billing service deploy", agent_id="abc", limit=2)
+        assert results[0].key == "both"
+        keyword = await mem.search("billing service deploy", agent_id="abc", mode="keyword")
+        assert "none" not in [e.key for e in keyword]
+        with pytest.raises(ValueError):
+            await mem.search("billing", agent_id="abc", mode="fuzzy")
+
+    async def test_vector_index_follows_store_evictions(self):
+        pytest.importorskip("numpy")
+        mem = MemoryManager(project_id="test", local_store=InMemoryStore(max_entries=50),
+                            embedding_model=HashEmbedder(dim=16))
+        for i in range(300):
+            await mem.store(agent_id="abc", content=f"note number {i}", key=f"k{i % 120}")
+        assert len(mem._local) == 50 and len(mem.vector_index) == 50
+        await mem.clear_agent("abc")
+        assert len(mem.vector_index) == 0
+
+    async def test_recency_and_memory_type_weights(self):
+        cfg = RetrievalConfig(recency_half_life_s=3600, recency_weight=1.0, rerank=False)
+        mem = MemoryManager(project_id="test", retrieval=cfg)
+        await mem.store(agent_id="abc", content="quarterly report", key="new")
+        await mem.store(agent_id="abc", content="quarterly report", key="old")
+        mem._local.get("old").timestamp = "2020-01-01T00:00:00Z"
+        assert [e.key for e in await mem.search("quarterly", agent_id="abc")] == ["new", "old"]
+
+        cfg = RetrievalConfig(memory_type_weights={"procedural": 3.0}, recency_half_life_s=None)
+        mem = MemoryManager(project_id="test", retrieval=cfg)
+        await mem.store(agent_id="abc", content="quarterly report draft", key="ep")
+        await mem.store(agent_id="abc", content="quarterly report draft", key="proc", memory_type="procedural")
+        assert (await mem.search("quarterly", agent_id="abc"))[0].key == "proc"
+
+
+# ── VectorIndex ───────────────────────────────────────────────────────────────
+
+class _BagOfLettersEmbedder:
+    """Deterministic toy embedding model: letter frequencies."""
+
+    def embed(self, text: str):
+        vec = [0.0] * 26
+        for ch in text.lower():
+            if "a" <= ch <= "z":
+                vec[ord(ch) - 97] += 1.0
+        return vec
+
+
+class TestVectorIndex:
+    @pytest.fixture
+    def np(self):
+        return pytest.importorskip("numpy")
+
+    def _index(self, np, n=200, dim=16, **kw):
+        from oflo_agent_protocol.memory.vector_index import VectorIndex
+
+        rng = np.random.default_rng(0)
+        data = rng.standard_normal((n, dim)).astype(np.float32)
+        index = VectorIndex(dim=dim, **kw)
+        for i, vec in enumerate(data):
+            index.add(f"k{i}", vec, agent_id=f"a{i % 4}", memory_type="semantic" if i % 2 else "episodic")
+        return index, data
+
+    def test_exact_search_before_training(self, np):
+        index, data = self._index(np)
+        assert not index.is_trained
+        key, score = index.search(data[17], k=1)[0]
+        assert key == "k17"
+        assert score == pytest.approx(1.0, abs=1e-5)
+
+    def test_filters(self, np):
+        index, data = self._index(np)
+        hits = index.search(data[17], k=5, agent_id="a1", memory_type="semantic")
+        assert hits and all(int(k[1:]) % 4 == 1 for k, _ in hits)
+        assert index.search(data[17], k=5, agent_id="missing") == []
+
+    def test_tombstones_and_replace(self, np):
+        index, data = self._index(np)
+        assert index.remove("k17") is True
+        assert index.remove("k17") is False
+        assert "k17" not in [k for k, _ in index.search(data[17], k=10)]
+        index.add("k18", data[17])
+        assert index.search(data[17], k=1)[0][0] == "k18"
+        assert index.remove_agent("a0") == 50
+        assert len(index) == 149
+
+    def test_ivf_recall(self, np):
+        index, data = self._index(np, n=2000, train_threshold=500, nprobe=8)
+        assert index.wait_for_training(timeout=10) and index.is_trained
+        hits = sum(index.search(data[i], k=1)[0][0] == f"k{i}" for i in range(0, 2000, 50))
+        assert hits >= 38
+
+    def test_add_never_trains_inline(self, np, monkeypatch):
+        from oflo_agent_protocol.memory.vector_index import VectorIndex
+
+        threads = []
+        kmeans = VectorIndex._kmeans
+
+        def recording_kmeans(self, *args, **kwargs):
+            threads.append(threading.current_thread())
+            return kmeans(self, *args, **kwargs)
+
+        monkeypatch.setattr(VectorIndex, "_kmeans", recording_kmeans)
+        index, data = self._index(np, n=2000, train_threshold=100)
+        assert index.wait_for_training(timeout=10) and index.is_trained
+        assert threads and threading.current_thread() not in threads
+        # Rows added while training ran are filed once the new lists land.
+        assert index.search(data[1999], k=1)[0][0] == "k1999"
+
+    def test_save_and_mmap_load(self, np, tmp_path):
+        from oflo_agent_protocol.memory.vector_index import VectorIndex
+
+        index, data = self._index(np, n=600, train_threshold=300)
+        assert index.wait_for_training(timeout=10)
+        index.remove("k5")
+        index.save(str(tmp_path))
+        loaded = VectorIndex.load(str(tmp_path), mmap=True)
+        assert len(loaded) == 599 and loaded.is_trained
+        assert loaded.search(data[42], k=1)[0][0] == "k42"
+        loaded.add("new", data[5])  # copy-on-write out of the read-only map
+        assert loaded.search(data[5], k=1)[0][0] == "new"
+
+    async def test_memory_manager_semantic_search(self, np):
+        mem = MemoryManager(project_id="test", embedding_model=_BagOfLettersEmbedder())
+        await mem.store(agent_id="abc", content="zzz zebra buzz", key="z")
+        await mem.store(agent_id="abc", content="aaa banana", key="a")
+        results = await mem.search("jazz fizz", agent_id="abc", limit=1)
+        assert [e.key for e in results] == ["z"]
+        assert await mem.clear_agent("abc") == 2
+        assert await mem.search("jazz", agent_id="abc") == []
+
+
+# ── EmbeddingService ──────────────────────────────────────────────────────────
+
+class _CountingModel:
+    def __init__(self, fail: bool = False) -> None:
+        self.batches = []
+        self.fail = fail
+        self.inner = HashEmbedder(dim=32)
+        self.model_name = "counting"
+
+    async def embed_batch(self, texts):
+        self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model down")
+        return self.inner.embed_batch(texts)
+
+
+class TestEmbeddingService:
+    def test_hash_embedder_is_deterministic(self):
+        a = HashEmbedder(dim=64).embed("Hello world")
+        assert a == HashEmbedder(dim=64).embed("hello, WORLD")
+        assert a != HashEmbedder(dim=64).embed("goodbye")
+
+    async def test_concurrent_requests_are_coalesced(self):
+        model = _CountingModel()
+        service = EmbeddingService(model, batch_window_ms=20)
+        vecs = await service.embed_many([f"text {i}" for i in range(10)] + ["text 3"])
+        assert len(model.batches) == 1
+        assert len(model.batches[0]) == 10  # duplicate shares a slot
+        assert list(vecs[3]) == list(vecs[10])
+
+    async def test_batch_size_flushes_early(self):
+        model = _CountingModel()
+        service = EmbeddingService(model, batch_size=4, batch_window_ms=10_000)
+        await asyncio.wait_for(service.embed_many([str(i) for i in range(8)]), timeout=1)
+        assert [len(b) for b in model.batches] == [4, 4]
+
+    async def test_vectors_normalised_and_cached(self):
+        model = _CountingModel()
+        service = EmbeddingService(model, batch_window_ms=0)
+        vec = await service.embed("alpha beta")
+        assert math.isclose(math.sqrt(sum(x * x for x in vec)), 1.0, rel_tol=1e-5)
+        vec[0] = 99.0  # callers get copies
+        again = await service.embed("alpha beta")
+        assert again[0] != 99.0
+        assert len(model.batches) == 1
+        assert service.stats["hits"] == 1
+
+    async def test_disk_cache_survives_restart(self, tmp_path):
+        first = _CountingModel()
+        service = EmbeddingService(first, cache_dir=str(tmp_path), batch_window_ms=0)
+        vec = await service.embed("persist me")
+        service.close()
+
+        second = _CountingModel()
+        service = EmbeddingService(second, cache_dir=str(tmp_path), batch_window_ms=0)
+        assert list(await service.embed("persist me")) == list(vec)
+        assert second.batches == []
+        assert service.stats["disk_hits"] == 1
+        service.close()
+
+    async def test_model_errors_propagate(self):
+        service = EmbeddingService(_CountingModel(fail=True), batch_window_ms=0)
+        with pytest.raises(RuntimeError):
+            await service.embed("x")
+
+    async def test_shap_rag_embeds_query_once(self):
+        np = pytest.importorskip("numpy")
+        from pipelines.rag import Document, ShapRAG, VectorStore
+
+        model = _CountingModel()
+        service = EmbeddingService(model, batch_window_ms=0)
+        store = VectorStore(embedding_dim=32)
+        for i, text in enumerate(["alpha beta", "beta gamma", "gamma delta"]):
+            emb = np.frombuffer(await service.embed(text), dtype=np.float32)
+            await store.add_document(Document(id=str(i), content=text, embedding=emb))
+        calls_before = len(model.batches)
+
+        result = await ShapRAG(store, service).query("alpha beta", top_k=3, num_samples=10)
+        assert len(result["shap_values"]) == 3
+        assert len(model.batches) == calls_before  # query text was already cached
+        assert service.stats["hits"] == 1  # ...and embedded once, not per permutation
+
+
+
+# ── Weaviate replication ──────────────────────────────────────────────────────
+
+class _FakeWeaviate:
+    """Just enough of `WeaviateClient` for the replicator: collections.get().data.insert_many()."""
+
+    def __init__(self) -> None:
+        self.objects = {}
+        self.calls = 0
+        self.down = False
+        self.collections = self
+        self.data = self
+
+    def get(self, name):
+        return self
+
+    def insert_many(self, objects):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError("weaviate down")
+        for obj in objects:
+            self.objects[str(obj.uuid if hasattr(obj, "uuid") else obj["uuid"])] = obj
+        return type("Result", (), {"errors": {}})()
+
+
+class TestWeaviateReplicator:
+    def _replicator(self, client, tmp_path, **kw):
+        kw.setdefault("flush_interval", 3600)  # tests drive flush() by hand
+        return WeaviateReplicator(
+            client, "proj", journal_path=str(tmp_path / "journal.jsonl"),
+            max_attempts=2, batch_size=10, **kw,
+        )
+
+    def test_batches_writes(self, tmp_path):
+        client = _FakeWeaviate()
+        rep = self._replicator(client, tmp_path)
+        for i in range(25):
+            rep.enqueue(f"k{i}", {"key": f"k{i}", "content": "x"})
+        assert rep.flush() is True
+        assert len(client.objects) == 25 and client.calls == 3
+        assert rep.pending() == 0 and rep.lag_seconds() == 0.0
+        rep.shutdown()
+
+    def test_spills_to_journal_and_replays(self, tmp_path):
+        client = _FakeWeaviate()
+        client.down = True
+        rep = self._replicator(client, tmp_path)
+        rep.enqueue("a", {"key": "a"})
+        assert rep.flush() is False  # retried in memory
+        assert rep.flush() is False  # second failure → journal
+        assert rep.is_down and rep.pending() == 1
+        rep.enqueue("b", {"key": "b"})  # queued in memory; the worker journals it
+        assert rep.pending() == 2 and rep.lag_seconds() >= 0.0
+        rep.shutdown()
+
+        # A new process replays the journal on reconnect; ids are deterministic
+        client.down = False
+        rep = self._replicator(client, tmp_path)
+        assert rep.flush() is True
+        assert not rep.is_down and rep.pending() == 0
+        assert set(client.objects) == {object_uuid("proj", "a"), object_uuid("proj", "b")}
+        assert not (tmp_path / "journal.jsonl").exists()
+        rep.shutdown()
+
+    def test_enqueue_never_writes_the_journal(self, tmp_path):
+        client = _FakeWeaviate()
+        client.down = True
+        rep = self._replicator(client, tmp_path, max_queue=2)
+        rep._start_worker = lambda: None  # no background spills: only enqueue() and flush() run
+        journal = tmp_path / "journal.jsonl"
+        rep.enqueue("a", {"key": "a"})
+        rep.flush()
+        rep.flush()
+        assert rep.is_down and len(journal.read_text().splitlines()) == 1
+        for key in ("b", "c", "d"):
+            assert rep.enqueue(key, {"key": key}) is True  # over max_queue, still memory-only
+        assert len(journal.read_text().splitlines()) == 1
+        assert rep.flush() is False  # the worker's retry fails and spills in order
+        assert [line.count('"key"') for line in journal.read_text().splitlines()] == [1, 1, 1, 1]
+        assert rep.pending() == 4
+        rep.shutdown()
+
+    def test_without_journal_full_queue_drops(self):
+        rep = WeaviateReplicator(_FakeWeaviate(), "proj", flush_interval=3600, max_queue=2)
+        assert rep.enqueue("a", {"key": "a"}) and rep.enqueue("b", {"key": "b"})
+        assert rep.enqueue("c", {"key": "c"}) is False
+        assert rep.dropped == 1 and rep.pending() == 2
+        rep.shutdown()
+
+    def test_lag_gauge_is_exported(self, tmp_path):
+        from oflo_agent_protocol.audit.metrics import get_metrics_registry
+
+        rep = WeaviateReplicator(_FakeWeaviate(), "lag", journal_path=str(tmp_path / "j.jsonl"),
+                                 flush_interval=3600)
+        rep.enqueue("a", {"key": "a"})
+        text = get_metrics_registry().render()
+        assert 'oflo_memory_replication_lag_seconds{project="lag"}' in text
+        assert 'oflo_memory_replication_pending{project="lag"} 1' in text
+        rep.shutdown()
+        assert 'project="lag"' not in get_metrics_registry().render()
+
+    def test_gauges_do_not_keep_the_replicator_alive(self, tmp_path):
+        import gc
+        import weakref
+
+        from oflo_agent_protocol.audit.metrics import get_metrics_registry
+
+        rep = WeaviateReplicator(_FakeWeaviate(), "gone", flush_interval=3600)
+        ref = weakref.ref(rep)
+        del rep
+        gc.collect()
+        assert ref() is None
+        assert 'project="gone"' not in get_metrics_registry().render()
+
+    async def test_memory_manager_store_is_write_behind(self, tmp_path):
+        client = _FakeWeaviate()
+        mem = MemoryManager(project_id="proj")
+        mem._weaviate = client
+        mem._replicator = self._replicator(client, tmp_path)
+        key = await mem.store(agent_id="abc", content="hello")
+        assert client.calls == 0 and mem._replicator.pending() == 1
+        mem.close()
+        assert object_uuid("proj", key) in client.objects
+
+
+class _FakeWeaviateSearch:
+    """`collections.get().query.near_text()` returning canned objects, optionally slowly."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.calls = 0
+        self.collections = self
+        self.query = self
+
+    def get(self, name):
+        return self
+
+    def near_text(self, query, limit, filters=None):
+        import time
+
+        self.calls += 1
+        time.sleep(self.delay)
+        obj = type("Obj", (), {"properties": {"key": "remote", "content": query, "agent_id": "abc"}})()
+        return type("Result", (), {"objects": [obj]})()
+
+
+class TestRemoteSearch:
+    async def test_cache_and_invalidation(self):
+        mem = MemoryManager(project_id="test")
+        mem._weaviate = client = _FakeWeaviateSearch()
+        assert [e.key for e in await mem.search("hello")] == ["remote"]
+        assert [e.key for e in await mem.search("hello")] == ["remote"]
+        assert client.calls == 1
+        await mem.search("hello", limit=3)  # different cache key
+        assert client.calls == 2
+        await mem.store(agent_id="abc", content="new fact")  # invalidates unscoped entries
+        await mem.search("hello")
+        assert client.calls == 3
+        mem.close()
+
+    async def test_not_cached_until_weaviate_has_the_write(self):
+        mem = MemoryManager(project_id="test")
+        mem._weaviate = search = _FakeWeaviateSearch()
+        mem._replicator = WeaviateReplicator(
+            _FakeWeaviate(), "test", flush_interval=3600, on_replicated=mem._on_replicated
+        )
+        await mem.store(agent_id="abc", content="new fact")
+        await mem.search("hello")
+        await mem.search("hello")
+        assert search.calls == 2  # the write is still queued, so nothing is cached
+
+        await asyncio.get_running_loop().run_in_executor(None, mem._replicator.flush)
+        await asyncio.sleep(0)  # the callback hops back to the event loop
+        assert mem._unreplicated == {}
+        await mem.search("hello")
+        await mem.search("hello")
+        assert search.calls == 3
+        mem.close()
+
+    async def test_budget_falls_back_to_local(self):
+        mem = MemoryManager(project_id="test", search_budget_ms=20)
+        mem._weaviate = _FakeWeaviateSearch(delay=0.2)
+        await mem.store(agent_id="abc", content="hello from the local index")
+        results = await mem.search("hello")
+        assert [e.content for e in results] == ["hello from the local index"]
+        await asyncio.sleep(0.3)  # the late remote answer lands in the cache
+        assert [e.key for e in await mem.search("hello")] == ["remote"]
+        mem.close()
+
+
+# ── Redis working memory ──────────────────────────────────────────────────────
+
+class _FakeMemoryServer:
+    """Working-memory endpoints of the Agent Memory Server, with ETag versioning."""
+
+    def __init__(self) -> None:
+        from aiohttp import web
+
+        self.messages = []
+        self.version = 0
+        self.etags = True
+        self.gets = 0
+        self.puts = 0
+        self.app = web.Application()
+        self.app.router.add_get("/v1/health", self._health)
+        self.app.router.add_get("/v1/working-memory/{sid}", self._get)
+        self.app.router.add_put("/v1/working-memory/{sid}", self._put)
+        self.app.router.add_post("/v1/memory/prompt", self._slow_prompt)
+
+    def _response(self):
+        from aiohttp import web
+
+        headers = {"ETag": f'"{self.version}"'} if self.etags else {}
+        return web.json_response({"messages": self.messages, "context": "ctx"}, headers=headers)
+
+    async def _health(self, request):
+        from aiohttp import web
+
+        return web.json_response({"now": 1})
+
+    async def _slow_prompt(self, request):
+        from aiohttp import web
+
+        await asyncio.sleep(1.0)
+        return web.json_response({"prompt": "remote"})
+
+    async def _get(self, request):
+        self.gets += 1
+        return self._response()
+
+    async def _put(self, request):
+        from aiohttp import web
+
+        self.puts += 1
+        if_match = request.headers.get("If-Match")
+        if if_match is not None and if_match != f'"{self.version}"':
+            return web.Response(status=412)
+        self.messages = (await request.json())["messages"]
+        self.version += 1
+        return self._response()
+
+
+class TestRedisWorkingMemory:
+    @pytest.fixture
+    async def server(self):
+        from aiohttp.test_utils import TestServer
+
+        fake = _FakeMemoryServer()
+        srv = TestServer(fake.app)
+        await srv.start_server()
+        fake.url = str(srv.make_url("")).rstrip("/")
+        yield fake
+        await srv.close()
+
+    def _mem(self, server):
+        from oflo_agent_protocol.memory.redis_memory import RedisMemoryManager
+
+        return RedisMemoryManager(session_id="s1", base_url=server.url, flush_interval=0)
+
+    async def test_appends_coalesce_into_one_put(self, server):
+        mem = self._mem(server)
+        await mem.append_to_working_memory("user", "hi")
+        await mem.append_to_working_memory("assistant", "hello")
+        assert server.puts == 0
+        wm = await mem.get_working_memory()  # mirror, pending included
+        assert [m["content"] for m in wm["messages"]] == ["hi", "hello"]
+        assert await mem.flush_working_memory() is True
+        assert server.puts == 1 and len(server.messages) == 2
+        gets = server.gets
+        await mem.get_working_memory()
+        assert server.gets == gets  # served locally
+        await mem.close()
+
+    async def test_concurrent_writers_do_not_lose_updates(self, server):
+        a, b = self._mem(server), self._mem(server)
+        await a.get_working_memory()
+        await b.get_working_memory()  # both mirror version 0
+        await a.append_to_working_memory("user", "from a")
+        await b.append_to_working_memory("user", "from b")
+        assert await a.flush_working_memory() is True
+        assert await b.flush_working_memory() is True  # 412 → rebase → retry
+        assert [m["content"] for m in server.messages] == ["from a", "from b"]
+        await a.close()
+        await b.close()
+
+    async def test_without_etags_flush_rereads_before_put(self, server):
+        server.etags = False
+        a, b = self._mem(server), self._mem(server)
+        await a.get_working_memory()  # a's mirror is now stale-to-be
+        await b.append_to_working_memory("user", "from b")
+        assert await b.flush_working_memory() is True
+        await a.append_to_working_memory("user", "from a")
+        assert await a.flush_working_memory() is True
+        assert [m["content"] for m in server.messages] == ["from b", "from a"]
+        await a.close()
+        await b.close()
+
+    async def test_pending_appends_are_capped(self, server):
+        from oflo_agent_protocol.memory.redis_memory import RedisMemoryManager
+
+        mem = RedisMemoryManager(session_id="s1", base_url=server.url, flush_interval=0, max_pending=3)
+        results = [await mem.append_to_working_memory("user", f"m{i}") for i in range(5)]
+        assert results == [True, True, True, False, False]
+        assert [m["content"] for m in mem._wm_pending] == ["m2", "m3", "m4"]
+        assert mem.dropped_appends == 2
+        await mem.close()
+
+    async def test_close_flushes_pending(self, server):
+        mem = self._mem(server)
+        await mem.append_to_working_memory("user", "bye")
+        await mem.close()
+        assert [m["content"] for m in server.messages] == ["bye"]
+
+    async def test_close_waits_for_background_flush(self, server):
+        from oflo_agent_protocol.memory.redis_memory import RedisMemoryManager
+
+        mem = RedisMemoryManager(session_id="s1", base_url=server.url, flush_interval=0.01)
+        await mem.append_to_working_memory("user", "late")
+        await asyncio.sleep(0.02)  # the timer has started a background flush
+        assert mem._flush_task is not None
+        await mem.close()
+        assert mem._flush_task.done() and not mem._flush_task.cancelled()
+        assert [m["content"] for m in server.messages] == ["late"]
+
+    async def test_batcher_rejects_writes_after_close(self, server):
+        from oflo_agent_protocol.memory.redis_memory import MemoryWriteBatcher
+
+        mem = self._mem(server)
+        writer = MemoryWriteBatcher(mem)
+        await writer.close()
+        with pytest.raises(RuntimeError):
+            writer.submit("lost?", agent_id="a")
+        with pytest.raises(RuntimeError):
+            writer.request_flush()
+        assert writer.pending == 0
+        await mem.close()
+
+    async def test_circuit_opens_and_recovers(self, server):
+        import time
+
+        from oflo_agent_protocol.memory.redis_memory import RedisMemoryManager, ServerHealth
+
+        health = ServerHealth(reprobe_interval=60)
+        mem = RedisMemoryManager(session_id="s1", base_url="http://127.0.0.1:9", health=health)
+        assert await mem._is_available() is False
+        assert mem.health == "down"
+        start = time.perf_counter()
+        assert await mem.search("anything") == []  # fails fast, no network
+        assert time.perf_counter() - start < 0.05
+
+        mem._base = server.url  # server comes back; next probe is due
+        health._next_probe = 0.0
+        assert await mem._is_available() is True
+        assert mem.health == "up"
+        await mem.close()
+
+    async def test_per_call_timeout_and_shared_connector(self, server):
+        import time
+
+        from oflo_agent_protocol.memory.redis_memory import RedisMemoryManager
+
+        mem = RedisMemoryManager(session_id="s1", base_url=server.url, timeouts={"hydrate_prompt": 0.05})
+        other = self._mem(server)
+        start = time.perf_counter()
+        assert await mem.hydrate_prompt("q") == ""  # manual fallback, not the slow server
+        assert time.perf_counter() - start < 0.5
+        assert mem._get_session().connector is other._get_session().connector
+        await mem.close()
+        await other.close()
+
+
+# ── AgentManager memory pipeline ──────────────────────────────────────────────
+
+class _FakeRedisMemory:
+    """RedisMemoryManager stand-in: slow hydration, recorded writes."""
+
+    session_id = "s1"
+    project_id = "proj"
+
+    def __init__(self, hydrate_delay: float = 0.0) -> None:
+        self.hydrate_delay = hydrate_delay
+        self.appended = []
+        self.flushes = 0
+        self.batches = []
+
+    async def hydrate_prompt(self, query):
+        await asyncio.sleep(self.hydrate_delay)
+        return "user likes brevity"
+
+    @staticmethod
+    def context_block(context):
+        from oflo_agent_protocol.memory.redis_memory import RedisMemoryManager
+
+        return RedisMemoryManager.context_block(context)
+
+    async def append_to_working_memory(self, role, content):
+        self.appended.append(role)
+        return True
+
+    async def flush_working_memory(self):
+        self.flushes += 1
+        return True
+
+    async def add_long_term_batch(self, records):
+        self.batches.append([r.text for r in records])
+        return []
+
+    async def close(self):
+        pass
+
+
+class TestRouteMessageMemory:
+    async def _manager(self, tmp_path, redis, **kw):
+        from oflo_agent_protocol.managers.agent_manager import AgentManager
+
+        mgr = AgentManager("proj", audit_dir=str(tmp_path), redis_memory=redis, **kw)
+        agent = BaseAgentV2(name="Analyst", system_prompt="Base.", runtime=StubRuntime("ok"))
+        await mgr.register_agent(agent)
+        return mgr, agent
+
+    async def test_context_applied_and_writes_batched(self, tmp_path):
+        redis = _FakeRedisMemory()
+        mgr, agent = await self._manager(tmp_path, redis)
+        assert await mgr.route_message("Analyst", "hi") == "ok"
+        assert await mgr.route_message("Analyst", "again") == "ok"
+        # Context rides along per turn; the system prompt never grows
+        assert agent.system_prompt == "Base."
+        systems = [call["system"] for call in agent._runtime.calls]
+        assert systems[0] == systems[1] and systems[0].startswith("Base.\n\n--- Memory Context ---")
+        assert redis.appended == ["user", "assistant"] * 2
+        assert redis.batches == []  # persisted off the critical path
+        await mgr.close()
+        assert redis.flushes == 1
+        assert redis.batches == [["Q: hi\nA: ok", "Q: again\nA: ok"]]
+
+    async def test_slow_hydration_is_skipped(self, tmp_path):
+        import time
+
+        redis = _FakeRedisMemory(hydrate_delay=1.0)
+        mgr, agent = await self._manager(tmp_path, redis, memory_budget_ms=20)
+        start = time.perf_counter()
+        assert await mgr.route_message("Analyst", "hi") == "ok"
+        assert time.perf_counter() - start < 0.5
+        assert agent.system_prompt == "Base."
+        await mgr.close()
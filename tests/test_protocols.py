@@ -0,0 +1,855 @@
+"""Tests for the MCP and A2A FastAPI servers."""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+from fastapi.testclient import TestClient
+
+from oflo_agent_protocol.audit import tracing
+from oflo_agent_protocol.audit.metrics import MetricsRegistry
+from oflo_agent_protocol.audit.tracing import InMemorySpanExporter, Tracer
+from oflo_agent_protocol.core.agent import BaseAgentV2
+from oflo_agent_protocol.protocols.a2a.events import TaskChannel, TaskEventBus
+from oflo_agent_protocol.protocols.a2a.executor import ExecutorBusy, TaskExecutor
+from oflo_agent_protocol.protocols.a2a.gateway import A2AGateway
+from oflo_agent_protocol.protocols.a2a.server import A2AServer
+from oflo_agent_protocol.protocols.a2a.store import InMemoryTaskStore, SQLiteTaskStore
+from oflo_agent_protocol.protocols.a2a.types import (
+    A2AMessage,
+    A2ATask,
+    AgentCard,
+    Artifact,
+    TaskStatusUpdate,
+    TextPart,
+)
+from oflo_agent_protocol.protocols.mcp.server import MCPServer
+
+from tests.conftest import StubRuntime
+
+
+@pytest.fixture
+def registry():
+    reg = MetricsRegistry()
+    reg.counter("oflo_test_events", "Test events").inc(3)
+    return reg
+
+
+# ── /metrics ──────────────────────────────────────────────────────────────────
+
+class TestMetricsEndpoint:
+    def test_mcp_metrics(self, registry):
+        srv = MCPServer(name="proj", metrics=registry)
+        resp = TestClient(srv.app).get("/metrics")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("application/openmetrics-text")
+        assert "oflo_test_events_total 3" in resp.text
+
+    def test_a2a_metrics(self, registry):
+        card = AgentCard(name="proj", description="", url="http://localhost:9000")
+        agent = BaseAgentV2(name="Bot", runtime=StubRuntime())
+        srv = A2AServer(card=card, agent=agent, metrics=registry)
+        resp = TestClient(srv.app).get("/metrics")
+        assert resp.status_code == 200
+        assert resp.text.rstrip().endswith("# EOF")
+
+    async def test_a2a_gauges_are_released_on_shutdown(self):
+        registry = MetricsRegistry()
+        card = AgentCard(name="proj", description="", url="http://localhost:9000")
+        servers = [A2AServer(card=card, agent=_GatedAgent(), metrics=registry) for _ in range(2)]
+        servers[0]._tasks.put(A2ATask(task_id="t1"))
+        servers[1]._tasks.put(A2ATask(task_id="t2"))
+        assert 'oflo_a2a_tasks{agent="proj",state="stored"} 2' in registry.render()
+        await servers[0].shutdown()
+        assert 'oflo_a2a_tasks{agent="proj",state="stored"} 1' in registry.render()
+        await servers[1].shutdown()
+        assert 'agent="proj"' not in registry.render()
+
+
+# ── Trace propagation ─────────────────────────────────────────────────────────
+
+class TestTracePropagation:
+    def test_a2a_server_continues_remote_trace(self, monkeypatch):
+        exporter = InMemorySpanExporter()
+        monkeypatch.setattr(tracing, "_tracer", Tracer(exporter=exporter, sample_rate=1.0))
+        card = AgentCard(name="proj", description="", url="http://localhost:9000")
+        srv = A2AServer(card=card, agent=BaseAgentV2(name="Bot", runtime=StubRuntime()))
+        trace_id = "0af7651916cd43dd8448eb211c80319c"
+        resp = TestClient(srv.app).post(
+            "/",
+            json={"jsonrpc": "2.0", "id": "1", "method": "tasks/send",
+                  "params": {"id": "t1", "message": {"parts": [{"type": "text", "text": "hi"}]}}},
+            headers={"traceparent": f"00-{trace_id}-b7ad6b7169203331-01"},
+        )
+        assert resp.json()["result"]["status"]["state"] == "completed"
+        tracing.get_tracer().flush()
+        handler = next(s for s in exporter.spans if s.name == "a2a.tasks/send")
+        assert handler.context.trace_id == trace_id
+        assert handler.parent_id == "b7ad6b7169203331"
+        assert any(s.name == "agent.process" and s.parent_id == handler.context.span_id
+                   for s in exporter.spans)
+
+
+# ── A2A event streaming ───────────────────────────────────────────────────────
+
+def _sse_events(text):
+    events = []
+    for frame in text.split("\n\n"):
+        fields = dict(
+            line.split(": ", 1) for line in frame.splitlines() if line and not line.startswith(":")
+        )
+        if "data" in fields:
+            events.append((int(fields.get("id", 0)), fields.get("event"), json.loads(fields["data"])))
+    return events
+
+
+def _subscribe_request(task_id, text="hello there"):
+    return {"jsonrpc": "2.0", "id": "1", "method": "tasks/sendSubscribe",
+            "params": {"id": task_id, "message": {"parts": [{"type": "text", "text": text}]}}}
+
+
+class TestA2AStreaming:
+    def _server(self, reply="one two three"):
+        card = AgentCard(name="proj", description="", url="http://localhost:9000")
+        agent = BaseAgentV2(name="Bot", runtime=StubRuntime(reply=reply))
+        return A2AServer(card=card, agent=agent)
+
+    def _client(self, srv):
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=srv.app), base_url="http://a2a")
+
+    async def test_send_subscribe_streams_deltas_then_final_status(self):
+        srv = self._server()
+        async with self._client(srv) as client:
+            resp = await client.post("/", json=_subscribe_request("t1"))
+            assert resp.json()["result"] == {"taskId": "t1", "streamUrl": "/tasks/t1/stream"}
+            stream = await client.get("/tasks/t1/stream")
+
+        events = _sse_events(stream.text)
+        ids = [e[0] for e in events]
+        assert ids == sorted(ids) and len(set(ids)) == len(ids)
+        states = [e[2]["status"]["state"] for e in events if e[1] == "status"]
+        assert states == ["submitted", "working", "completed"]
+        chunks = [e[2]["artifact"] for e in events if e[1] == "artifact"]
+        assert "".join(p["text"] for c in chunks for p in c["parts"]) == "one two three "
+        assert len({c["artifactId"] for c in chunks}) == 1
+        assert chunks[-1]["lastChunk"] and not any(c["lastChunk"] for c in chunks[:-1])
+        assert events[-1][2]["final"] and events[-1][2]["status"]["state"] == "completed"
+        assert srv._tasks.get("t1").artifacts[0].parts[0].text == "one two three "
+
+    async def test_reconnect_resumes_after_last_event_id(self):
+        srv = self._server()
+        async with self._client(srv) as client:
+            await client.post("/", json=_subscribe_request("t2"))
+            first = _sse_events((await client.get("/tasks/t2/stream")).text)
+            resumed = _sse_events((await client.get(
+                "/tasks/t2/stream", headers={"Last-Event-ID": str(first[1][0])}
+            )).text)
+        assert resumed == first[2:]
+
+    async def test_post_with_event_stream_accept_wraps_jsonrpc(self):
+        srv = self._server()
+        async with self._client(srv) as client:
+            resp = await client.post(
+                "/", json=_subscribe_request("t3"), headers={"Accept": "text/event-stream"}
+            )
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        events = _sse_events(resp.text)
+        assert all(e[2]["jsonrpc"] == "2.0" and e[2]["id"] == "1" for e in events)
+        assert events[-1][2]["result"]["status"]["state"] == "completed"
+
+    async def test_reused_task_id_is_rejected(self):
+        srv = self._server()
+        async with self._client(srv) as client:
+            await client.post("/", json=_subscribe_request("t4"))
+            first = (await client.get("/tasks/t4/stream")).text
+            resp = await client.post("/", json=_subscribe_request("t4", text="again"))
+            assert resp.json()["error"]["code"] == -32602
+            assert (await client.get("/tasks/t4/stream")).text == first
+        assert srv._tasks.get("t4").history[0].text != "again"
+
+    async def test_unknown_task_stream_reports_error(self):
+        async with self._client(self._server()) as client:
+            resp = await client.get("/tasks/missing/stream")
+        assert _sse_events(resp.text)[0][2] == {"error": "task not found"}
+
+
+class TestTaskChannel:
+    async def test_fan_out_and_heartbeat(self):
+        channel = TaskChannel("t")
+
+        async def collect():
+            return [e if e is None else e.data for e in [x async for x in channel.subscribe(heartbeat=0.01)]]
+
+        subscribers = [asyncio.ensure_future(collect()) for _ in range(2)]
+        await asyncio.sleep(0.03)
+        channel.publish("artifact", {"n": 1})
+        channel.publish("status", {"n": 2, "final": True})
+        results = await asyncio.gather(*subscribers)
+        for got in results:
+            assert None in got
+            assert [e for e in got if e is not None] == [{"n": 1}, {"n": 2, "final": True}]
+        assert channel.subscriber_count == 0
+
+    async def test_slow_subscriber_is_disconnected(self):
+        channel = TaskChannel("t", queue_size=2)
+        stream = channel.subscribe()
+        first = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        for n in range(5):
+            channel.publish("artifact", {"n": n})
+        got = [(await first).data] + [e.data async for e in stream]
+        assert {"n": 4} not in got and channel.subscriber_count == 0
+
+
+class TestTaskEventBus:
+    def test_finished_channels_expire_and_are_capped(self, monkeypatch):
+        clock = [1000.0]
+        monkeypatch.setattr("oflo_agent_protocol.protocols.a2a.events.time.monotonic", lambda: clock[0])
+        bus = TaskEventBus(retention=60, max_buffered_events=10)
+        for i in range(4):
+            for n in range(4):
+                bus.publish_artifact(f"t{i}", {"n": n})
+            bus.publish_status(f"t{i}", {"state": "completed"})
+        # 5 events per finished task, at most 10 buffered: only the newest two remain.
+        assert [bus.get(f"t{i}") is not None for i in range(4)] == [False, False, True, True]
+        clock[0] += 61
+        bus.publish_status("t9", {"state": "working"})
+        assert len(bus) == 1 and bus.get("t9") is not None
+
+    def test_orphaned_channels_expire_unless_watched(self, monkeypatch):
+        clock = [1000.0]
+        monkeypatch.setattr("oflo_agent_protocol.protocols.a2a.events.time.monotonic", lambda: clock[0])
+        bus = TaskEventBus(idle_timeout=600)
+        bus.publish_status("orphan", {"state": "working"})
+        watched = bus.channel("watched")
+        watched.publish("status", {"state": "working"})
+        watched._subscribers.append(asyncio.Queue())
+        clock[0] += 601
+        bus.publish_status("fresh", {"state": "working"})
+        assert bus.get("orphan") is None
+        assert bus.get("watched") is watched and bus.get("fresh") is not None
+
+
+# ── A2A task execution ────────────────────────────────────────────────────────
+
+class _GatedAgent:
+    """Agent whose replies wait until the test opens the gate."""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.started = []
+
+    async def chat(self, text):
+        self.started.append(text)
+        await self.gate.wait()
+        return f"done: {text}"
+
+
+def _send_request(task_id, text="work", blocking=True, session_id=None):
+    return {"jsonrpc": "2.0", "id": task_id, "method": "tasks/send",
+            "params": {"id": task_id, "sessionId": session_id,
+                       "message": {"parts": [{"type": "text", "text": text}]},
+                       "configuration": {"blocking": blocking}}}
+
+
+class TestA2ATaskExecution:
+    def _server(self, agent, **kwargs):
+        card = AgentCard(name="proj", description="", url="http://localhost:9000")
+        return A2AServer(card=card, agent=agent, metrics=MetricsRegistry(), **kwargs)
+
+    def _client(self, srv):
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=srv.app), base_url="http://a2a")
+
+    async def test_non_blocking_send_returns_submitted_then_completes(self):
+        agent = _GatedAgent()
+        srv = self._server(agent)
+        async with self._client(srv) as client:
+            resp = await client.post("/", json=_send_request("t1", blocking=False))
+            assert resp.json()["result"]["status"]["state"] == "submitted"
+            await asyncio.sleep(0)
+            assert srv._tasks.get("t1").status.state == "working"
+            agent.gate.set()
+            await asyncio.sleep(0.01)
+            got = (await client.post("/", json={"jsonrpc": "2.0", "id": "g", "method": "tasks/get",
+                                                "params": {"id": "t1"}})).json()
+        assert got["result"]["status"]["state"] == "completed"
+        assert got["result"]["artifacts"][0]["parts"][0]["text"] == "done: work"
+
+    async def test_cancel_interrupts_running_agent(self):
+        agent = _GatedAgent()
+        srv = self._server(agent)
+        async with self._client(srv) as client:
+            await client.post("/", json=_send_request("t1", blocking=False))
+            await asyncio.sleep(0)
+            resp = await client.post("/", json={"jsonrpc": "2.0", "id": "c", "method": "tasks/cancel",
+                                                "params": {"id": "t1"}})
+            assert resp.json()["result"]["status"]["state"] == "canceled"
+            await asyncio.sleep(0.01)
+        assert srv._executor.handle("t1") is None
+        assert srv._tasks.get("t1").status.state == "canceled" and not srv._tasks.get("t1").artifacts
+
+    async def test_overload_is_rejected_with_busy_error(self):
+        agent = _GatedAgent()
+        srv = self._server(agent, max_concurrent_tasks=1, max_queued_tasks=1)
+        async with self._client(srv) as client:
+            for tid in ("a", "b"):
+                resp = await client.post("/", json=_send_request(tid, blocking=False))
+                assert "result" in resp.json()
+            busy = (await client.post("/", json=_send_request("c", blocking=False))).json()
+            assert busy["error"]["code"] == -32000
+            assert "c" not in srv._tasks
+            await asyncio.sleep(0)
+            assert agent.started == ["work"]  # one worker, one queued
+            agent.gate.set()
+            await asyncio.sleep(0.01)
+        assert srv._tasks.get("b").status.state == "completed"
+
+    async def test_batch_runs_under_its_concurrency_limit(self):
+        agent = _GatedAgent()
+        srv = self._server(agent, max_concurrent_tasks=1, max_queued_tasks=1, batch_concurrency=2)
+        batch = [_send_request(f"t{n}", text=f"m{n}") for n in range(5)]
+        batch.append({"jsonrpc": "2.0", "id": "x", "method": "tasks/nope", "params": {}})
+        batch.append({"jsonrpc": "2.0", "method": "tasks/get", "params": {"id": "t0"}})  # notification
+        async with self._client(srv) as client:
+            pending = asyncio.ensure_future(client.post("/", json=batch))
+            await asyncio.sleep(0.01)
+            assert srv._executor.running + srv._executor.queued == 2  # no busy rejections
+            agent.gate.set()
+            replies = (await pending).json()
+        assert [r["id"] for r in replies] == ["t0", "t1", "t2", "t3", "t4", "x"]
+        assert all(r["result"]["status"]["state"] == "completed" for r in replies[:5])
+        assert replies[5]["error"]["code"] == -32601
+
+    async def test_oversized_batch_is_rejected(self):
+        srv = self._server(_GatedAgent(), max_batch_size=2)
+        async with self._client(srv) as client:
+            resp = await client.post("/", json=[_send_request(f"t{n}") for n in range(3)])
+        assert resp.json()["error"]["code"] == -32600 and len(srv._tasks) == 0
+
+
+class TestA2APushNotifications:
+    def _server(self, agent, **kwargs):
+        card = AgentCard(name="proj", description="", url="http://localhost:9000")
+        return A2AServer(card=card, agent=agent, metrics=MetricsRegistry(), **kwargs)
+
+    def _push_server(self, agent, **kwargs):
+        from oflo_agent_protocol.protocols.a2a.push import WebhookDispatcher
+
+        # PushReceiver listens on loopback, which the default dispatcher refuses.
+        dispatcher = WebhookDispatcher(allow_private_hosts=True)
+        return self._server(agent, push_notifications=True, webhook_dispatcher=dispatcher, **kwargs)
+
+    def _client(self, srv):
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=srv.app), base_url="http://a2a")
+
+    async def test_status_transitions_reach_the_webhook(self):
+        from oflo_agent_protocol.protocols.a2a.push import PushReceiver
+
+        agent, seen = _GatedAgent(), []
+        srv = self._push_server(agent)
+        async with PushReceiver(on_event=seen.append) as receiver, self._client(srv) as client:
+            request = _send_request("t1", blocking=False)
+            request["params"]["pushNotification"] = receiver.config().to_dict()
+            await client.post("/", json=request)
+            agent.gate.set()
+            final = await receiver.wait("t1", timeout=2)
+            got = (await client.post("/", json={"jsonrpc": "2.0", "id": "g", "method": "tasks/pushNotification/get",
+                                                "params": {"id": "t1"}})).json()
+            await srv.shutdown()
+        assert [e["status"]["state"] for e in seen] == ["submitted", "working", "completed"]
+        assert final["task"]["artifacts"][0]["parts"][0]["text"] == "done: work"
+        assert got["result"]["pushNotificationConfig"] == {"url": receiver.url}  # no token
+        assert srv._card.to_dict()["capabilities"]["pushNotifications"] is True
+
+    async def test_webhook_set_after_completion_delivers_outcome(self):
+        from oflo_agent_protocol.protocols.a2a.push import PushReceiver
+
+        agent = _GatedAgent()
+        agent.gate.set()
+        srv = self._push_server(agent)
+        async with PushReceiver() as receiver, self._client(srv) as client:
+            await client.post("/", json=_send_request("t1"))
+            resp = await client.post("/", json={
+                "jsonrpc": "2.0", "id": "s", "method": "tasks/pushNotification/set",
+                "params": {"id": "t1", "pushNotificationConfig": receiver.config().to_dict()}})
+            assert "result" in resp.json()
+            final = await receiver.wait("t1", timeout=2)
+            await srv.shutdown()
+        assert final["status"]["state"] == "completed"
+
+    async def test_push_is_off_by_default(self):
+        srv = self._server(_GatedAgent())
+        async with self._client(srv) as client:
+            resp = await client.post("/", json={
+                "jsonrpc": "2.0", "id": "s", "method": "tasks/pushNotification/set",
+                "params": {"id": "t1", "pushNotificationConfig": {"url": "http://x/hook"}}})
+        assert resp.json()["error"]["code"] == -32003
+
+    @pytest.mark.parametrize("url", [
+        "http://127.0.0.1:8080/hook", "http://localhost/hook", "http://169.254.169.254/latest",
+        "http://10.0.0.7/hook", "http://[::1]/hook", "http://[::ffff:192.168.1.1]/hook", "ftp://example.com/",
+    ])
+    async def test_webhooks_to_internal_hosts_are_rejected(self, url):
+        agent = _GatedAgent()
+        agent.gate.set()
+        srv = self._server(agent, push_notifications=True)
+        async with self._client(srv) as client:
+            await client.post("/", json=_send_request("t1"))
+            resp = await client.post("/", json={
+                "jsonrpc": "2.0", "id": "s", "method": "tasks/pushNotification/set",
+                "params": {"id": "t1", "pushNotificationConfig": {"url": url}}})
+            await srv.shutdown()
+        assert resp.json()["error"]["code"] == -32602
+
+    async def test_webhook_cannot_be_redirected(self):
+        agent = _GatedAgent()
+        srv = self._server(agent, push_notifications=True, push_url_validator=lambda url: None)
+        async with self._client(srv) as client:
+            request = _send_request("t1", blocking=False)
+            request["params"]["pushNotification"] = {"url": "https://owner.example/hook", "token": "a"}
+            await client.post("/", json=request)
+
+            def set_hook(hook):
+                return client.post("/", json={
+                    "jsonrpc": "2.0", "id": "s", "method": "tasks/pushNotification/set",
+                    "params": {"id": "t1", "pushNotificationConfig": hook}})
+
+            same = await set_hook({"url": "https://owner.example/hook", "token": "a"})
+            other = await set_hook({"url": "https://attacker.example/hook"})
+            agent.gate.set()
+            await srv.shutdown(timeout=0.1)  # .example never resolves; don't wait out the retries
+        assert "result" in same.json()
+        assert other.json()["error"]["code"] == -32602
+
+    async def test_dispatcher_drops_hosts_resolving_to_private_addresses(self):
+        from oflo_agent_protocol.protocols.a2a.push import _PublicResolver
+
+        class Rebinding:
+            async def resolve(self, host, port=0, family=0):
+                return [{"hostname": host, "host": "10.1.2.3", "port": port, "family": family,
+                         "proto": 0, "flags": 0}]
+
+            async def close(self):
+                pass
+
+        with pytest.raises(OSError):
+            await _PublicResolver(Rebinding()).resolve("hook.example", 443)
+
+    async def test_dispatcher_retries_and_batches(self):
+        from aiohttp import web
+        from aiohttp.test_utils import TestServer
+
+        from oflo_agent_protocol.protocols.a2a.push import WebhookDispatcher
+        from oflo_agent_protocol.protocols.a2a.types import PushNotificationConfig
+
+        bodies, statuses = [], [503, 204]
+
+        async def hook(request):
+            bodies.append((request.headers.get("X-A2A-Notification-Token"), await request.json()))
+            return web.Response(status=statuses.pop(0) if statuses else 400)
+
+        app = web.Application()
+        app.router.add_post("/hook", hook)
+        srv = TestServer(app)
+        await srv.start_server()
+        dispatcher = WebhookDispatcher(backoff=0.01, allow_private_hosts=True)
+        config = PushNotificationConfig(url=str(srv.make_url("/hook")), token="tok")
+        for n in range(3):
+            dispatcher.enqueue(config, {"id": "t", "n": n})
+        await dispatcher.close()
+        assert dispatcher.delivered == 3 and dispatcher.pending == 0
+        assert bodies[0] == bodies[1] == ("tok", [{"id": "t", "n": n} for n in range(3)])
+
+        dispatcher = WebhookDispatcher(backoff=0.01, allow_private_hosts=True)
+        dispatcher.enqueue(config, {"id": "t"})  # 400: rejected, not retried
+        await dispatcher.close()
+        await srv.close()
+        assert dispatcher.failed == 1 and len(bodies) == 3
+
+    async def test_receiver_rejects_wrong_token(self):
+        from oflo_agent_protocol.protocols.a2a.push import PushReceiver
+
+        async with PushReceiver() as receiver, httpx.AsyncClient() as client:
+            resp = await client.post(receiver.url, json={"id": "t", "final": True},
+                                     headers={"X-A2A-Notification-Token": "nope"})
+        assert resp.status_code == 401
+
+
+class TestTaskExecutor:
+    async def test_session_turns_run_in_order(self):
+        executor = TaskExecutor(max_workers=4)
+        order = []
+
+        def turn(name, delay):
+            async def run():
+                order.append(f"{name}-start")
+                await asyncio.sleep(delay)
+                order.append(f"{name}-end")
+            return run
+
+        first = executor.submit("1", turn("first", 0.02), session_id="s")
+        second = executor.submit("2", turn("second", 0), session_id="s")
+        other = executor.submit("3", turn("other", 0), session_id="t")
+        await asyncio.gather(first, second, other)
+        assert order.index("first-end") < order.index("second-start")
+        assert order.index("other-end") < order.index("first-end")
+
+    async def test_cancelled_turn_does_not_let_the_next_overtake(self):
+        executor = TaskExecutor(max_workers=4)
+        log = []
+
+        def turn(name, delay):
+            async def run():
+                log.append(f"start {name}")
+                await asyncio.sleep(delay)
+                log.append(f"end {name}")
+            return run
+
+        a = executor.submit("a", turn("A", 0.05), session_id="s")
+        b = executor.submit("b", turn("B", 0), session_id="s")
+        c = executor.submit("c", turn("C", 0), session_id="s")
+        await asyncio.sleep(0)
+        assert executor.cancel("b")
+        await asyncio.gather(a, c, b, return_exceptions=True)
+        assert log == ["start A", "end A", "start C", "end C"]
+        await asyncio.sleep(0)
+        assert not executor._session_tail
+
+    async def test_cancel_queued_task_frees_its_place(self):
+        executor = TaskExecutor(max_workers=1, max_queue=1)
+        gate = asyncio.Event()
+        running = executor.submit("1", gate.wait)
+        queued = executor.submit("2", gate.wait)
+        with pytest.raises(ExecutorBusy):
+            executor.submit("3", gate.wait)
+        await asyncio.sleep(0)
+        assert executor.cancel("2")
+        await asyncio.sleep(0.01)
+        assert queued.cancelled() and executor.has_capacity
+        gate.set()
+        await running
+        assert executor.running == 0 and executor.queued == 0
+
+
+# ── A2A task store ────────────────────────────────────────────────────────────
+
+def _finished_task(task_id, text="x"):
+    return A2ATask(
+        task_id=task_id,
+        status=TaskStatusUpdate(state="completed"),
+        history=[A2AMessage.text_message("user", text)],
+        artifacts=[Artifact(name="reply", parts=[TextPart(text=text)])],
+    )
+
+
+class TestTaskStore:
+    def test_task_round_trips_through_dict(self):
+        task = _finished_task("t1", "hello")
+        task.status.message = A2AMessage.text_message("agent", "done")
+        assert A2ATask.from_dict(task.to_dict()).to_dict() == task.to_dict()
+
+    def test_finished_task_dict_is_built_once(self):
+        task = _finished_task("t1", "hello")
+        first = task.to_dict()
+        assert task.to_dict() is first
+        task.status = TaskStatusUpdate(state="failed")
+        assert task.to_dict()["status"]["state"] == "failed"
+        live = A2ATask(task_id="live")
+        assert live.to_dict() is not live.to_dict()
+
+    async def test_card_is_rendered_once(self):
+        card = AgentCard(name="proj", description="", url="http://localhost:9000")
+        srv = A2AServer(card=card, agent=_GatedAgent(), metrics=MetricsRegistry())
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=srv.app), base_url="http://a") as c:
+            first = await c.get("/.well-known/agent.json")
+            second = await c.get("/.well-known/agent.json")
+        assert first.headers["content-type"] == "application/json"
+        assert first.content == second.content and first.json()["name"] == "proj"
+
+    def test_lru_eviction_spares_live_tasks(self):
+        store = InMemoryTaskStore(max_tasks=2)
+        store.put(A2ATask(task_id="live"))
+        store.put(_finished_task("a"))
+        store.put(_finished_task("b"))
+        assert "live" in store and "a" not in store and "b" in store
+        assert store.evicted == 1
+
+    def test_byte_ceiling_is_enforced(self):
+        store = InMemoryTaskStore(max_bytes=2000)
+        for n in range(10):
+            store.put(_finished_task(f"t{n}", "y" * 300))
+        assert store.memory_bytes <= 2000
+        assert "t9" in store and "t0" not in store
+
+    def test_finished_tasks_expire(self, monkeypatch):
+        store = InMemoryTaskStore(ttl=10)
+        store.put(_finished_task("old"))
+        store.put(A2ATask(task_id="live"))
+        later = time.monotonic() + 11
+        monkeypatch.setattr(time, "monotonic", lambda: later)
+        assert store.get("old") is None and store.get("live") is not None
+        assert store.memory_bytes == store._sizes["live"]
+
+    def test_sqlite_store_survives_restart(self, tmp_path):
+        path = str(tmp_path / "tasks.sqlite3")
+        store = SQLiteTaskStore(path)
+        store.put(_finished_task("done", "kept"))
+        store.put(A2ATask(task_id="running", status=TaskStatusUpdate(state="working")))
+        store.close()
+
+        reopened = SQLiteTaskStore(path)
+        assert reopened.get("done").artifacts[0].parts[0].text == "kept"
+        assert reopened.get("running").status.state == "failed"
+        assert len(reopened) == 2
+        reopened.close()
+
+    def test_sqlite_put_does_not_wait_on_sqlite(self, tmp_path):
+        store = SQLiteTaskStore(str(tmp_path / "tasks.sqlite3"), cache=InMemoryTaskStore(max_tasks=1))
+        with store._db_lock:  # the writer is stuck mid-commit
+            started = time.monotonic()
+            store.put(_finished_task("a", "first"))
+            store.put(_finished_task("b", "second"))  # evicts "a" from the cache
+            assert time.monotonic() - started < 0.5
+            assert store.get("a").artifacts[0].parts[0].text == "first"  # served from pending
+        store.close()
+
+    def test_sqlite_row_count_tracks_writes(self, tmp_path):
+        path = str(tmp_path / "tasks.sqlite3")
+        store = SQLiteTaskStore(path)
+        for n in range(3):
+            store.put(_finished_task(f"t{n}"))
+        store.put(_finished_task("t1", "updated"))
+        store.delete("t2")
+        store.delete("missing")
+        store.flush()
+        assert len(store) == 2
+        store.close()
+        reopened = SQLiteTaskStore(path)
+        assert len(reopened) == 2
+        reopened.close()
+
+    async def test_server_answers_get_from_durable_store(self, tmp_path):
+        path = str(tmp_path / "tasks.sqlite3")
+        card = AgentCard(name="proj", description="", url="http://localhost:9000")
+
+        def server():
+            agent = BaseAgentV2(name="Bot", runtime=StubRuntime(reply="persisted"))
+            return A2AServer(card=card, agent=agent, metrics=MetricsRegistry(),
+                             task_store=SQLiteTaskStore(path))
+
+        first = server()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=first.app), base_url="http://a") as c:
+            await c.post("/", json=_send_request("t1"))
+        first._tasks.close()
+
+        second = server()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=second.app), base_url="http://a") as c:
+            got = (await c.post("/", json={"jsonrpc": "2.0", "id": "g", "method": "tasks/get",
+                                           "params": {"id": "t1"}})).json()
+        assert got["result"]["artifacts"][0]["parts"][0]["text"] == "persisted"
+        second._tasks.close()
+
+
+# ── A2A sessions & skill routing ──────────────────────────────────────────────
+
+class TestA2ASessions:
+    async def test_sessions_get_isolated_history(self):
+        runtime = StubRuntime()
+        agent = BaseAgentV2(name="Bot", runtime=runtime)
+        card = AgentCard(name="proj", description="", url="http://localhost:9000")
+        srv = A2AServer(card=card, agent=agent, metrics=MetricsRegistry())
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=srv.app), base_url="http://a") as c:
+            await c.post("/", json=_send_request("a1", "alpha one", session_id="A"))
+            await c.post("/", json=_send_request("b1", "beta one", session_id="B"))
+            await c.post("/", json=_send_request("a2", "alpha two", session_id="A"))
+
+        last = [m.content for m in runtime.calls[-1]["messages"]]
+        assert last == ["alpha one", "stub reply", "alpha two"]
+        assert [m.content for m in runtime.calls[1]["messages"]] == ["beta one"]
+        assert agent.history == [] and len(agent.sessions) == 2
+
+    async def test_one_off_tasks_do_not_share_history(self):
+        runtime = StubRuntime()
+        agent = BaseAgentV2(name="Bot", runtime=runtime)
+        card = AgentCard(name="proj", description="", url="http://localhost:9000")
+        srv = A2AServer(card=card, agent=agent, metrics=MetricsRegistry())
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=srv.app), base_url="http://a") as c:
+            await c.post("/", json=_send_request("t1", "first"))
+            await c.post("/", json=_send_request("t2", "second"))
+        assert [m.content for m in runtime.calls[1]["messages"]] == ["second"]
+        assert len(agent.sessions) == 0
+
+
+class TestA2AGateway:
+    def _gateway(self):
+        self.analyst_rt, self.writer_rt = StubRuntime("numbers"), StubRuntime("prose")
+        analyst = BaseAgentV2(name="Analyst", system_prompt="You analyse revenue data.",
+                              runtime=self.analyst_rt)
+        writer = BaseAgentV2(name="Writer", system_prompt="You write marketing copy.",
+                             runtime=self.writer_rt)
+        card = AgentCard(name="proj", description="", url="http://localhost:9000")
+        return A2AGateway(card, agents=[analyst, writer], tags={"Writer": ["blog"]},
+                          metrics=MetricsRegistry())
+
+    async def _send(self, gw, request):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=gw.app), base_url="http://a") as c:
+            return (await c.post("/", json=request)).json()
+
+    async def test_card_lists_one_skill_per_agent(self):
+        gw = self._gateway()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=gw.app), base_url="http://a") as c:
+            card = (await c.get("/.well-known/agent.json")).json()
+        assert [(s["id"], s["description"]) for s in card["skills"]] == [
+            ("analyst", "You analyse revenue data."), ("writer", "You write marketing copy."),
+        ]
+
+    async def test_routes_by_explicit_skill_then_keywords(self):
+        gw = self._gateway()
+        request = _send_request("t1", "anything")
+        request["params"]["metadata"] = {"skillId": "writer"}
+        assert (await self._send(gw, request))["result"]["metadata"]["skillId"] == "writer"
+
+        routed = await self._send(gw, _send_request("t2", "Draft a blog post"))
+        assert routed["result"]["metadata"]["skillId"] == "writer"
+        fallback = await self._send(gw, _send_request("t3", "hello"))
+        assert fallback["result"]["metadata"]["skillId"] == "analyst"
+        assert len(self.writer_rt.calls) == 2 and len(self.analyst_rt.calls) == 1
+
+    async def test_unknown_skill_is_invalid_params(self):
+        request = _send_request("t1", "hi")
+        request["params"]["metadata"] = {"skillId": "nobody"}
+        resp = await self._send(self._gateway(), request)
+        assert resp["error"]["code"] == -32602
+
+
+class _FakeA2ARemote:
+    """Card + tasks/send endpoints that answer every task with a completed echo."""
+
+    def __init__(self) -> None:
+        from aiohttp import web
+
+        self.card_hits = 0
+        self.sends = 0
+        self.batches = []
+        self.session_ids = []
+        self.app = web.Application()
+        self.app.router.add_get("/.well-known/agent.json", self._card)
+        self.app.router.add_post("/", self._rpc)
+
+    async def _card(self, request):
+        from aiohttp import web
+
+        self.card_hits += 1
+        return web.json_response(
+            AgentCard(name="remote", description="", url="").to_dict(),
+            headers={"Cache-Control": "public, max-age=60"},
+        )
+
+    async def _rpc(self, request):
+        from aiohttp import web
+
+        body = await request.json()
+        if isinstance(body, list):
+            self.batches.append(len(body))
+            return web.json_response([self._reply(item) for item in reversed(body)])
+        return web.json_response(self._reply(body))
+
+    async def _push(self, hook, task):
+        import aiohttp
+
+        async with aiohttp.ClientSession() as session:
+            await session.post(hook["url"], json=[{"id": task.task_id, "status": task.status.to_dict(),
+                                                   "final": True, "task": task.to_dict()}],
+                               headers={"X-A2A-Notification-Token": hook["token"]})
+
+    def _reply(self, body):
+        self.sends += 1
+        self.session_ids.append(body["params"].get("sessionId"))
+        text = body["params"]["message"]["parts"][0]["text"]
+        hook = body["params"].get("pushNotification")
+        if text == "busy":
+            return {"jsonrpc": "2.0", "id": body["id"], "error": {"code": -32000, "message": "Server busy"}}
+        task = A2ATask(
+            task_id=body["params"]["id"],
+            status=TaskStatusUpdate(state="completed"),
+            artifacts=[Artifact(name="reply", parts=[TextPart(text=f"echo: {text}")])],
+        )
+        if hook:
+            asyncio.ensure_future(self._push(hook, task))
+            submitted = A2ATask(task_id=task.task_id)
+            return {"jsonrpc": "2.0", "id": body["id"], "result": submitted.to_dict()}
+        return {"jsonrpc": "2.0", "id": body["id"], "result": task.to_dict()}
+
+
+class TestA2AClientPool:
+    @pytest.fixture
+    async def remote(self):
+        from aiohttp.test_utils import TestServer
+
+        from oflo_agent_protocol.protocols.a2a import client
+
+        fake = _FakeA2ARemote()
+        srv = TestServer(fake.app)
+        await srv.start_server()
+        fake.url = str(srv.make_url("")).rstrip("/")
+        yield fake
+        await client.close_clients()
+        client._card_cache.clear()
+        await srv.close()
+
+    async def test_pool_returns_one_client_per_remote(self, remote):
+        from oflo_agent_protocol.protocols.a2a.client import get_client
+
+        a = get_client(remote.url)
+        assert get_client(remote.url + "/") is a
+        assert get_client(remote.url, api_key="k") is not a
+        async with a:
+            pass
+        assert a._session is not None and not a._session.closed  # pooled: left open
+
+    async def test_discover_is_cached_until_refresh(self, remote):
+        from oflo_agent_protocol.protocols.a2a.client import get_client
+
+        client = get_client(remote.url)
+        card = await client.discover()
+        assert card.name == "remote" and card.url == remote.url
+        assert await client.discover() is card
+        assert remote.card_hits == 1
+        await client.discover(refresh=True)
+        assert remote.card_hits == 2
+
+    async def test_call_project_reuses_pooled_session(self, remote):
+        from oflo_agent_protocol.projects.base_project import Project
+        from oflo_agent_protocol.protocols.a2a.client import get_client
+
+        project = Project("caller")
+        assert await project.call_project(remote.url, "hi") == "echo: hi"
+        session = get_client(remote.url)._session
+        assert await project.call_project(remote.url, "again") == "echo: again"
+        assert get_client(remote.url)._session is session
+        assert remote.sends == 2  # blocking send: no polling round trips
+
+    async def test_send_many_batches_and_reports_refusals(self, remote):
+        from oflo_agent_protocol.protocols.a2a.client import get_client
+
+        messages = [f"m{n}" for n in range(6)] + ["busy"]
+        tasks = [t async for t in get_client(remote.url).send_many(iter(messages), chunk_size=3)]
+        assert sorted(remote.batches) == [1, 3, 3]
+        assert remote.session_ids == [None] * 7  # one session per task, never a shared one
+        done = {t.artifacts[0].parts[0].text for t in tasks if t.status.state == "completed"}
+        assert done == {f"echo: m{n}" for n in range(6)}
+        (refused,) = [t for t in tasks if t.status.state == "failed"]
+        assert refused.metadata["error"]["code"] == -32000 and refused.history[0].text == "busy"
+
+    async def test_send_and_wait_takes_result_from_push(self, remote):
+        from oflo_agent_protocol.protocols.a2a.client import get_client
+        from oflo_agent_protocol.protocols.a2a.push import PushReceiver
+
+        async with PushReceiver() as receiver:
+            task = await get_client(remote.url).send_and_wait("hi", receiver=receiver, timeout=2)
+        assert task.artifacts[0].parts[0].text == "echo: hi"
+        assert remote.sends == 1  # no tasks/get